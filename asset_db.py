@@ -0,0 +1,24 @@
+from db_discovery import find_database
+
+# The My Assets DB, shared by generate_asset_chart.py (reads it) and
+# create_asset_db.py (writes it)
+
+# Korean / English column names of the My Assets DB
+ASSET_FIELDS = {
+    "item": ["항목", "Item"],
+    "amount": ["금액", "Amount"],
+    "type": ["유형", "Type"]
+}
+
+ASSET_DB_FALLBACK_ID = "2f90d907-031e-8105-8ed9-d2dbd48595ce" # My Assets Fallback
+
+def first_property(props, names):
+    # First non-empty property among the given column names
+    for name in names:
+        if props.get(name): return props[name]
+    return {}
+
+def find_asset_db(token, page_id):
+    print(f"Scanning Page {page_id} for Asset DB...")
+    # Check for "자산" or "Asset"
+    return find_database(token, page_id, lambda title: "자산" in title or "Asset" in title)
@@ -0,0 +1,213 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import contextlib
+import subprocess
+from datetime import datetime, timezone
+
+import cache_store
+import notion_api
+from fake_notion_server import FakeNotion, start_server, TRADING_DB_ID, ASSET_DB_ID
+from generate_calendar_widget import TRADE_FIELDS, parse_data, generate_interactive_html
+from generate_asset_chart import fetch_assets, generate_html
+from news_feed import iter_rss_items, merge_feeds
+from schema_cache import DatabaseSchema
+from update_daily_news import select_candidates
+
+# Stage timings for every widget pipeline on synthetic data:
+#
+#   python benchmark.py                                  # 1k / 10k / 50k trades
+#   python benchmark.py --sizes 1000,200000 --repeat 7
+#   python benchmark.py --output after.json --compare before.json
+#
+# "fetch" stages go over HTTP to fake_notion_server.py (no network); every
+# stage is run once as warm-up and then --repeat times.
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+DEFAULT_OUTPUT = "benchmark_results.json"
+
+def measure(fn, repeat, warmup=1):
+    # -> (stats dict, last result). Job output is swallowed so it doesn't skew timings.
+    samples = []
+    result = None
+    for i in range(warmup + repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed)
+    return {
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.mean(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "min_s": min(samples),
+        "runs": len(samples)
+    }, result
+
+def database_pages(state, db_id, projection=None):
+    # All rows in API shape straight from the fake's state (no HTTP)
+    pages = []
+    body = {}
+    while True:
+        data = state.query_database(db_id, body, projection)
+        pages.extend(data["results"])
+        if not data["has_more"]: return pages
+        body = {"start_cursor": data["next_cursor"]}
+
+def bench_trades(size, repeat, fetch_limit, tmp_dir):
+    server = start_server(trades=size)
+    state = server.state
+    notion_api.NOTION_API_BASE = server.env["NOTION_API_BASE"]
+    try:
+        schema = DatabaseSchema.from_api(state.databases[TRADING_DB_ID.replace("-", "")])
+        columns = schema.bind(TRADE_FIELDS)
+        projection = schema.projection(TRADE_FIELDS)
+
+        stages = {}
+        if size <= fetch_limit:
+            stages["fetch"], pages = measure(
+                lambda: list(notion_api.iter_database_pages("fake_token", TRADING_DB_ID, filter_properties=projection)), repeat)
+        else:
+            pages = database_pages(state, TRADING_DB_ID, projection)
+        assert len(pages) == size, f"expected {size} pages, got {len(pages)}"
+
+        stages["parse"], table = measure(lambda: parse_data(pages, columns), repeat)
+        stages["aggregate"], _ = measure(lambda: (table.totals_by_month(), table.totals_by_year(), table.rows_by_day()), repeat)
+        stages["render"], html = measure(lambda: generate_interactive_html(table), repeat)
+
+        path = os.path.join(tmp_dir, "index.html")
+        def write():
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+        stages["write"], _ = measure(write, repeat)
+        return stages, {"rows": size, "html_bytes": len(html.encode("utf-8"))}
+    finally:
+        server.shutdown()
+
+def bench_assets(size, repeat, tmp_dir):
+    server = start_server(trades=0, assets=size)
+    notion_api.NOTION_API_BASE = server.env["NOTION_API_BASE"]
+    try:
+        stages = {}
+        stages["fetch_parse"], assets = measure(lambda: fetch_assets("fake_token", ASSET_DB_ID), repeat)
+        stages["render"], html = measure(lambda: generate_html(assets), repeat)
+        path = os.path.join(tmp_dir, "asset_chart.html")
+        def write():
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+        stages["write"], _ = measure(write, repeat)
+        return stages, {"rows": len(assets), "html_bytes": len(html.encode("utf-8"))}
+    finally:
+        server.shutdown()
+
+def bench_rss(feeds, items, repeat):
+    state = FakeNotion(rss_items=items)
+    bodies = [state.rss_feed(f"keyword {i}") for i in range(feeds)]
+
+    stages = {}
+    stages["parse"], parsed = measure(lambda: [list(iter_rss_items(io.BytesIO(b))) for b in bodies], repeat)
+    stages["merge_select"], selected = measure(lambda: select_candidates(merge_feeds(parsed)), repeat)
+    return stages, {"feeds": feeds, "items": feeds * items, "feed_bytes": sum(len(b) for b in bodies)}
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        return None
+
+def run_benchmarks(sizes, repeat, fetch_limit, assets, rss_feeds, rss_items):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Keep schema/discovery caches of the runs out of the real .cache
+        cache_store.CACHE_DIR = os.path.join(tmp_dir, ".cache")
+        notion_api.rate_limiter = notion_api.RateLimiter(0)
+
+        for size in sizes:
+            print(f"Trading journal: {size} trades...")
+            stages, info = bench_trades(size, repeat, fetch_limit, tmp_dir)
+            results[f"calendar_{size}"] = {"stages": stages, "info": info}
+
+        print(f"Asset chart: {assets} assets...")
+        stages, info = bench_assets(assets, repeat, tmp_dir)
+        results[f"assets_{assets}"] = {"stages": stages, "info": info}
+
+        print(f"News: {rss_feeds} feeds x {rss_items} items...")
+        stages, info = bench_rss(rss_feeds, rss_items, repeat)
+        results[f"news_{rss_feeds}x{rss_items}"] = {"stages": stages, "info": info}
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat
+        },
+        "results": results
+    }
+
+def print_report(report, baseline=None, threshold=0.10, min_delta=0.001):
+    # Median per stage; with a baseline, the change against its median.
+    # Returns the number of stages slower than the baseline by more than
+    # `threshold` (relative) and `min_delta` seconds (so sub-millisecond
+    # stages don't flag on timer noise).
+    regressions = 0
+    base_results = (baseline or {}).get("results", {})
+    print(f"\n{'benchmark':<22} {'stage':<13} {'median ms':>10} {'stdev ms':>9}" + (f" {'baseline':>10} {'change':>8}" if baseline else ""))
+    for name, entry in report["results"].items():
+        for stage, stats in entry["stages"].items():
+            line = f"{name:<22} {stage:<13} {stats['median_s'] * 1000:10.2f} {stats['stdev_s'] * 1000:9.2f}"
+            base = base_results.get(name, {}).get("stages", {}).get(stage)
+            if base:
+                change = stats["median_s"] / base["median_s"] - 1 if base["median_s"] else 0.0
+                flag = ""
+                if change > threshold and stats["median_s"] - base["median_s"] > min_delta:
+                    regressions += 1
+                    flag = "  SLOWER"
+                line += f" {base['median_s'] * 1000:10.2f} {change:+8.1%}{flag}"
+            elif baseline:
+                line += f" {'-':>10} {'new':>8}"
+            print(line)
+    return regressions
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Time every widget pipeline stage on synthetic data.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="trade counts, comma separated")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage (after one warm-up)")
+    parser.add_argument("--fetch-limit", type=int, default=50000, help="largest size fetched over HTTP")
+    parser.add_argument("--assets", type=int, default=500)
+    parser.add_argument("--rss-feeds", type=int, default=7)
+    parser.add_argument("--rss-items", type=int, default=100)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="results JSON to write")
+    parser.add_argument("--compare", metavar="FILE", help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown reported as a regression (0.10 = 10%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = run_benchmarks(sizes, args.repeat, args.fetch_limit, args.assets, args.rss_feeds, args.rss_items)
+    regressions = print_report(report, baseline, args.threshold, args.min_delta_ms / 1000)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}.")
+    if regressions:
+        print(f"{regressions} stage(s) slower than {args.compare} by more than {args.threshold:.0%}.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import json
+import threading
+
+# Local state shared between runs (schema, discovery index, feed cache, ...).
+# In GitHub Actions the directory is restored/saved with actions/cache.
+CACHE_DIR = os.environ.get("NOTION_CACHE_DIR", ".cache")
+
+def cache_path(name):
+    return os.path.join(CACHE_DIR, name)
+
+def load_json(name, default=None):
+    try:
+        with open(cache_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except Exception as e:
+        print(f"Ignoring unreadable cache {name}: {e}")
+        return default
+
+def save_json(name, data):
+    # Write to a temp file first so an interrupted run never leaves half a cache behind
+    path = cache_path(name)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Could not write cache {name}: {e}")
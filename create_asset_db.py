@@ -1,20 +1,18 @@
 import os
+import re
+import csv
 import json
-import urllib.request
-import urllib.error
 import sys
+import argparse
+
+from asset_db import ASSET_FIELDS, ASSET_DB_FALLBACK_ID, first_property, find_asset_db
+from notion_api import notion_request, run_concurrently
+from schema_cache import query_with_schema
 
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
 def create_database(token, page_id):
-    url = "https://api.notion.com/v1/databases"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
     payload = {
         "parent": { "type": "page_id", "page_id": page_id },
         "title": [
@@ -40,67 +38,210 @@ def create_database(token, page_id):
         "is_inline": True
     }
     
-    data_json = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data_json, headers=headers)
+    db_data = notion_request(token, "databases", method="POST", payload=payload)
+    if db_data:
+        db_id = db_data.get("id")
+        print(f"Database created successfully: {db_id}")
+        return db_id
     
-    try:
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                resp_body = response.read().decode("utf-8")
-                db_data = json.loads(resp_body)
-                db_id = db_data.get("id")
-                print(f"Database created successfully: {db_id}")
-                return db_id
-    except urllib.error.HTTPError as e:
-        print(f"Failed to create DB: {e.code} {e.read().decode('utf-8')}")
-    except Exception as e:
-        print(f"Error: {e}")
-        
+    print("Failed to create DB.")
     return None
 
-def add_entry(token, db_id, item, amount, asset_type):
-    url = "https://api.notion.com/v1/pages"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
+def asset_properties(item, amount, asset_type, columns=None):
+    # columns: {"item": name, "amount": name, "type": name} of the target DB
+    columns = columns or DEFAULT_COLUMNS
+    props = {
+        columns["item"]: {
+            "title": [ { "text": { "content": item } } ]
+        },
+        columns["amount"]: {
+            "number": amount
+        }
     }
-    
+    if asset_type:
+        props[columns["type"]] = { "select": { "name": asset_type } }
+    return props
+
+def add_entry(token, db_id, item, amount, asset_type, columns=None):
     payload = {
         "parent": { "database_id": db_id },
-        "properties": {
-            "Item": {
-                "title": [ { "text": { "content": item } } ]
-            },
-            "Amount": {
-                "number": amount
-            },
-            "Type": {
-                "select": { "name": asset_type }
-            }
-        }
+        "properties": asset_properties(item, amount, asset_type, columns)
     }
     
-    data_json = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data_json, headers=headers)
-    
-    try:
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                print(f"Added entry: {item}")
-                return True
-    except urllib.error.HTTPError as e:
-         print(f"Failed to add entry {item}: {e.read().decode('utf-8')}")
-    except Exception as e:
-         print(f"Error adding {item}: {e}")
-         
+    if notion_request(token, "pages", method="POST", payload=payload):
+        print(f"Added entry: {item}")
+        return True
+    print(f"Failed to add entry {item}")
     return False
 
+# --- Bulk loader: python create_asset_db.py --load holdings.csv ---
+
+# A sync that would archive more than this share of the rows needs --force
+MAX_ARCHIVE_SHARE = 0.5
+
+DEFAULT_COLUMNS = {"item": "Item", "amount": "Amount", "type": "Type"}
+
+# Column names accepted in brokerage exports (matched case-insensitively)
+IMPORT_COLUMNS = {
+    "item": ["item", "항목", "종목명", "종목", "name", "symbol", "ticker"],
+    "amount": ["amount", "금액", "평가금액", "평가액", "market value", "value"],
+    "type": ["type", "유형", "자산구분", "구분", "asset class", "category"]
+}
+
+def parse_amount(value):
+    # "1,234,000", "₩1,234,000", "$ 1,500.50", "(300)" -> number
+    if isinstance(value, (int, float)): return value
+    text = re.sub(r"[^\d.\-()]", "", str(value or ""))
+    negative = text.startswith("(") and text.endswith(")")
+    text = text.strip("()")
+    if not text: return None
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    if number.is_integer(): number = int(number)
+    return -number if negative else number
+
+def map_row(row):
+    # One export row -> (item, amount, type) using IMPORT_COLUMNS
+    lowered = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+    values = {}
+    for role, names in IMPORT_COLUMNS.items():
+        values[role] = next((lowered[n] for n in names if lowered.get(n) not in (None, "")), None)
+    item = str(values["item"] or "").strip()
+    asset_type = str(values["type"] or "").strip() or None
+    return item, parse_amount(values["amount"]), asset_type
+
+def load_holdings(path):
+    # CSV or JSON (list of objects) -> {item: {"amount", "type"}}
+    # Rows for the same item (e.g. several accounts) are summed.
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if os.path.splitext(path)[1].lower() == ".json":
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(f))
+    
+    holdings = {}
+    for row in rows:
+        item, amount, asset_type = map_row(row)
+        if not item or amount is None:
+            print(f"Skipping row without item/amount: {row}")
+            continue
+        entry = holdings.setdefault(item, {"amount": 0, "type": asset_type})
+        entry["amount"] += amount
+        entry["type"] = entry["type"] or asset_type
+    return holdings
+
+def fetch_existing_assets(token, db_id):
+    # {item: [{"id", "amount", "type"}]} from one projected, paginated query,
+    # plus the column names to write to. existing is None if any batch failed.
+    failed = []
+    schema, bound, pages = query_with_schema(token, db_id, ASSET_FIELDS, on_error=lambda: failed.append(True))
+    columns = dict(DEFAULT_COLUMNS)
+    for role, candidates in ASSET_FIELDS.items():
+        present = schema.names(candidates) if schema else []
+        if present: columns[role] = present[0]
+    
+    existing = {}
+    for page in pages:
+        props = page.get("properties", {})
+        title_list = first_property(props, bound["item"]).get("title", [])
+        name = "".join([t.get("plain_text", "") for t in title_list])
+        if not name: continue
+        select = first_property(props, bound["type"]).get("select") or {}
+        existing.setdefault(name, []).append({
+            "id": page.get("id"),
+            "amount": first_property(props, bound["amount"]).get("number"),
+            "type": select.get("name")
+        })
+    return (None if failed else existing), columns
+
+def diff_assets(holdings, existing, archive_missing=True):
+    # -> list of ("create", item, entry) / ("update", item, entry, page_id) / ("archive", item, page_id)
+    # Rows that already match are left alone; duplicate rows for an item are archived.
+    ops = []
+    for item, entry in holdings.items():
+        rows = existing.get(item, [])
+        if not rows:
+            ops.append(("create", item, entry))
+            continue
+        row = rows[0]
+        if row["amount"] != entry["amount"] or (entry["type"] and row["type"] != entry["type"]):
+            ops.append(("update", item, entry, row["id"]))
+        ops.extend(("archive", item, dup["id"]) for dup in rows[1:])
+    
+    if archive_missing:
+        for item, rows in existing.items():
+            if item in holdings: continue
+            ops.extend(("archive", item, row["id"]) for row in rows)
+    return ops
+
+def apply_op(token, db_id, op, columns):
+    kind, item = op[0], op[1]
+    if kind == "create":
+        return add_entry(token, db_id, item, op[2]["amount"], op[2]["type"], columns)
+    if kind == "update":
+        payload = {"properties": asset_properties(item, op[2]["amount"], op[2]["type"], columns)}
+        return notion_request(token, f"pages/{op[3]}", method="PATCH", payload=payload) is not None
+    return notion_request(token, f"pages/{op[2]}", method="PATCH", payload={"archived": True}) is not None
+
+def load_assets(token, db_id, path, archive_missing=True, dry_run=False, workers=None, force=False):
+    # -> number of failed changes; 1 if the sync was refused
+    holdings = load_holdings(path)
+    print(f"Loaded {len(holdings)} holdings from {path}.")
+    if not holdings and not force:
+        print("No holdings read from the export (unrecognised columns?). Refusing to sync; use --force to override.")
+        return 1
+    
+    # The diff (creates as much as archives) is only safe against the complete table
+    existing, columns = fetch_existing_assets(token, db_id)
+    if existing is None:
+        print("Could not read all existing My Assets rows. Nothing was changed.")
+        return 1
+    ops = diff_assets(holdings, existing, archive_missing)
+    counts = {kind: sum(1 for op in ops if op[0] == kind) for kind in ("create", "update", "archive")}
+    unchanged = len(holdings) - counts["create"] - counts["update"]
+    print(f"Plan: {counts['create']} create, {counts['update']} update, {counts['archive']} archive, {unchanged} unchanged.")
+    if dry_run:
+        for op in ops: print(f"  {op[0]:8} {op[1]}")
+        return 0
+    
+    rows = sum(len(r) for r in existing.values())
+    if counts["archive"] > rows * MAX_ARCHIVE_SHARE and not force:
+        print(f"Refusing to archive {counts['archive']} of {rows} rows; use --force if the export is complete.")
+        return 1
+    
+    failed = 0
+    # Writes run on a small worker pool; notion_request applies the shared rate limit
+    for op, ok in run_concurrently(lambda op: apply_op(token, db_id, op, columns), ops, workers):
+        if not ok:
+            failed += 1
+            print(f"Failed to {op[0]} {op[1]}")
+    print(f"Applied {len(ops) - failed}/{len(ops)} changes.")
+    return failed
+
 def main():
     token = os.environ.get("NOTION_TOKEN")
     if not token:
         print("Error: NOTION_TOKEN environment variable not set.")
         sys.exit(1)
+    
+    parser = argparse.ArgumentParser(description="Create the My Assets DB, or sync it from a brokerage export.")
+    parser.add_argument("--load", metavar="FILE", help="CSV / JSON export to sync into the existing My Assets DB")
+    parser.add_argument("--db-id", help="target DB (default: found under NOTION_PAGE_ID, else the fallback ID)")
+    parser.add_argument("--keep-missing", action="store_true", help="don't archive rows missing from the export")
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without writing")
+    parser.add_argument("--force", action="store_true", help="sync even if the export is empty or would archive most rows")
+    parser.add_argument("--workers", type=int, default=None, help="concurrent writers (default: NOTION_WORKERS)")
+    args = parser.parse_args()
+    
+    if args.load:
+        db_id = args.db_id or ASSET_DB_FALLBACK_ID
+        if not args.db_id and os.environ.get("NOTION_PAGE_ID"):
+            db_id = find_asset_db(token, os.environ["NOTION_PAGE_ID"]) or db_id
+        failed = load_assets(token, db_id, args.load, not args.keep_missing, args.dry_run, args.workers, args.force)
+        sys.exit(1 if failed else 0)
+    
     page_id = "2f90d907-031e-80e8-928d-c7617241966f" # Main page ID
     
     print("Creating 'My Assets' Database...")
@@ -0,0 +1,81 @@
+import os
+import time
+
+from cache_store import load_json, save_json
+import run_metrics
+from notion_api import notion_request, iter_block_children
+
+# All jobs of one cron run share the index without re-checking the page
+DISCOVERY_TTL = int(os.environ.get("NOTION_DISCOVERY_TTL", 600))
+DISCOVERY_CACHE_FILE = "discovery.json"
+
+# Layout blocks that can hold inline databases
+CONTAINER_TYPES = ("column_list", "column")
+
+def build_database_index(token, page_id):
+    # One paginated walk of the page (descending into column layouts),
+    # collecting every child_database as {"id", "title"}.
+    # None if any listing failed, since a partial index can't be trusted.
+    databases = []
+    failed = []
+    pending = [page_id]
+    while pending:
+        block_id = pending.pop(0)
+        for block in iter_block_children(token, block_id, on_error=lambda: failed.append(block_id)):
+            block_type = block.get("type")
+            if block_type == "child_database":
+                databases.append({
+                    "id": block.get("id"),
+                    "title": block.get("child_database", {}).get("title", "")
+                })
+            elif block_type in CONTAINER_TYPES and block.get("has_children"):
+                pending.append(block.get("id"))
+    return None if failed else databases
+
+def get_database_index(token, page_id):
+    # Cached per page and keyed by the page's last_edited_time:
+    # - checked within DISCOVERY_TTL: no API call at all
+    # - otherwise one pages/{id} call; the page is only walked again if it was edited
+    cache = load_json(DISCOVERY_CACHE_FILE, {})
+    key = page_id.replace("-", "")
+    entry = cache.get(key)
+    now = time.time()
+
+    if entry and now - entry.get("checked_at", 0) < DISCOVERY_TTL:
+        run_metrics.cache("discovery", hit=True)
+        return entry["databases"]
+
+    page = notion_request(token, f"pages/{page_id}")
+    last_edited_time = page.get("last_edited_time") if page else None
+
+    if entry and (last_edited_time is None or entry.get("last_edited_time") == last_edited_time):
+        entry["checked_at"] = now
+        save_json(DISCOVERY_CACHE_FILE, cache)
+        run_metrics.cache("discovery", hit=True)
+        return entry["databases"]
+
+    run_metrics.cache("discovery", hit=False)
+    print(f"Indexing databases in page {page_id}...")
+    databases = build_database_index(token, page_id)
+    if databases is None:
+        # Not cached, so the next run walks the page again
+        if entry:
+            print(f"Could not index page {page_id}. Using the previous index.")
+            return entry["databases"]
+        print(f"Could not index page {page_id}.")
+        return []
+    cache[key] = {
+        "last_edited_time": last_edited_time,
+        "checked_at": now,
+        "databases": databases
+    }
+    save_json(DISCOVERY_CACHE_FILE, cache)
+    return databases
+
+def find_database(token, page_id, match):
+    # match: predicate on the database title
+    for db in get_database_index(token, page_id):
+        if match(db["title"]):
+            print(f"Found Database: {db['title']} ({db['id']})")
+            return db["id"]
+    return None
@@ -0,0 +1,725 @@
+import os
+import sys
+import gzip
+import json
+import time
+import uuid
+import random
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from xml.sax.saxutils import escape
+
+# Local stand-in for the parts of the Notion API (and the Google News RSS
+# search) the jobs use. Seeded from the JSON fixtures in this repo plus
+# synthetic rows, so every job runs end-to-end without network:
+#
+#   python fake_notion_server.py --trades 5000 --latency 0.05 --throttle-every 10
+#   NOTION_API_BASE=http://127.0.0.1:8766/v1 NEWS_RSS_BASE=http://127.0.0.1:8766/rss/search \
+#   NOTION_TOKEN=fake NOTION_PAGE_ID=2f90d907-031e-80e8-928d-c7617241966f python generate_calendar_widget.py
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+MAIN_PAGE_ID = "2f90d907-031e-80e8-928d-c7617241966f"
+TRADING_DB_ID = "2f90d907-031e-805c-be36-ebd342683bfa"
+TRADING_STUDY_DB_ID = "2f90d907-031e-80b3-8a69-d2389e8197a5"
+KEY_MESSAGE_DB_ID = "2f90d907-031e-80b6-a49b-d2b34e29359d"
+ASSET_DB_ID = "2f90d907-031e-8105-8ed9-d2dbd48595ce"
+MONTHLY_DB_ID = "2f90d907-031e-8111-9c2a-4d5e6f708192"
+
+# Block listings captured from the real page (main page, column layout, callout)
+FIXTURE_FILES = [
+    "find_asset_db.json",
+    "column_1_children.json",
+    "col1_children.json",
+    "col2_children.json",
+    "callout_children.json"
+]
+
+MAX_PAGE_SIZE = 100
+
+TRADE_TITLES = ["삼성전자", "SK하이닉스", "테슬라", "엔비디아", "애플", "카카오", "NAVER", "현대차"]
+TRADE_EMOJIS = ["💰", "📈", "📉", "🚀"]
+ASSET_ROWS = [
+    ("삼성전자", 5000000, "Stock"),
+    ("테슬라(Tesla)", 8000000, "Stock"),
+    ("비트코인(BTC)", 3000000, "Crypto"),
+    ("원화 현금", 2000000, "Cash"),
+    ("달러 예수금", 1500000, "Cash"),
+    ("주택청약", 10000000, "Real Estate")
+]
+KEY_MESSAGES = [
+    ("규칙 1: 절대로 돈을 잃지 마라.", ["규칙 1: 절대로 돈을 잃지 마라.", "규칙 2: 규칙 1을 절대 잊지 마라."]),
+    ("가격은 당신이 지불하는 것이고, 가치는 당신이 얻는 것이다.", []),
+    ("손절매는 트레이더의 생명 보험이다.", []),
+    ("추세는 당신의 친구다.", ["추세는 당신의 친구다.", "(The trend is your friend.)"])
+]
+NEWS_SOURCES = ["연합뉴스", "한국경제", "매일경제", "조선비즈"]
+
+class NotionError(Exception):
+    def __init__(self, status, code, message):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+
+    def body(self):
+        return {"object": "error", "status": self.status, "code": self.code, "message": str(self)}
+
+def key(object_id):
+    # Ids are accepted with or without dashes, like the real API
+    return object_id.replace("-", "").lower()
+
+def new_id():
+    return str(uuid.uuid4())
+
+def now_iso():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+def rich_text(content):
+    return [{"type": "text", "text": {"content": content, "link": None}, "plain_text": content, "href": None}]
+
+def normalize_rich_text(items):
+    out = []
+    for item in items or []:
+        item = dict(item)
+        if item.get("type") == "equation" or "equation" in item:
+            item["type"] = "equation"
+            item["plain_text"] = item["equation"].get("expression", "")
+        else:
+            item["type"] = "text"
+            item.setdefault("text", {}).setdefault("link", None)
+            item["plain_text"] = item["text"].get("content", "")
+        item.setdefault("href", None)
+        out.append(item)
+    return out
+
+def load_fixture(name):
+    with open(os.path.join(ROOT, name), "r", encoding="utf-8-sig") as f:
+        return json.load(f)
+
+class FakeNotion:
+    # In-memory workspace. All public methods take the lock, so the
+    # ThreadingHTTPServer can serve concurrent requests.
+
+    def __init__(self, latency=0.0, jitter=0.0, throttle_every=0, retry_after=1.0, rss_items=30, seed=0):
+        self.lock = threading.RLock()
+        self.rng = random.Random(seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.rss_items = rss_items
+        self.rss_version = 0
+
+        self.blocks = {}
+        self.children = {}
+        self.pages = {}
+        self.databases = {}
+        self.rows = {}
+        self.row_pos = {}
+
+        # Request accounting for tests and benchmarks
+        self.api_requests = 0
+        self.throttled = 0
+        self.bytes_sent = 0
+        self.requests_by_endpoint = {}
+
+    # --- Seeding ---
+
+    def seed_fixtures(self):
+        now = now_iso()
+        self.pages[key(MAIN_PAGE_ID)] = {
+            "object": "page", "id": MAIN_PAGE_ID,
+            "created_time": now, "last_edited_time": now,
+            "parent": {"type": "workspace", "workspace": True},
+            "archived": False, "in_trash": False, "icon": None,
+            "properties": {"title": {"id": "title", "type": "title", "title": rich_text("02-money")}}
+        }
+        seen = set()
+        for name in FIXTURE_FILES:
+            for block in load_fixture(name).get("results", []):
+                if block["id"] in seen: continue
+                seen.add(block["id"])
+                parent = block["parent"]
+                parent_id = parent.get("page_id") or parent.get("block_id")
+                self.blocks[key(block["id"])] = block
+                self.children.setdefault(key(parent_id), []).append(block["id"])
+
+        key_message_db = load_fixture("db_schema.json")
+        self.databases[key(KEY_MESSAGE_DB_ID)] = key_message_db
+        self.rows[key(KEY_MESSAGE_DB_ID)] = []
+
+        self.define_database(TRADING_DB_ID, "Trading Journal", MAIN_PAGE_ID, {
+            "종목명": {"title": {}},
+            "날짜": {"date": {}},
+            "판매수익": {"number": {"format": "won"}},
+            "판매손실": {"number": {"format": "won"}}
+        })
+        self.define_database(TRADING_STUDY_DB_ID, "Trading Study", MAIN_PAGE_ID, {"이름": {"title": {}}})
+        self.define_database(ASSET_DB_ID, "My Assets", MAIN_PAGE_ID, {
+            "Item": {"title": {}},
+            "Amount": {"number": {"format": "won"}},
+            "Type": {"select": {"options": [{"name": n} for n in ("Stock", "Cash", "Crypto", "Real Estate")]}}
+        })
+        # Not part of the captured fixtures; update_monthly_log expects it under the main page
+        self.define_database(MONTHLY_DB_ID, "Monthly Returns", MAIN_PAGE_ID, {
+            "Month": {"title": {}},
+            "Total Profit": {"number": {}},
+            "Total Loss": {"number": {}},
+            "Net Return": {"number": {}},
+            "Trade Count": {"number": {}}
+        }, add_block=True)
+
+    def seed_rows(self, trades=200, assets=None, key_messages=None):
+        today = (datetime.now(timezone.utc) + timedelta(hours=9)).date()
+        for i in range(trades):
+            day = today - timedelta(days=self.rng.randint(0, 400))
+            profit = self.rng.randint(1, 500) * 1000 if self.rng.random() < 0.6 else 0
+            self.add_row(TRADING_DB_ID, {
+                "종목명": {"title": [{"text": {"content": self.rng.choice(TRADE_TITLES)}}]},
+                "날짜": {"date": {"start": day.isoformat()}},
+                "판매수익": {"number": profit},
+                "판매손실": {"number": 0 if profit else self.rng.randint(1, 300) * 1000}
+            }, icon={"type": "emoji", "emoji": self.rng.choice(TRADE_EMOJIS)})
+
+        asset_rows = list(ASSET_ROWS)
+        if assets is not None:
+            asset_rows = asset_rows[:assets] + [
+                (f"Holding {i}", self.rng.randint(1, 1000) * 10000, self.rng.choice(["Stock", "Cash", "Crypto"]))
+                for i in range(max(0, assets - len(ASSET_ROWS)))
+            ]
+        for item, amount, asset_type in asset_rows:
+            self.add_row(ASSET_DB_ID, {
+                "Item": {"title": [{"text": {"content": item}}]},
+                "Amount": {"number": amount},
+                "Type": {"select": {"name": asset_type}}
+            })
+
+        messages = list(KEY_MESSAGES)
+        if key_messages is not None:
+            messages = [messages[i % len(messages)] for i in range(key_messages)]
+        for title, body in messages:
+            self.add_row(KEY_MESSAGE_DB_ID, {
+                "이름": {"title": [{"text": {"content": title}}]}
+            }, children=[
+                {"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": line}}]}} for line in body
+            ])
+
+    def define_database(self, db_id, title, parent_page_id, properties, add_block=False):
+        now = now_iso()
+        schema = {}
+        for name, config in properties.items():
+            prop_type = next(iter(config))
+            prop_id = "title" if prop_type == "title" else hashlib.sha1(f"{db_id}:{name}".encode("utf-8")).hexdigest()[:4]
+            schema[name] = dict({"id": prop_id, "name": name, "type": prop_type}, **config)
+        db = {
+            "object": "database", "id": db_id,
+            "created_time": now, "last_edited_time": now,
+            "title": rich_text(title),
+            "parent": {"type": "page_id", "page_id": parent_page_id},
+            "properties": schema,
+            "is_inline": True, "archived": False, "in_trash": False
+        }
+        self.databases[key(db_id)] = db
+        self.rows.setdefault(key(db_id), [])
+        if add_block:
+            self._add_block(parent_page_id, {"type": "child_database", "child_database": {"title": title}}, block_id=db_id)
+        return db
+
+    # --- Internal helpers (caller holds the lock) ---
+
+    def _database(self, db_id):
+        db = self.databases.get(key(db_id))
+        if not db:
+            raise NotionError(404, "object_not_found", f"Could not find database with ID: {db_id}.")
+        return db
+
+    def _page(self, page_id):
+        page = self.pages.get(key(page_id))
+        if not page:
+            raise NotionError(404, "object_not_found", f"Could not find page with ID: {page_id}.")
+        return page
+
+    def _block(self, block_id):
+        block = self.blocks.get(key(block_id))
+        if not block or block.get("archived"):
+            raise NotionError(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+        return block
+
+    def _exists(self, object_id):
+        k = key(object_id)
+        return k in self.pages or k in self.blocks
+
+    def _touch(self, block_id):
+        # Edits bump last_edited_time of the block and of the page containing it
+        now = now_iso()
+        current = block_id
+        for _ in range(32):
+            k = key(current)
+            if k in self.pages:
+                self.pages[k]["last_edited_time"] = now
+                return
+            block = self.blocks.get(k)
+            if not block: return
+            block["last_edited_time"] = now
+            parent = block.get("parent", {})
+            current = parent.get("page_id") or parent.get("block_id") or parent.get("database_id")
+            if not current: return
+
+    def _property_value(self, prop, value):
+        prop_type = prop["type"]
+        out = {"id": prop["id"], "type": prop_type}
+        if prop_type in ("title", "rich_text"):
+            out[prop_type] = normalize_rich_text(value.get(prop_type)) if value else []
+        elif prop_type == "select":
+            select = (value or {}).get("select")
+            out["select"] = dict({"id": key(select["name"])[:8], "color": "default"}, **select) if select else None
+        elif prop_type == "date":
+            date = (value or {}).get("date")
+            out["date"] = dict({"end": None, "time_zone": None}, **date) if date else None
+        else:
+            out[prop_type] = (value or {}).get(prop_type)
+        return out
+
+    def _set_properties(self, page, db, values):
+        for name, value in values.items():
+            prop = db["properties"].get(name)
+            if not prop:
+                prop = next((p for p in db["properties"].values() if p["id"] == name), None)
+            if not prop:
+                raise NotionError(400, "validation_error", f"{name} is not a property that exists.")
+            page["properties"][prop["name"] if "name" in prop else name] = self._property_value(prop, value)
+
+    def _add_block(self, parent_id, data, block_id=None):
+        block_type = data.get("type") or next(k for k in data if k not in ("object", "children"))
+        content = dict(data.get(block_type) or {})
+        nested = content.pop("children", None) or data.get("children")
+        if "rich_text" in content:
+            content["rich_text"] = normalize_rich_text(content["rich_text"])
+        now = now_iso()
+        parent_type = "page_id" if key(parent_id) in self.pages else "block_id"
+        block = {
+            "object": "block", "id": block_id or new_id(),
+            "parent": {"type": parent_type, parent_type: parent_id},
+            "created_time": now, "last_edited_time": now,
+            "has_children": False, "archived": False, "in_trash": False,
+            "type": block_type, block_type: content
+        }
+        self.blocks[key(block["id"])] = block
+        self.children.setdefault(key(parent_id), []).append(block["id"])
+        parent_block = self.blocks.get(key(parent_id))
+        if parent_block: parent_block["has_children"] = True
+        for child in nested or []:
+            self._add_block(block["id"], child)
+        return block
+
+    def _paginate(self, ids, lookup, params):
+        page_size = min(int(params.get("page_size") or MAX_PAGE_SIZE), MAX_PAGE_SIZE)
+        start = 0
+        if params.get("start_cursor"):
+            start = params["start_cursor_pos"]
+        results = []
+        pos = start
+        while pos < len(ids) and len(results) < page_size:
+            obj = lookup(ids[pos])
+            pos += 1
+            if obj is not None:
+                results.append(obj)
+        # Skip trailing archived entries so has_more is exact
+        while pos < len(ids) and lookup(ids[pos]) is None:
+            pos += 1
+        has_more = pos < len(ids)
+        return results, (ids[pos] if has_more else None), has_more
+
+    # --- API operations ---
+
+    def add_row(self, db_id, properties, children=None, icon=None):
+        with self.lock:
+            db = self._database(db_id)
+            now = now_iso()
+            page = {
+                "object": "page", "id": new_id(),
+                "created_time": now, "last_edited_time": now,
+                "parent": {"type": "database_id", "database_id": db["id"]},
+                "archived": False, "in_trash": False, "icon": icon,
+                "properties": {name: self._property_value(prop, None) for name, prop in db["properties"].items()}
+            }
+            self._set_properties(page, db, properties)
+            self.pages[key(page["id"])] = page
+            rows = self.rows[key(db_id)]
+            self.row_pos[key(page["id"])] = len(rows)
+            rows.append(page["id"])
+            for child in children or []:
+                self._add_block(page["id"], child)
+            return page
+
+    def query_database(self, db_id, body, filter_properties=None):
+        with self.lock:
+            self._database(db_id)
+            rows = self.rows[key(db_id)]
+            params = dict(body or {})
+            if params.get("start_cursor"):
+                pos = self.row_pos.get(key(params["start_cursor"]))
+                if pos is None:
+                    raise NotionError(400, "validation_error", "start_cursor provided is invalid.")
+                params["start_cursor_pos"] = pos
+            wanted = set(filter_properties or [])
+
+            def lookup(page_id):
+                page = self.pages[key(page_id)]
+                if page.get("archived"): return None
+                if not wanted: return page
+                return dict(page, properties={n: v for n, v in page["properties"].items() if v["id"] in wanted})
+
+            results, next_cursor, has_more = self._paginate(rows, lookup, params)
+            return {"object": "list", "results": results, "next_cursor": next_cursor, "has_more": has_more,
+                    "type": "page_or_database", "page_or_database": {}}
+
+    def create_database(self, body):
+        with self.lock:
+            parent_id = body.get("parent", {}).get("page_id")
+            if not parent_id or not self._exists(parent_id):
+                raise NotionError(404, "object_not_found", f"Could not find page with ID: {parent_id}.")
+            title = "".join(t.get("text", {}).get("content", "") for t in body.get("title", []))
+            db = self.define_database(new_id(), title, parent_id, body.get("properties", {}), add_block=True)
+            self._touch(parent_id)
+            return db
+
+    def update_database(self, db_id, body):
+        # Renames only: {"properties": {<name or id>: {"name": <new name>}}}; ids stay the same
+        with self.lock:
+            db = self._database(db_id)
+            for name, change in (body.get("properties") or {}).items():
+                prop = db["properties"].get(name) or next((p for p in db["properties"].values() if p["id"] == name), None)
+                if not prop:
+                    raise NotionError(400, "validation_error", f"{name} is not a property that exists.")
+                new_name = (change or {}).get("name")
+                if not new_name or new_name == prop["name"]: continue
+                old_name = prop["name"]
+                db["properties"][new_name] = dict(db["properties"].pop(old_name), name=new_name)
+                for page_id in self.rows[key(db_id)]:
+                    props = self.pages[key(page_id)]["properties"]
+                    if old_name in props: props[new_name] = props.pop(old_name)
+            db["last_edited_time"] = now_iso()
+            return db
+
+    def create_page(self, body):
+        with self.lock:
+            parent = body.get("parent", {})
+            if parent.get("database_id"):
+                return self.add_row(parent["database_id"], body.get("properties", {}),
+                                    children=body.get("children"), icon=body.get("icon"))
+            parent_id = parent.get("page_id")
+            if not parent_id or not self._exists(parent_id):
+                raise NotionError(404, "object_not_found", f"Could not find page with ID: {parent_id}.")
+            title = body.get("properties", {}).get("title", {}).get("title", [])
+            block = self._add_block(parent_id, {"type": "child_page", "child_page": {
+                "title": "".join(t.get("text", {}).get("content", "") for t in title)}})
+            page = {
+                "object": "page", "id": block["id"],
+                "created_time": block["created_time"], "last_edited_time": block["created_time"],
+                "parent": {"type": "page_id", "page_id": parent_id},
+                "archived": False, "in_trash": False, "icon": body.get("icon"),
+                "properties": {"title": {"id": "title", "type": "title", "title": normalize_rich_text(title)}}
+            }
+            self.pages[key(page["id"])] = page
+            for child in body.get("children") or []:
+                self._add_block(page["id"], child)
+            self._touch(parent_id)
+            return page
+
+    def get_page(self, page_id):
+        with self.lock:
+            return self._page(page_id)
+
+    def update_page(self, page_id, body):
+        with self.lock:
+            page = self._page(page_id)
+            if "properties" in body:
+                db = self._database(page["parent"]["database_id"]) if page["parent"].get("database_id") else None
+                if db: self._set_properties(page, db, body["properties"])
+            if "icon" in body: page["icon"] = body["icon"]
+            if body.get("archived") or body.get("in_trash"):
+                page["archived"] = page["in_trash"] = True
+            page["last_edited_time"] = now_iso()
+            return page
+
+    def get_block(self, block_id):
+        with self.lock:
+            if key(block_id) in self.pages and key(block_id) not in self.blocks:
+                page = self.pages[key(block_id)]
+                return {"object": "block", "id": page["id"], "type": "child_page", "has_children": True,
+                        "last_edited_time": page["last_edited_time"], "child_page": {"title": ""}}
+            return self._block(block_id)
+
+    def list_children(self, block_id, params):
+        with self.lock:
+            if not self._exists(block_id):
+                raise NotionError(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+            ids = self.children.get(key(block_id), [])
+            if params.get("start_cursor"):
+                keys = [key(i) for i in ids]
+                if key(params["start_cursor"]) not in keys:
+                    raise NotionError(400, "validation_error", "start_cursor provided is invalid.")
+                params["start_cursor_pos"] = keys.index(key(params["start_cursor"]))
+
+            def lookup(child_id):
+                block = self.blocks[key(child_id)]
+                return None if block.get("archived") else block
+
+            results, next_cursor, has_more = self._paginate(ids, lookup, params)
+            return {"object": "list", "results": results, "next_cursor": next_cursor, "has_more": has_more,
+                    "type": "block", "block": {}}
+
+    def append_children(self, block_id, body):
+        with self.lock:
+            if not self._exists(block_id):
+                raise NotionError(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+            children = body.get("children") or []
+            if len(children) > MAX_PAGE_SIZE:
+                raise NotionError(400, "validation_error", "body.children.length should be ≤ 100.")
+            created = [self._add_block(block_id, child) for child in children]
+            self._touch(block_id)
+            return {"object": "list", "results": created, "next_cursor": None, "has_more": False,
+                    "type": "block", "block": {}}
+
+    def update_block(self, block_id, body):
+        with self.lock:
+            block = self._block(block_id)
+            block_type = block["type"]
+            if block_type in body:
+                content = dict(body[block_type] or {})
+                if "rich_text" in content:
+                    content["rich_text"] = normalize_rich_text(content["rich_text"])
+                block[block_type].update(content)
+            if body.get("archived") or body.get("in_trash"):
+                block["archived"] = block["in_trash"] = True
+            self._touch(block_id)
+            return block
+
+    def delete_block(self, block_id):
+        with self.lock:
+            block = self._block(block_id)
+            block["archived"] = block["in_trash"] = True
+            self._touch(block_id)
+            return block
+
+    # --- RSS ---
+
+    def rss_etag(self, query):
+        return '"' + hashlib.sha1(f"{query}:{self.rss_version}".encode("utf-8")).hexdigest()[:16] + '"'
+
+    def rss_feed(self, query):
+        # Deterministic per query and rss_version; bump_rss() publishes new items
+        rng = random.Random(f"{query}:{self.rss_version}")
+        published = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(hours=self.rss_version)
+        items = []
+        for i in range(self.rss_items):
+            title = f"{query} {rng.choice(['상승 마감', '하락 출발', '외국인 순매수', '실적 발표', '전망 엇갈려'])} {self.rss_version}-{i}"
+            if i % 7 == 3: title = "[광고] " + title
+            link = f"https://news.example.com/{key(self.rss_etag(query).strip(chr(34)))}/{i}?oc=5"
+            items.append(
+                f"<item><title>{escape(title)} - {rng.choice(NEWS_SOURCES)}</title><link>{escape(link)}</link>"
+                f"<pubDate>{format_datetime(published - timedelta(minutes=10 * i))}</pubDate></item>"
+            )
+        return ("<?xml version='1.0' encoding='UTF-8'?><rss version=\"2.0\"><channel>"
+                f"<title>{escape(query)}</title>{''.join(items)}</channel></rss>").encode("utf-8")
+
+    def bump_rss(self):
+        with self.lock:
+            self.rss_version += 1
+
+    # --- Fault injection ---
+
+    def before_api_request(self, endpoint):
+        # Returns True if this request should be answered with a 429
+        with self.lock:
+            self.api_requests += 1
+            self.requests_by_endpoint[endpoint] = self.requests_by_endpoint.get(endpoint, 0) + 1
+            throttle = self.throttle_every and self.api_requests % self.throttle_every == 0
+            if throttle: self.throttled += 1
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+        return throttle
+
+# (method, path pattern, handler name); "*" captures an id
+ROUTES = [
+    ("POST", ("databases", "*", "query"), "query_database"),
+    ("GET", ("databases", "*"), "get_database"),
+    ("POST", ("databases",), "create_database"),
+    ("PATCH", ("databases", "*"), "update_database"),
+    ("GET", ("blocks", "*", "children"), "list_children"),
+    ("PATCH", ("blocks", "*", "children"), "append_children"),
+    ("GET", ("blocks", "*"), "get_block"),
+    ("PATCH", ("blocks", "*"), "update_block"),
+    ("DELETE", ("blocks", "*"), "delete_block"),
+    ("GET", ("pages", "*"), "get_page"),
+    ("PATCH", ("pages", "*"), "update_page"),
+    ("POST", ("pages",), "create_page"),
+    ("GET", ("users", "me"), "get_me")
+]
+
+def match_route(method, parts):
+    for route_method, pattern, name in ROUTES:
+        if route_method != method or len(pattern) != len(parts): continue
+        if all(p == "*" or p == part for p, part in zip(pattern, parts)):
+            return name, [part for p, part in zip(pattern, parts) if p == "*"]
+    return None, []
+
+class FakeNotionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_body(self, status, body, content_type="application/json", headers=None):
+        data = body if isinstance(body, bytes) else json.dumps(body, ensure_ascii=False).encode("utf-8")
+        headers = dict(headers or {})
+        # Like the real API, larger bodies are gzipped for clients that accept it
+        if len(data) > 1024 and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            data = gzip.compress(data, compresslevel=6, mtime=0)
+            headers["Content-Encoding"] = "gzip"
+        with self.server.state.lock:
+            self.server.state.bytes_sent += len(data)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length: return {}
+        try:
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            raise NotionError(400, "invalid_json", "Error parsing JSON body.")
+
+    def handle_rss(self, query):
+        state = self.server.state
+        q = (query.get("q") or [""])[0]
+        etag = state.rss_etag(q)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_body(200, state.rss_feed(q), "application/rss+xml; charset=utf-8", {"ETag": etag})
+
+    def handle_npm(self, parts):
+        # Stand-in for the npm CDN used by vendor_assets.py: /npm/<package>@<version>/<path>
+        package = "/".join(parts[1:-1]) if len(parts) > 2 else ""
+        body = f"/* fake {package} */\nwindow.{'ChartDataLabels' if 'datalabels' in package else 'Chart'} = window.Chart || function () {{}};\n"
+        self.send_body(200, body.encode("utf-8"), "application/javascript; charset=utf-8")
+
+    def dispatch(self, method):
+        state = self.server.state
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        parts = [p for p in url.path.split("/") if p]
+
+        if method == "GET" and parts[:2] == ["rss", "search"]:
+            return self.handle_rss(query)
+        if method == "GET" and parts[:1] == ["npm"]:
+            return self.handle_npm(parts)
+        if parts[:1] != ["v1"]:
+            return self.send_body(404, {"object": "error", "status": 404, "code": "object_not_found", "message": "Not found."})
+
+        parts = parts[1:]
+        name, args = match_route(method, parts)
+        endpoint = f"{method} /" + "/".join("{id}" if p in args else p for p in parts)
+        try:
+            body = self.read_json() if method in ("POST", "PATCH") else {}
+            if not (self.headers.get("Authorization") or "").startswith("Bearer "):
+                raise NotionError(401, "unauthorized", "API token is invalid.")
+            if name is None:
+                raise NotionError(400, "invalid_request_url", "Invalid request URL.")
+            if state.before_api_request(endpoint):
+                return self.send_body(429, NotionError(429, "rate_limited", "You have been rate limited.").body(),
+                                      headers={"Retry-After": str(state.retry_after)})
+
+            params = {k: v[0] for k, v in query.items()}
+            if name == "query_database":
+                result = state.query_database(args[0], body, query.get("filter_properties"))
+            elif name == "get_database":
+                with state.lock: result = state._database(args[0])
+            elif name == "list_children":
+                result = state.list_children(args[0], params)
+            elif name == "get_me":
+                result = {"object": "user", "id": "fake-bot", "type": "bot", "name": "Fake Notion",
+                          "bot": {"owner": {"type": "workspace", "workspace": True}}}
+            elif name in ("create_database", "create_page"):
+                result = getattr(state, name)(body)
+            elif name in ("get_page", "get_block", "delete_block"):
+                result = getattr(state, name)(args[0])
+            else:
+                result = getattr(state, name)(args[0], body)
+        except NotionError as e:
+            return self.send_body(e.status, e.body())
+        self.send_body(200, result)
+
+    def do_GET(self): self.dispatch("GET")
+    def do_POST(self): self.dispatch("POST")
+    def do_PATCH(self): self.dispatch("PATCH")
+    def do_DELETE(self): self.dispatch("DELETE")
+
+def start_server(port=0, host="127.0.0.1", trades=200, assets=None, key_messages=None, verbose=False, **options):
+    # Starts the server on a daemon thread. Returns the server; server.state is
+    # the FakeNotion instance and server.env the variables that point the jobs at it.
+    state = FakeNotion(**options)
+    state.seed_fixtures()
+    state.seed_rows(trades=trades, assets=assets, key_messages=key_messages)
+
+    server = ThreadingHTTPServer((host, port), FakeNotionHandler)
+    server.daemon_threads = True
+    server.state = state
+    server.verbose = verbose
+    base = f"http://{host}:{server.server_address[1]}"
+    server.env = {
+        "NOTION_API_BASE": f"{base}/v1",
+        "NEWS_RSS_BASE": f"{base}/rss/search",
+        "NPM_CDN_BASE": f"{base}/npm",
+        "NOTION_TOKEN": "fake_token",
+        "NOTION_PAGE_ID": MAIN_PAGE_ID
+    }
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Offline Notion API stand-in for tests and benchmarks.")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--trades", type=int, default=200, help="synthetic Trading Journal rows")
+    parser.add_argument("--assets", type=int, default=None, help="My Assets rows (default: the 6 sample holdings)")
+    parser.add_argument("--key-messages", type=int, default=None, help="Key Message rows")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every API request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency (0..jitter seconds)")
+    parser.add_argument("--throttle-every", type=int, default=0, help="answer every Nth API request with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--rss-items", type=int, default=30, help="items per RSS feed")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = start_server(args.port, trades=args.trades, assets=args.assets, key_messages=args.key_messages,
+                          verbose=args.verbose, latency=args.latency, jitter=args.jitter,
+                          throttle_every=args.throttle_every, retry_after=args.retry_after, rss_items=args.rss_items)
+    print("Fake Notion server running. Point the jobs at it with:")
+    for name, value in server.env.items():
+        print(f"  export {name}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,32 @@
 import os
 import json
-import urllib.request
-import urllib.error
 import sys
 
+from asset_db import ASSET_FIELDS, ASSET_DB_FALLBACK_ID, first_property, find_asset_db
+from schema_cache import query_with_schema
+import run_metrics
+from profiling import run_main
+from site_output import write_page
+from number_format import format_amount
+from svg_charts import pie_chart_svg
+from vendor_assets import ensure_bundle, script_tags
+from tracing import span
+
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
+# "js": Chart.js draws the pie in the browser; "svg" (or --svg): drawn here as inline SVG
+ASSET_CHART_RENDERER = os.environ.get("ASSET_CHART_RENDERER", "js").lower()
+
 def fetch_assets(token, db_id):
-    url = f"https://api.notion.com/v1/databases/{db_id}/query"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    payload = { "page_size": 100 }
-    data_json = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data_json, headers=headers)
-    
-    results = []
-    try:
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                data = json.loads(response.read().decode("utf-8"))
-                results = data.get("results", [])
-    except Exception as e:
-        print(f"Error fetching assets: {e}")
+    schema, columns, results = query_with_schema(token, db_id, ASSET_FIELDS)
         
     assets = []
     for page in results:
         props = page.get("properties", {})
         
-        # Item Name (Title) - Try '항목' (Korean) or 'Item' (English)
-        title_list = props.get("항목", {}).get("title", [])
-        if not title_list:
-            title_list = props.get("Item", {}).get("title", [])
+        # Item Name (Title) - '항목' (Korean) or 'Item' (English)
+        title_list = first_property(props, columns["item"]).get("title", [])
             
         if not title_list:
             # Debugging: Print keys if title not found
@@ -44,14 +35,11 @@ def fetch_assets(token, db_id):
             
         name = "".join([t.get("plain_text", "") for t in title_list])
         
-        # Amount (Number) - Try '금액' or 'Amount'
-        amount_obj = props.get("금액", {})
-        if not amount_obj: amount_obj = props.get("Amount", {})
-        amount = amount_obj.get("number", 0)
+        # Amount (Number) - '금액' or 'Amount'; an empty cell comes back as null
+        amount = first_property(props, columns["amount"]).get("number") or 0
         
-        # Type (Select) - Try '유형' or 'Type'
-        type_obj = props.get("유형", {})
-        if not type_obj: type_obj = props.get("Type", {})
+        # Type (Select) - '유형' or 'Type'
+        type_obj = first_property(props, columns["type"])
         
         asset_type = type_obj.get("select", {})
         type_name = asset_type.get("name", "Other") if asset_type else "Other"
@@ -64,7 +52,7 @@ def fetch_assets(token, db_id):
         
     return assets
 
-def generate_html(assets):
+def generate_html(assets, renderer=None):
     # Simple Notion Color Mapping
     # Notion Colors (Light Mode)
     # Gray, Brown, Orange, Yellow, Green, Blue, Purple, Pink, Red
@@ -81,70 +69,19 @@ def generate_html(assets):
         "#FFE2DD", # Red
     ]
     
-    html = f"""
-    <!DOCTYPE html>
-    <html lang="ko">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Asset Allocation</title>
-        <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/chartjs-plugin-datalabels@2.0.0"></script>
-        <style>
-            ::-webkit-scrollbar {{ display: none; }}
-            html {{ -ms-overflow-style: none; scrollbar-width: none; }}
-
-            :root {{
-                --bg-color: #ffffff;
-                --text-color: #37352f;
-            }}
-            body {{
-                font-family: "Courier New", Courier, monospace;
-                margin: 0;
-                padding: 12px 20px 20px 20px;
-                background-color: var(--bg-color);
-                color: var(--text-color);
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                justify-content: center;
-            }}
-            .chart-container {{
-                position: relative;
-                width: 90vw;
-                max-width: 400px;
-                height: auto;
-                aspect-ratio: 1 / 1;
-                margin-top: 10px;
-            }}
-            h2 {{
-                margin-top: 0; 
-                margin-bottom: 0px;
-                font-size: 0.9em; 
-                font-weight: bold; 
-                width: 100%; 
-                max-width: 600px; 
-                text-align: left;
-                padding-bottom: 2px;
-                line-height: 1.2;
-            }}
-            .total-assets {{
-                margin-top: 4px;
-                font-size: 0.85em;
-                font-weight: bold;
-                color: #37352f;
-                font-family: "Courier New", Courier, monospace;
-                line-height: 1.2;
-            }}
-        </style>
-    </head>
-    <body>
-        <h2>My Assets</h2>
-        <div class="total-assets" id="totalDisplay"></div>
-        <div class="chart-container">
-            <canvas id="assetChart"></canvas>
-        </div>
-
+    if renderer is None: renderer = ASSET_CHART_RENDERER
+    
+    if renderer == "svg":
+        # Pie drawn here: the page needs no script and is complete at first byte
+        head_scripts = ""
+        total_text = f"TOTAL: ₩{format_amount(sum(a['amount'] for a in assets))}"
+        chart_markup = pie_chart_svg([(a["name"], a["amount"]) for a in assets], NOTION_COLORS)
+        chart_script = ""
+    else:
+        head_scripts = script_tags("chart")
+        total_text = ""
+        chart_markup = '<canvas id="assetChart"></canvas>'
+        chart_script = f"""
         <script>
             // Register DataLabels Plugin
             Chart.register(ChartDataLabels);
@@ -241,36 +178,77 @@ def generate_html(assets):
                 }}
             }});
         </script>
+        """
+    
+    html = f"""
+    <!DOCTYPE html>
+    <html lang="ko">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Asset Allocation</title>
+        {head_scripts}
+        <style>
+            ::-webkit-scrollbar {{ display: none; }}
+            html {{ -ms-overflow-style: none; scrollbar-width: none; }}
+
+            :root {{
+                --bg-color: #ffffff;
+                --text-color: #37352f;
+            }}
+            body {{
+                font-family: "Courier New", Courier, monospace;
+                margin: 0;
+                padding: 12px 20px 20px 20px;
+                background-color: var(--bg-color);
+                color: var(--text-color);
+                display: flex;
+                flex-direction: column;
+                align-items: center;
+                justify-content: center;
+            }}
+            .chart-container {{
+                position: relative;
+                width: 90vw;
+                max-width: 400px;
+                height: auto;
+                aspect-ratio: 1 / 1;
+                margin-top: 10px;
+            }}
+            h2 {{
+                margin-top: 0; 
+                margin-bottom: 0px;
+                font-size: 0.9em; 
+                font-weight: bold; 
+                width: 100%; 
+                max-width: 600px; 
+                text-align: left;
+                padding-bottom: 2px;
+                line-height: 1.2;
+            }}
+            .total-assets {{
+                margin-top: 4px;
+                font-size: 0.85em;
+                font-weight: bold;
+                color: #37352f;
+                font-family: "Courier New", Courier, monospace;
+                line-height: 1.2;
+            }}
+        </style>
+    </head>
+    <body>
+        <h2>My Assets</h2>
+        <div class="total-assets" id="totalDisplay">{total_text}</div>
+        <div class="chart-container">
+            {chart_markup}
+        </div>
+
+        {chart_script}
     </body>
     </html>
     """
     return html
 
-def find_asset_db(token, page_id):
-    print(f"Scanning Page {page_id} for Asset DB...")
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                data = json.loads(response.read().decode("utf-8"))
-                for block in data.get("results", []):
-                    if block.get("type") == "child_database":
-                        title = block.get("child_database", {}).get("title", "")
-                        # Check for "자산" or "Asset"
-                        if "자산" in title or "Asset" in title:
-                            print(f"Found Database: {title} ({block.get('id')})")
-                            return block.get("id")
-    except Exception as e:
-        print(f"Error scanning for DB: {e}")
-    return None
-
 def main():
     token = os.environ.get("NOTION_TOKEN")
     page_id = os.environ.get("NOTION_PAGE_ID")
@@ -279,27 +257,39 @@ def main():
         print("Error: NOTION_TOKEN environment variable not set.")
         sys.exit(1)
     
-    db_id = "2f90d907-031e-8105-8ed9-d2dbd48595ce" # My Assets Fallback
+    db_id = ASSET_DB_FALLBACK_ID
     
-    if page_id:
-        found_id = find_asset_db(token, page_id)
-        if found_id:
-            db_id = found_id
+    with span("discover"):
+        if page_id:
+            found_id = find_asset_db(token, page_id)
+            if found_id:
+                db_id = found_id
+            else:
+                print("Could not find Asset database in page. Using fallback ID.")
         else:
-            print("Could not find Asset database in page. Using fallback ID.")
-    else:
-        print("Warning: NOTION_PAGE_ID not set. Using fallback DB ID.")
+            print("Warning: NOTION_PAGE_ID not set. Using fallback DB ID.")
     
     print("Fetching assets...")
-    assets = fetch_assets(token, db_id)
+    with span("fetch_parse") as s:
+        assets = fetch_assets(token, db_id)
+        s.set(rows=len(assets))
+        run_metrics.incr("rows", len(assets))
     print(f"Found {len(assets)} assets.")
     
-    print("Generating chart HTML...")
-    html = generate_html(assets)
+    renderer = "svg" if "--svg" in sys.argv[1:] else ASSET_CHART_RENDERER
+    
+    # Chart.js + datalabels are served from vendor/ (built once per pin change)
+    if renderer != "svg":
+        with span("vendor"):
+            ensure_bundle("chart")
+    
+    print(f"Generating chart HTML ({renderer})...")
+    with span("render", renderer=renderer):
+        html = generate_html(assets, renderer)
     
-    with open("asset_chart.html", "w", encoding="utf-8") as f:
-        f.write(html)
+    with span("write", bytes=len(html)):
+        write_page("asset_chart.html", html)
     print("asset_chart.html created.")
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
@@ -1,59 +1,43 @@
 import os
 import json
 import sys
-import urllib.request
-import urllib.error
+from calendar import monthrange
+from datetime import date, datetime, timedelta, timezone
+from html import escape
+
+from db_discovery import find_database
+from schema_cache import query_with_schema
+import run_metrics
+from profiling import run_main
+from site_output import write_page
+from number_format import format_amount
+from tracing import span
+from trade_table import TradeTable
 
 # Force UTF-8 encoding for stdout/stderr
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
+# Candidate property names, in priority order
+DATE_KEYS = ["날짜", "Date", "Time", "일시"]
+TITLE_KEYS = ["종목명", "이름", "Name", "제목", "Item"]
+PROFIT_KEYS = ["판매손익", "판매수익", "Sale Profit", "수익", "Profit", "손익", "실현손익", "평가손익", "매매손익", "P&L", "PnL", "Amount", "금액"]
+LOSS_KEYS = ["판매손실", "Sale Loss", "손실", "Loss", "손실액", "손실금액", "매도 손실 금액"]
+
+# Only these columns are requested from the query endpoint.
+# "title" is the fixed id of a database's title property (used as the title fallback).
+TRADE_FIELDS = {
+    "date": DATE_KEYS,
+    "title": TITLE_KEYS + ["title"],
+    "profit": PROFIT_KEYS,
+    "loss": LOSS_KEYS
+}
+
 def fetch_db_data(token, db_id):
-    url = f"https://api.notion.com/v1/databases/{db_id}/query"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    payload = { "page_size": 100 }
-    
-    results = []
-    has_more = True
-    start_cursor = None
-    
-    while has_more:
-        if start_cursor: payload["start_cursor"] = start_cursor
-        
-        data_json = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(url, data=data_json, headers=headers)
-        
-        try:
-            with urllib.request.urlopen(req) as response:
-                if response.status != 200:
-                    print(f"Error fetching DB: Status {response.status}")
-                    break
-                
-                resp_body = response.read().decode("utf-8")
-                data = json.loads(resp_body)
-                
-                results.extend(data.get("results", []))
-                has_more = data.get("has_more")
-                start_cursor = data.get("next_cursor")
-                
-        except urllib.error.HTTPError as e:
-            print(f"HTTP Error fetching DB: {e.code} - {e.reason}")
-            try:
-                err_body = e.read().decode("utf-8")
-                print(f"Error body: {err_body}")
-            except:
-                pass
-            break
-        except Exception as e:
-            print(f"Error: {e}")
-            break
-        
-    return results
+    # -> (columns, pages): TRADE_FIELDS bound to the database schema, and the
+    # pages streamed batch by batch (next batch prefetched while parsing)
+    schema, columns, pages = query_with_schema(token, db_id, TRADE_FIELDS)
+    return columns, pages
 
 def get_number_value(prop):
     if not prop: return None
@@ -101,17 +85,19 @@ def get_number_value(prop):
                     
     return val
 
-def parse_data(results):
-    calendar_data = {}
+def parse_data(results, columns=None):
+    # columns: TRADE_FIELDS resolved against the cached schema (schema.bind),
+    # so only columns that actually exist are checked per row
+    if columns is None: columns = TRADE_FIELDS
+    table = TradeTable()
     
     for page in results:
         props = page.get("properties", {})
         page_id = page.get("id").replace("-", "")
         
         # Find Date
-        date_candidates = ["날짜", "Date", "Time", "일시"]
         date_prop = None
-        for key in date_candidates:
+        for key in columns["date"]:
             if key in props:
                 date_prop = props[key].get("date")
                 if date_prop: break
@@ -122,9 +108,8 @@ def parse_data(results):
         date_str = date_str[:10] # YYYY-MM-DD
         
         # Find Title
-        title_candidates = ["종목명", "이름", "Name", "제목", "Item"]
         title_list = []
-        for key in title_candidates:
+        for key in columns["title"]:
             if key in props and props[key].get("type") == "title":
                 title_list = props[key].get("title", [])
                 break
@@ -138,7 +123,7 @@ def parse_data(results):
         title = "".join([t.get("plain_text", "") for t in title_list])
         if not title: title = "Untitled"
         
-        if len(calendar_data) == 0 and len(calendar_data.values()) == 0:
+        if len(table) == 0:
              # Debug: Print properties of the first valid item found to help with debugging
              print(f"Debug: First Item Props: {list(props.keys())}")
 
@@ -147,8 +132,7 @@ def parse_data(results):
         loss = 0
         
         # Try to find Profit (Amount or P&L)
-        p_keys = ["판매손익", "판매수익", "Sale Profit", "수익", "Profit", "손익", "실현손익", "평가손익", "매매손익", "P&L", "PnL", "Amount", "금액"]
-        for k in p_keys:
+        for k in columns["profit"]:
             if k in props:
                 p_val = get_number_value(props[k])
                 if p_val is not None:
@@ -157,8 +141,7 @@ def parse_data(results):
                     break
                     
         # Try to find Loss (Explicit Loss column)
-        l_keys = ["판매손실", "Sale Loss", "손실", "Loss", "손실액", "손실금액", "매도 손실 금액"]
-        for k in l_keys:
+        for k in columns["loss"]:
             if k in props:
                 l_val = get_number_value(props[k])
                 if l_val is not None:
@@ -174,32 +157,94 @@ def parse_data(results):
         icon = page.get("icon", {})
         emoji = icon.get("emoji") if icon and icon.get("type") == "emoji" else "💰"
         
-        # Display String
-        display_str = f"{emoji} {title}"
-        details = []
-        if profit > 0: details.append(f"+{profit:,}")
-        if loss > 0: details.append(f"-{loss:,}")
-        if details:
-            display_str += f" ({' '.join(details)})"
-        
-        # Store in dict
-        if date_str not in calendar_data:
-            calendar_data[date_str] = []
-            
-        calendar_data[date_str].append({
-            "id": page_id,
-            "title": title,
-            "emoji": emoji,
-            "display": display_str,
-            "profit": profit,
-            "loss": loss
-        })
+        table.append(page_id, date_str, title, emoji, profit, loss)
         
-    return calendar_data
+    return table
+
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+DAY_NAMES = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+
+def kst_today():
+    return (datetime.now(timezone.utc) + timedelta(hours=9)).date()
 
-def generate_interactive_html(calendar_data):
-    # Pass data as JSON
-    data_json = json.dumps(calendar_data)
+def format_net(num):
+    # Same output as formatNumber() in the page
+    if num == 0: return "0"
+    return f"{'+' if num > 0 else '-'}{format_amount(abs(num))}"
+
+def net_class(num):
+    return "summary-value" + (" profit" if num > 0 else " loss" if num < 0 else "")
+
+def render_month(table, today):
+    # Markup renderCalendar() would build for today's month: day headers,
+    # cells with tooltips, the month label and both summary values.
+    # Returns a dict of page fragments.
+    year, month = today.year, today.month
+    first = date(year, month, 1)
+    num_days = monthrange(year, month)[1]
+    first_ord = first.toordinal()
+    last_ord = first_ord + num_days - 1
+    year_first = date(year, 1, 1).toordinal()
+    year_last = date(year, 12, 31).toordinal()
+    
+    # Summed in row order like the page's index build, so floats match exactly
+    by_day = {}
+    month_totals = [0, 0]
+    year_totals = [0, 0]
+    for i, ordinal in enumerate(table.dates):
+        if ordinal < year_first or ordinal > year_last: continue
+        year_totals[0] += table.profits[i]
+        year_totals[1] += table.losses[i]
+        if first_ord <= ordinal <= last_ord:
+            by_day.setdefault(ordinal - first_ord + 1, []).append(i)
+            month_totals[0] += table.profits[i]
+            month_totals[1] += table.losses[i]
+    
+    cells = [f'<div class="day-header">{d}</div>' for d in DAY_NAMES]
+    cells += ['<div class="day-cell empty"></div>'] * ((first.weekday() + 1) % 7)
+    for d in range(1, num_days + 1):
+        classes = "day-cell"
+        if d == today.day: classes += " today"
+        rows = by_day.get(d)
+        if not rows:
+            cells.append(f'<div class="{classes}"><span class="day-number">{d}</span></div>')
+            continue
+        items = []
+        for i in rows:
+            if table.losses[i] > 0:
+                line, color = f"{escape(table.title(i))} (-{format_amount(table.losses[i])})", "loss"
+            elif table.profits[i] > 0:
+                line, color = f"{escape(table.title(i))} (+{format_amount(table.profits[i])})", "profit"
+            else:
+                line, color = escape(table.title(i)), ""
+            items.append(f'<div class="entry-item {color}">{line}</div>')
+        cells.append(f'<div class="{classes} has-entry"><span class="day-number">{d}</span>'
+                     f'<div class="tooltip">{"".join(items)}</div></div>')
+    
+    month_net = month_totals[0] - month_totals[1]
+    year_net = year_totals[0] - year_totals[1]
+    return {
+        "key": f"{year}-{month - 1}-{today.day}",
+        "label": f"{year} {MONTH_NAMES[month - 1]}",
+        "grid": "".join(cells),
+        "month_return": format_net(month_net),
+        "month_class": net_class(month_net),
+        "year_return": format_net(year_net),
+        "year_class": net_class(year_net)
+    }
+
+def generate_interactive_html(calendar_data, today=None):
+    # Accept the legacy dict-of-lists shape as well as a TradeTable
+    if not isinstance(calendar_data, TradeTable):
+        calendar_data = TradeTable.from_calendar_data(calendar_data)
+    
+    # The current (KST) month is rendered here; the page's JS only builds
+    # grids when navigating to another month
+    month = render_month(calendar_data, today or kst_today())
+    
+    # Pass data as compact columnar JSON
+    data_json = json.dumps(calendar_data.to_payload(), ensure_ascii=False, separators=(",", ":"))
+    data_json = data_json.replace("</", "<\\/") # Keep titles from closing the <script> tag
     
     html = f"""
     <!DOCTYPE html>
@@ -421,88 +466,82 @@ def generate_interactive_html(calendar_data):
     </head>
     <body>
         <div class="header-container">
-            <h1 id="monthLabel">Loading...</h1>
+            <h1 id="monthLabel">{month["label"]}</h1>
             <div class="nav-container">
                 <button class="nav-btn" id="prevBtn">◀</button>
                 <button class="nav-btn" id="nextBtn">▶</button>
             </div>
         </div>
         
-        <div class="calendar-grid" id="calendarGrid">
-            <!-- Headers and Days inserted by JS -->
-        </div>
+        <div class="calendar-grid" id="calendarGrid" data-rendered="{month["key"]}">{month["grid"]}</div>
 
         <div class="summary-footer">
             <div class="summary-item">
                 <div class="summary-label">Monthly Return</div>
-                <div class="summary-value" id="monthReturn">-</div>
+                <div class="{month["month_class"]}" id="monthReturn">{month["month_return"]}</div>
             </div>
             <div class="summary-item" style="text-align: right;">
                 <div class="summary-label">Yearly Return</div>
-                <div class="summary-value" id="yearReturn">-</div>
+                <div class="{month["year_class"]}" id="yearReturn">{month["year_return"]}</div>
             </div>
         </div>
 
         <script>
-            const eventData = {data_json};
+            // Columnar trade data: d = days since 1970-01-01, p/l = profit/loss, t = index into s
+            const trades = {data_json};
             let currentDate = new Date(); // Defaults to today on client side
 
             const monthNames = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
                                 "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"];
 
+            // Day / month / year indexes, built on the first client-side render
+            let dayIndex = null;   // y*10000 + m*100 + d -> row indices (m 0-indexed)
+            let monthTotals = null; // y*12 + m -> [profit, loss]
+            let yearTotals = null;  // y -> [profit, loss]
+            function buildIndexes() {{
+                dayIndex = {{}};
+                monthTotals = {{}};
+                yearTotals = {{}};
+                for (let i = 0; i < trades.d.length; i++) {{
+                    const dt = new Date(trades.d[i] * 86400000);
+                    const y = dt.getUTCFullYear();
+                    const m = dt.getUTCMonth();
+                    const dayKey = y * 10000 + m * 100 + dt.getUTCDate();
+                    (dayIndex[dayKey] = dayIndex[dayKey] || []).push(i);
+                    const mt = monthTotals[y * 12 + m] = monthTotals[y * 12 + m] || [0, 0];
+                    mt[0] += trades.p[i]; mt[1] += trades.l[i];
+                    const yt = yearTotals[y] = yearTotals[y] || [0, 0];
+                    yt[0] += trades.p[i]; yt[1] += trades.l[i];
+                }}
+            }}
+
             function formatNumber(num) {{
                 if (num === 0) return "0";
                 const sign = num > 0 ? "+" : "-";
                 return `${{sign}}${{Math.abs(num).toLocaleString()}}`;
             }}
             
+            function escapeHtml(text) {{
+                return text.replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+            }}
+            
             function updateSummary(year, month) {{
-                // Calculate Monthly (YYYY-MM)
-                let mProfit = 0;
-                let mLoss = 0;
+                const mt = monthTotals[year * 12 + month] || [0, 0];
+                const yt = yearTotals[year] || [0, 0];
                 
-                // Calculate Yearly (YYYY)
-                let yProfit = 0;
-                let yLoss = 0;
-                
-                // Iterate all event keys
-                for (const dateKey in eventData) {{
-                    // dateKey is "YYYY-MM-DD"
-                    const parts = dateKey.split("-");
-                    const dYear = parseInt(parts[0]);
-                    const dMonth = parseInt(parts[1]) - 1; // 0-indexed
-                    
-                    const entries = eventData[dateKey];
-                    
-                    // Yearly Accumulation
-                    if (dYear === year) {{
-                        entries.forEach(e => {{
-                            yProfit += (e.profit || 0);
-                            yLoss += (e.loss || 0);
-                        }});
-                        
-                        // Monthly Accumulation
-                        if (dMonth === month) {{
-                            entries.forEach(e => {{
-                                mProfit += (e.profit || 0);
-                                mLoss += (e.loss || 0);
-                            }});
-                        }}
-                    }}
-                }}
-                
-                const mNet = mProfit - mLoss;
+                const mNet = mt[0] - mt[1];
                 const mEl = document.getElementById('monthReturn');
                 mEl.innerText = formatNumber(mNet);
                 mEl.className = 'summary-value ' + (mNet > 0 ? 'profit' : (mNet < 0 ? 'loss' : ''));
                 
-                const yNet = yProfit - yLoss;
+                const yNet = yt[0] - yt[1];
                 const yEl = document.getElementById('yearReturn');
                 yEl.innerText = formatNumber(yNet);
                 yEl.className = 'summary-value ' + (yNet > 0 ? 'profit' : (yNet < 0 ? 'loss' : ''));
             }}
 
             function renderCalendar() {{
+                if (dayIndex === null) buildIndexes();
                 const year = currentDate.getFullYear();
                 const month = currentDate.getMonth(); // 0-11
                 
@@ -546,12 +585,7 @@ def generate_interactive_html(calendar_data):
                     cell.className = 'day-cell';
                     
                     // Check matches
-                    // construct YYYY-MM-DD string with padding
-                    const mStr = String(month + 1).padStart(2, '0');
-                    const dStr = String(d).padStart(2, '0');
-                    const dateKey = `${{year}}-${{mStr}}-${{dStr}}`;
-                    
-                    const entries = eventData[dateKey] || [];
+                    const entries = dayIndex[year * 10000 + month * 100 + d] || [];
                     
                     if (isCurrentMonth && d === todayDate) {{
                         cell.classList.add('today');
@@ -570,23 +604,24 @@ def generate_interactive_html(calendar_data):
                         // Create Tooltip
                         let tooltipContent = '';
                         
-                        entries.forEach(e => {{
+                        entries.forEach(i => {{
                             // Logic: ItemName (+Amount)
                             let amountStr = '';
                             let colorClass = '';
+                            const title = escapeHtml(trades.s[trades.t[i]]);
                             
-                            if (e.loss > 0) {{
-                                amountStr = `(-${{e.loss.toLocaleString()}})`;
+                            if (trades.l[i] > 0) {{
+                                amountStr = `(-${{trades.l[i].toLocaleString()}})`;
                                 colorClass = 'loss';
-                            }} else if (e.profit > 0) {{
-                                amountStr = `(+${{e.profit.toLocaleString()}})`;
+                            }} else if (trades.p[i] > 0) {{
+                                amountStr = `(+${{trades.p[i].toLocaleString()}})`;
                                 colorClass = 'profit';
                             }}
                             
-                            // e.title + amountStr
+                            // title + amountStr
                             // If neither, just title
                             
-                            const displayLine = amountStr ? `${{e.title}} ${{amountStr}}` : e.title;
+                            const displayLine = amountStr ? `${{title}} ${{amountStr}}` : title;
                             tooltipContent += `<div class="entry-item ${{colorClass}}">${{displayLine}}</div>`;
                         }});
                         
@@ -614,8 +649,12 @@ def generate_interactive_html(calendar_data):
                 renderCalendar();
             }});
             
-            // Initial Render
-            renderCalendar();
+            // The build's month arrives pre-rendered; it is only rebuilt here if
+            // the viewer's date differs from the build's (e.g. built before midnight)
+            const now = new Date();
+            if (document.getElementById('calendarGrid').dataset.rendered !== `${{now.getFullYear()}}-${{now.getMonth()}}-${{now.getDate()}}`) {{
+                renderCalendar();
+            }}
         </script>
     </body>
     </html>
@@ -624,28 +663,8 @@ def generate_interactive_html(calendar_data):
 
 def find_trading_db(token, page_id):
     print(f"Scanning Page {page_id} for Trading Journal DB...")
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                data = json.loads(response.read().decode("utf-8"))
-                for block in data.get("results", []):
-                    if block.get("type") == "child_database":
-                        title = block.get("child_database", {}).get("title", "")
-                        # Check for "매매일지" or "Trading"
-                        if "매매" in title or "Trading" in title:
-                            print(f"Found Database: {title} ({block.get('id')})")
-                            return block.get("id")
-    except Exception as e:
-        print(f"Error scanning for DB: {e}")
-    return None
+    # Check for "매매일지" or "Trading"
+    return find_database(token, page_id, lambda title: "매매" in title or "Trading" in title)
 
 def main():
     token = os.environ.get("NOTION_TOKEN")
@@ -657,29 +676,32 @@ def main():
         
     db_id = "2f90d907-031e-805c-be36-ebd342683bfa" # Fallback
     
-    if page_id:
-        found_id = find_trading_db(token, page_id)
-        if found_id:
-            db_id = found_id
+    with span("discover"):
+        if page_id:
+            found_id = find_trading_db(token, page_id)
+            if found_id:
+                db_id = found_id
+            else:
+                print("Could not find trading database in page. Using fallback ID.")
         else:
-            print("Could not find trading database in page. Using fallback ID.")
-    else:
-        print("Warning: NOTION_PAGE_ID not set. Using fallback DB ID.")
-    
-    print(f"Fetching Trading Journal data...")
-    raw_data = fetch_db_data(token, db_id)
-    print(f"Fetched {len(raw_data)} entries.")
+            print("Warning: NOTION_PAGE_ID not set. Using fallback DB ID.")
     
-    print("Parsing data...")
-    calendar_data = parse_data(raw_data)
+    print(f"Fetching and parsing Trading Journal data...")
+    with span("fetch_parse") as s:
+        columns, pages = fetch_db_data(token, db_id)
+        trade_table = parse_data(pages, columns)
+        s.set(rows=len(trade_table))
+        run_metrics.incr("rows", len(trade_table))
+    print(f"Parsed {len(trade_table)} trade rows.")
     
     print("Generating Interactive HTML...")
-    html_content = generate_interactive_html(calendar_data)
+    with span("render"):
+        html_content = generate_interactive_html(trade_table)
     
-    with open("index.html", "w", encoding="utf-8") as f:
-        f.write(html_content)
+    with span("write", bytes=len(html_content)):
+        write_page("index.html", html_content)
         
     print("index.html created successfully.")
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
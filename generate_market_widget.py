@@ -3,6 +3,10 @@ import os
 import sys
 from datetime import datetime
 
+from profiling import run_main
+from site_output import write_page
+from tracing import span
+
 # Force UTF-8 encoding
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
@@ -21,7 +25,8 @@ def fetch_market_data():
             ticker = yf.Ticker(ticker_symbol)
             # fast_info is often faster and reliable for current price
             # but history(period='1d') is standard
-            hist = ticker.history(period="5d")
+            with span("yfinance_history", ticker=ticker_symbol):
+                hist = ticker.history(period="5d")
             
             if len(hist) < 2:
                 # Fallback or error
@@ -167,22 +172,24 @@ def generate_html(market_data):
 def main():
     print("Fetching market data...")
     try:
-        data = fetch_market_data()
+        with span("fetch_market_data") as s:
+            data = fetch_market_data()
+            s.set(rows=len(data))
     except Exception as e:
         print(f"Global Error fetching data: {e}")
         data = [] # Fallback to empty
 
     print("Generating HTML...")
     try:
-        html = generate_html(data)
-        with open("market_widget.html", "w", encoding="utf-8") as f:
-            f.write(html)
+        with span("render"):
+            html = generate_html(data)
+        with span("write", bytes=len(html)):
+            write_page("market_widget.html", html)
         print("market_widget.html created.")
     except Exception as e:
         print(f"Error writing HTML: {e}")
         # Write minimal error file to prevent 404
-        with open("market_widget.html", "w", encoding="utf-8") as f:
-            f.write("<html><body>Market Data Unavailable</body></html>")
+        write_page("market_widget.html", "<html><body>Market Data Unavailable</body></html>")
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
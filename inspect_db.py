@@ -1,7 +1,7 @@
 import os
 import sys
-import json
-import urllib.request
+
+from schema_cache import get_schema
 
 # Force UTF-8 encoding
 sys.stdout.reconfigure(encoding='utf-8')
@@ -13,26 +13,17 @@ def main():
         print("Error: NOTION_TOKEN not set.")
         sys.exit(1)
         
-    db_id = "2f90d907-031e-805c-be36-ebd342683bfa" # Trading Journal ID
+    db_id = sys.argv[1] if len(sys.argv) > 1 else "2f90d907-031e-805c-be36-ebd342683bfa" # Trading Journal ID
     
-    url = f"https://api.notion.com/v1/databases/{db_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
+    # Always re-fetch here; this also refreshes the shared schema cache
+    schema = get_schema(token, db_id, max_age=0)
+    if not schema:
+        print(f"Could not fetch schema of {db_id}.")
+        return
     
-    try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                data = json.loads(response.read().decode("utf-8"))
-                props = data.get("properties", {})
-                print(f"Properties of Trading Journal ({db_id}):")
-                for key, val in props.items():
-                    print(f"- {key}: {val.get('type')}")
-    except Exception as e:
-        print(f"Error: {e}")
+    print(f"Properties of {schema.title or 'database'} ({db_id}):")
+    for name, prop in schema.properties.items():
+        print(f"- {name}: {prop.get('type')} (id: {prop.get('id')})")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,150 @@
+import os
+import time
+import asyncio
+
+from cache_store import load_json, save_json
+import run_metrics
+from notion_api import notion_request
+from schema_cache import get_schema, invalidate_schema, query_with_schema
+
+# How long the local index is trusted before the Key Message DB is queried again
+KEY_MESSAGE_INDEX_TTL = int(os.environ.get("KEY_MESSAGE_INDEX_TTL", 6 * 3600))
+
+# Optional number column: how often a message comes up per rotation round
+WEIGHT_KEYS = ["Weight", "가중치"]
+
+# Columns read by a refresh ("title" is the title property's fixed id)
+INDEX_FIELDS = {"title": ["title"], "weight": WEIGHT_KEYS}
+
+def body_lines(blocks):
+    # Non-empty paragraph lines of a page body
+    lines = []
+    for block in blocks:
+        if block.get("type") == "paragraph":
+            rich_text = block.get("paragraph", {}).get("rich_text", [])
+            plain_text = "".join([t.get("plain_text", "") for t in rich_text])
+            if plain_text.strip():
+                lines.append(plain_text)
+    return lines
+
+def fetch_body_lines(token, page_id):
+    # Body lines, or None if the request failed
+    data = notion_request(token, f"blocks/{page_id}/children?page_size=100")
+    if data is None: return None
+    return body_lines(data.get("results", []))
+
+def page_weight(page, weight_columns):
+    props = page.get("properties", {})
+    for name in weight_columns:
+        val = props.get(name, {}).get("number")
+        if val is not None: return val
+    return 1
+
+def page_title(page):
+    for val in page.get("properties", {}).values():
+        if val.get("type") == "title":
+            return "".join([t.get("plain_text", "") for t in val.get("title", [])])
+    return ""
+
+class KeyMessageIndex:
+    # Local copy of the Key Message DB: every page's title, last_edited_time
+    # and (once fetched) body lines, plus the target paragraph and the text
+    # currently shown. Stored in .cache/key_messages_<db>.json.
+
+    def __init__(self, db_id, data=None):
+        self.db_id = db_id
+        data = data or {}
+        self.refreshed_at = data.get("refreshed_at", 0)
+        self.pages = data.get("pages", {})
+        self.targets = data.get("targets", {})
+        self.last_text = data.get("last_text")
+
+    @staticmethod
+    def _file(db_id):
+        return f"key_messages_{db_id.replace('-', '')}.json"
+
+    @classmethod
+    def load(cls, db_id):
+        return cls(db_id, load_json(cls._file(db_id), {}))
+
+    def save(self):
+        save_json(self._file(self.db_id), {
+            "refreshed_at": self.refreshed_at,
+            "pages": self.pages,
+            "targets": self.targets,
+            "last_text": self.last_text
+        })
+
+    def is_stale(self, max_age=None):
+        if max_age is None: max_age = KEY_MESSAGE_INDEX_TTL
+        return not self.pages or time.time() - self.refreshed_at >= max_age
+
+    def refresh(self, token):
+        # Full paginated walk of the DB (title and weight columns only)
+        schema, columns, pages = query_with_schema(token, self.db_id, INDEX_FIELDS)
+        return self._replace_pages(pages, columns["weight"])
+
+    async def refresh_async(self, client):
+        # refresh() on an AsyncNotionClient; the schema lookup (usually a cache hit)
+        # runs on a thread. Like query_with_schema, an out-of-date cached schema
+        # is re-fetched and the query repeated once.
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            schema = await loop.run_in_executor(None, get_schema, client.token, self.db_id)
+            projection = schema.projection(INDEX_FIELDS) if schema else ["title"]
+            pages = await client.query_all(self.db_id, filter_properties=projection)
+            if attempt or not schema or not pages or not schema.outdated_for(pages[0], INDEX_FIELDS):
+                break
+            print(f"Cached schema of {self.db_id} is out of date. Re-fetching...")
+            invalidate_schema(self.db_id)
+        return self._replace_pages(pages, schema.bind(INDEX_FIELDS)["weight"] if schema else [])
+
+    def _replace_pages(self, db_pages, weight_columns):
+        # Cached bodies are kept for pages whose last_edited_time did not change
+        pages = {}
+        for page in db_pages:
+            page_id = page.get("id")
+            previous = self.pages.get(page_id, {})
+            last_edited_time = page.get("last_edited_time")
+            pages[page_id] = {
+                "title": page_title(page),
+                "weight": page_weight(page, weight_columns),
+                "last_edited_time": last_edited_time,
+                "body": previous.get("body") if previous.get("last_edited_time") == last_edited_time else None
+            }
+        if not pages:
+            print("Key Message index refresh returned no pages. Keeping the old index.")
+            return False
+        self.pages = pages
+        self.refreshed_at = time.time()
+        print(f"Indexed {len(pages)} key messages.")
+        return True
+
+    def page_ids(self):
+        return list(self.pages)
+
+    def weights(self):
+        return {page_id: entry.get("weight", 1) for page_id, entry in self.pages.items()}
+
+    def message(self, token, page_id):
+        # Body text if the page has one, otherwise the title.
+        # The body is fetched at most once per page edit.
+        entry = self.pages[page_id]
+        run_metrics.cache("key_message_body", hit=entry.get("body") is not None)
+        if entry.get("body") is None:
+            entry["body"] = fetch_body_lines(token, page_id)
+        return self._text(entry)
+
+    async def message_async(self, client, page_id):
+        entry = self.pages[page_id]
+        run_metrics.cache("key_message_body", hit=entry.get("body") is not None)
+        if entry.get("body") is None:
+            blocks = await client.list_children(page_id)
+            entry["body"] = body_lines(blocks) if blocks is not None else None
+        return self._text(entry)
+
+    @staticmethod
+    def _text(entry):
+        if entry.get("body"):
+            return "\n".join(entry["body"])
+        return entry.get("title") or "No Text Found"
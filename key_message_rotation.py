@@ -0,0 +1,130 @@
+import os
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from cache_store import load_json, save_json
+
+# "run": a new message on every run, "daily": one message per (KST) day
+KEY_MESSAGE_ROTATION = os.environ.get("KEY_MESSAGE_ROTATION", "run")
+
+# Copies per round are capped so one large weight can't fill the deck
+KEY_MESSAGE_MAX_WEIGHT = int(os.environ.get("KEY_MESSAGE_MAX_WEIGHT", 10))
+
+def kst_today():
+    return (datetime.now(timezone.utc) + timedelta(hours=9)).date().isoformat()
+
+class RotationDeck:
+    # Shuffled deck of page ids persisted between runs. Every message is
+    # shown once per round (weight n -> n times, at most KEY_MESSAGE_MAX_WEIGHT;
+    # weight 0 or less -> left out) before any repeats. A draw takes the next
+    # card; only if it is the message shown last is the rest of the deck
+    # scanned for a different one to swap in. Shuffles are seeded from the
+    # DB id and round number, so the sequence is reproducible.
+
+    def __init__(self, db_id, data=None):
+        self.db_id = db_id
+        data = data or {}
+        self.round = data.get("round", 0)
+        self.deck = data.get("deck", [])
+        self.pos = data.get("pos", 0)
+        self.pool_version = data.get("pool_version")
+        self.current = data.get("current")
+        self.day = data.get("day")
+
+    @staticmethod
+    def _file(db_id):
+        return f"key_message_rotation_{db_id.replace('-', '')}.json"
+
+    @classmethod
+    def load(cls, db_id):
+        return cls(db_id, load_json(cls._file(db_id), {}))
+
+    def save(self):
+        save_json(self._file(self.db_id), {
+            "round": self.round,
+            "deck": self.deck,
+            "pos": self.pos,
+            "pool_version": self.pool_version,
+            "current": self.current,
+            "day": self.day
+        })
+
+    def _rng(self, salt=""):
+        return random.Random(f"{self.db_id}:{self.round}{salt}")
+
+    @staticmethod
+    def _copies(weight):
+        # Cards per round: 0 for a weight of 0 or less, otherwise 1..KEY_MESSAGE_MAX_WEIGHT
+        try:
+            weight = float(weight)
+        except (TypeError, ValueError):
+            return 1
+        if weight != weight or weight <= 0:
+            return 0
+        return max(1, int(round(min(weight, KEY_MESSAGE_MAX_WEIGHT))))
+
+    def _shuffle(self, weights):
+        deck = [pid for pid, w in weights.items() for _ in range(self._copies(w))]
+        self._rng().shuffle(deck)
+        self.deck = deck
+        self.pos = 0
+
+    def sync(self, weights, pool_version):
+        # weights: {page_id: weight}. Only runs when the pool changed. Pages
+        # that were removed or whose copy count changed leave the part not
+        # drawn yet; new and re-weighted pages are then dealt into it at
+        # random positions, minus the copies already drawn this round.
+        if pool_version == self.pool_version and self.deck:
+            return
+        self.pool_version = pool_version
+        if not self.deck:
+            self._shuffle(weights)
+            return
+
+        copies = {pid: self._copies(w) for pid, w in weights.items()}
+        dealt = Counter(self.deck)
+        drawn = [pid for pid in self.deck[:self.pos] if copies.get(pid)]
+        drawn_count = Counter(drawn)
+        remaining = [pid for pid in self.deck[self.pos:] if copies.get(pid) and dealt[pid] == copies[pid]]
+        new_cards = [pid for pid, n in copies.items() if n and dealt[pid] != n
+                     for _ in range(n - drawn_count[pid])]
+
+        # One pass: pick the slots for the new cards, then fill the rest in order
+        rng = self._rng(f":{pool_version}")
+        rng.shuffle(new_cards)
+        total = len(remaining) + len(new_cards)
+        slots = set(rng.sample(range(total), len(new_cards)))
+        new_iter, old_iter = iter(new_cards), iter(remaining)
+        self.deck = drawn + [next(new_iter) if i in slots else next(old_iter) for i in range(total)]
+        self.pos = len(drawn)
+
+    def draw(self, weights):
+        if self.pos >= len(self.deck):
+            self.round += 1
+            self._shuffle(weights)
+        if not self.deck:
+            return None
+
+        # Avoid showing the same message twice in a row across a round boundary or weight copies
+        if self.deck[self.pos] == self.current:
+            for j in range(self.pos + 1, len(self.deck)):
+                if self.deck[j] != self.current:
+                    self.deck[self.pos], self.deck[j] = self.deck[j], self.deck[self.pos]
+                    break
+
+        pid = self.deck[self.pos]
+        self.pos += 1
+        return pid
+
+    def pick(self, weights, pool_version=None, mode=None, today=None):
+        if mode is None: mode = KEY_MESSAGE_ROTATION
+        if today is None: today = kst_today()
+
+        self.sync(weights, pool_version)
+        if mode == "daily" and self.day == today and self.current in weights:
+            return self.current
+
+        self.current = self.draw(weights)
+        self.day = today
+        return self.current
@@ -0,0 +1,108 @@
+import re
+import sys
+import time
+import random
+
+class KeywordMatcher:
+    # Finds every keyword in a text with a single compiled regex instead of
+    # one substring scan per keyword.
+    #
+    # The alternation is ordered longest-first, so each hit is the longest
+    # keyword at that position; keywords contained in a hit ("하이닉스" inside
+    # "SK하이닉스") are added from a precomputed table. Only keywords that
+    # straddle two separate hits can be missed.
+
+    def __init__(self, weights, ignore_case=False):
+        if not isinstance(weights, dict):
+            weights = {k: 1 for k in weights}
+        self.weights = dict(weights)
+        self.ignore_case = ignore_case
+
+        keywords = sorted(self.weights, key=len, reverse=True)
+        self._canonical = {self._key(k): k for k in keywords}
+        self._contained = {
+            k: tuple(c for c in keywords if c != k and self._key(c) in self._key(k))
+            for k in keywords
+        }
+
+        flags = re.IGNORECASE if ignore_case else 0
+        self._pattern = re.compile("|".join(re.escape(k) for k in keywords), flags) if keywords else None
+
+    def _key(self, text):
+        return text.casefold() if self.ignore_case else text
+
+    def search(self, text):
+        # True if any keyword occurs (stops at the first hit)
+        return bool(self._pattern and self._pattern.search(text))
+
+    def matches(self, text):
+        if not self._pattern: return set()
+        hits = set(self._pattern.findall(text))
+        if self.ignore_case:
+            hits = {self._canonical[self._key(h)] for h in hits}
+        found = set(hits)
+        for keyword in hits:
+            found.update(self._contained[keyword])
+        return found
+
+    def score(self, text):
+        return sum(self.weights[k] for k in self.matches(text))
+
+# --- Benchmark: python keyword_matcher.py [titles] ---
+
+def _loop_scores(titles, weights, exclusions):
+    # The original per-keyword substring loop, extended to collect every
+    # matched keyword (needed for weighted scores)
+    out = []
+    for title in titles:
+        if any(bad in title for bad in exclusions):
+            out.append(None)
+            continue
+        out.append(sum(w for k, w in weights.items() if k in title))
+    return out
+
+def _matcher_scores(titles, keyword_matcher, exclusion_matcher):
+    out = []
+    for title in titles:
+        if exclusion_matcher.search(title):
+            out.append(None)
+            continue
+        out.append(keyword_matcher.score(title))
+    return out
+
+def synthetic_titles(count, keywords, exclusions, seed=0):
+    rng = random.Random(seed)
+    words = ["증시", "마감", "외국인", "순매수", "반도체", "실적", "발표", "전망", "하락", "상승",
+             "기관", "투자", "정책", "달러", "유가", "미국", "중국", "수출", "속보", "단독"]
+    vocab = words * 4 + list(keywords) + list(exclusions)
+    return [" ".join(rng.choice(vocab) for _ in range(rng.randint(4, 10))) for _ in range(count)]
+
+def benchmark(count=5000, repeat=5):
+    from update_daily_news import KEYWORDS, EXCLUSION_KEYWORDS
+
+    titles = synthetic_titles(count, KEYWORDS, EXCLUSION_KEYWORDS)
+    weights = {k: i + 1 for i, k in enumerate(KEYWORDS)}
+    keyword_matcher = KeywordMatcher(weights)
+    exclusion_matcher = KeywordMatcher(EXCLUSION_KEYWORDS)
+
+    assert _loop_scores(titles, weights, EXCLUSION_KEYWORDS) == _matcher_scores(titles, keyword_matcher, exclusion_matcher)
+
+    def best_of(fn, *args):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(*args)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    loop_t = best_of(_loop_scores, titles, weights, EXCLUSION_KEYWORDS)
+    matcher_t = best_of(_matcher_scores, titles, keyword_matcher, exclusion_matcher)
+    print(f"{count} titles, best of {repeat}:")
+    print(f"  substring loop : {loop_t * 1000:8.2f} ms")
+    print(f"  compiled regex : {matcher_t * 1000:8.2f} ms  ({loop_t / matcher_t:.2f}x)")
+    return {"titles": count, "loop_s": loop_t, "matcher_s": matcher_t}
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8')
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
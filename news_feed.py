@@ -0,0 +1,166 @@
+import re
+import time
+import threading
+import unicodedata
+import urllib.parse
+import urllib.request
+import urllib.error
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+import run_metrics
+import tracing
+from cache_store import load_json, save_json
+from notion_api import decoded_stream
+
+FEED_CACHE_FILE = "news_feeds.json"
+
+# fetch_feeds() updates the shared cache file from several threads
+_cache_lock = threading.Lock()
+
+def clean_title(title):
+    # Google News appends " - Publisher" to every title
+    if " - " in title:
+        title = title.rsplit(" - ", 1)[0]
+    return title
+
+def parse_pub_date(text):
+    try:
+        return parsedate_to_datetime(text).timestamp()
+    except Exception:
+        return None
+
+def iter_rss_items(stream, chunk_size=16384):
+    # Incremental RSS parser: reads the response in chunks and yields each
+    # <item> as soon as its end tag arrives. Finished items are removed from
+    # the tree, so memory stays flat however long the feed is. The consumer
+    # can stop iterating at any point and the rest of the body is never read.
+    parser = ET.XMLPullParser(events=("start", "end"))
+    channel = None
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk: break
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == "start":
+                if elem.tag == "channel": channel = elem
+                continue
+            if elem.tag != "item": continue
+
+            title = elem.findtext('title')
+            link = elem.findtext('link')
+            pub_date = elem.findtext('pubDate')
+            elem.clear()
+            if channel is not None: channel.remove(elem)
+
+            if not title or not link: continue
+            yield {
+                "title": clean_title(title),
+                "link": link,
+                "published": parse_pub_date(pub_date)
+            }
+    parser.close()
+
+def fetch_feed(url, select=list):
+    # Conditional GET against the cached ETag / Last-Modified.
+    # 304 -> cached items, no download and no XML parsing.
+    # 200 -> the (gzip) body is inflated and parsed while it streams in; select() consumes the
+    # item iterator and may stop early (e.g. once enough candidates are found).
+    # Selected items are kept per link with the time they were first seen.
+    with _cache_lock:
+        entry = load_json(FEED_CACHE_FILE, {}).get(url, {})
+    cached_items = list(entry.get("items", {}).values())
+
+    headers = {"Accept-Encoding": "gzip"}
+    if entry.get("etag"): headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"): headers["If-Modified-Since"] = entry["last_modified"]
+
+    with tracing.http_span("GET", url) as span:
+        try:
+            req = urllib.request.Request(url, headers=headers)
+            with urllib.request.urlopen(req) as response:
+                span.set(status=response.status)
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                counted = tracing.CountingReader(response, span)
+                selected = select(iter_rss_items(decoded_stream(counted, response.headers)))
+                run_metrics.record_http(bytes_in=counted.bytes_in)
+                run_metrics.cache("feeds", hit=False)
+        except urllib.error.HTTPError as e:
+            span.set(status=e.code)
+            run_metrics.record_http(error=e.code != 304)
+            if e.code == 304:
+                run_metrics.cache("feeds", hit=True)
+                print("Feed not modified (304). Using cached items.")
+                return cached_items
+            print(f"HTTP Error fetching RSS: {e.code}")
+            return cached_items
+        except Exception as e:
+            span.set(error=type(e).__name__)
+            run_metrics.record_http(error=True)
+            print(f"Error fetching RSS: {e}")
+            return cached_items
+
+    now = time.time()
+    previous = entry.get("items", {})
+    items = {}
+    for item in selected:
+        if item["link"] in items: continue
+        item["first_seen"] = previous.get(item["link"], {}).get("first_seen", now)
+        items[item["link"]] = item
+
+    with _cache_lock:
+        cache = load_json(FEED_CACHE_FILE, {})
+        cache[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "items": items
+        }
+        save_json(FEED_CACHE_FILE, cache)
+    return list(items.values())
+
+def fetch_feeds(urls, select=list, max_workers=8):
+    # Fetches several feeds concurrently (each with its own conditional GET
+    # and cache entry). Returns the item lists in the order of `urls`.
+    if not urls: return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        return list(executor.map(lambda url: fetch_feed(url, select=select), urls))
+
+def normalize_title(title):
+    # Case/width/punctuation-insensitive key: "[속보] 코스피, 상승!" == "속보 코스피 상승"
+    return re.sub(r"[\W_]+", "", unicodedata.normalize("NFKC", title).casefold())
+
+# Query parameters that only track the click; anything else (e.g. Naver's
+# ?oid=..&aid=..) may identify the article and is kept
+TRACKING_PARAMS = {"oc", "fbclid", "gclid", "dclid", "msclkid", "igshid", "mc_cid", "mc_eid", "ref", "ref_src", "cmpid", "ved", "usg"}
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith("utm_")
+
+def canonical_link(link):
+    # Tracking parameters (e.g. Google News "?oc=5") and fragments don't identify an
+    # article; the remaining parameters are kept in sorted order
+    parts = urllib.parse.urlsplit(link.strip())
+    params = sorted((k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if not is_tracking_param(k))
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), urllib.parse.urlencode(params), ""))
+
+def merge_feeds(feed_items):
+    # Round-robin over the feeds so every feed contributes near the top of the
+    # merged stream, skipping items already seen by title or by link.
+    seen = set()
+    iterators = [iter(items) for items in feed_items]
+    while iterators:
+        remaining = []
+        for it in iterators:
+            item = next(it, None)
+            if item is None: continue
+            remaining.append(it)
+            title_key = ("t", normalize_title(item["title"]))
+            link_key = ("l", canonical_link(item["link"]))
+            if title_key in seen or link_key in seen: continue
+            seen.add(title_key)
+            seen.add(link_key)
+            yield item
+        iterators = remaining
@@ -0,0 +1,56 @@
+import os
+from collections import deque
+
+from cache_store import load_json, save_json
+from news_feed import canonical_link
+
+HISTORY_FILE = "news_history.json"
+# Number of posted links remembered; older ones are evicted first
+HISTORY_SIZE = int(os.environ.get("NEWS_HISTORY_SIZE", 500))
+
+class NewsHistory:
+    # Ring buffer of posted (canonical) links with a set for O(1) lookups
+
+    def __init__(self, links=(), last_posted=None, size=HISTORY_SIZE):
+        self._links = deque(maxlen=size)
+        self._seen = set()
+        self.last_posted = last_posted
+        for link in links:
+            self.add(link)
+
+    @classmethod
+    def load(cls, size=HISTORY_SIZE):
+        data = load_json(HISTORY_FILE, {})
+        return cls(data.get("links", []), data.get("last_posted"), size)
+
+    def save(self):
+        save_json(HISTORY_FILE, {"links": list(self._links), "last_posted": self.last_posted})
+
+    def __len__(self):
+        return len(self._links)
+
+    def seen(self, link):
+        return canonical_link(link) in self._seen
+
+    def add(self, link):
+        link = canonical_link(link)
+        if link in self._seen: return
+        if len(self._links) == self._links.maxlen:
+            self._seen.discard(self._links[0])
+        self._links.append(link)
+        self._seen.add(link)
+
+    def record_post(self, link):
+        self.add(link)
+        self.last_posted = canonical_link(link)
+
+    def is_current(self, link):
+        return self.last_posted == canonical_link(link)
+
+def pick_news(candidates, history):
+    # Best candidate: unseen before seen, then priority / keyword score,
+    # then newest (publish time, or when the item was first seen in the feed)
+    def rank(item):
+        newest = item.get("published") or item.get("first_seen") or 0
+        return (history.seen(item["link"]), item.get("priority", 2), -item.get("score", 0), -newest)
+    return min(candidates, key=rank) if candidates else None
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import zlib
+import threading
+import urllib.parse
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import run_metrics
+import tracing
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON bodies are parsed straight from bytes (orjson when installed)
+json_loads = orjson.loads if orjson is not None else json.loads
+
+# NOTION_API_BASE=http://127.0.0.1:8766/v1 runs every job against fake_notion_server.py
+NOTION_API_BASE = os.environ.get("NOTION_API_BASE", "https://api.notion.com/v1").rstrip("/")
+NOTION_VERSION = "2022-06-28"
+
+# Notion allows an average of 3 requests per second per integration
+NOTION_RATE_LIMIT = float(os.environ.get("NOTION_RATE_LIMIT", 3))
+# Concurrent writers used by bulk jobs
+NOTION_WORKERS = int(os.environ.get("NOTION_WORKERS", 3))
+MAX_RETRIES = 3
+
+class RateLimiter:
+    # Token bucket shared by every thread in the process. A caller that finds
+    # the bucket empty reserves the next token and sleeps until it is due.
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        # Takes a token and returns how long the caller must wait before using it
+        if self.rate <= 0: return 0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+
+    def acquire(self):
+        # Returns the seconds spent waiting for a token
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+rate_limiter = RateLimiter(NOTION_RATE_LIMIT)
+
+def notion_headers(token):
+    return {
+        "Authorization": f"Bearer {token}",
+        "Notion-Version": NOTION_VERSION,
+        "Content-Type": "application/json",
+        "Accept-Encoding": "gzip"
+    }
+
+class GzipReader:
+    # File-like view of a gzip-encoded body that inflates as it is read, so
+    # the compressed and inflated copies are never held in full together
+    def __init__(self, stream, chunk_size=65536):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.eof = False
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return b"".join(iter(lambda: self.read(self.chunk_size), b""))
+        while True:
+            if self.decompressor.unconsumed_tail:
+                data = self.decompressor.decompress(self.decompressor.unconsumed_tail, size)
+            else:
+                if self.eof: return b""
+                chunk = self.stream.read(self.chunk_size)
+                if not chunk:
+                    self.eof = True
+                    return self.decompressor.flush()
+                data = self.decompressor.decompress(chunk, size)
+            if data: return data
+
+def decoded_stream(stream, headers):
+    # The body as plain bytes, inflated if the response was gzip-encoded
+    if (headers.get("Content-Encoding") or "").lower() == "gzip":
+        return GzipReader(stream)
+    return stream
+
+def read_body(response):
+    # -> (body bytes, bytes received on the wire)
+    counted = tracing.CountingReader(response)
+    return decoded_stream(counted, response.headers).read(), counted.bytes_in
+
+def notion_request(token, endpoint, method="GET", payload=None):
+    url = f"{NOTION_API_BASE}/{endpoint}"
+    headers = notion_headers(token)
+
+    data = json.dumps(payload).encode("utf-8") if payload else None
+
+    with tracing.http_span(method, endpoint, bytes_out=len(data) if data else 0) as span:
+        for attempt in range(MAX_RETRIES + 1):
+            span.set(retries=attempt)
+            span.add("wait_ms", round(rate_limiter.acquire() * 1000, 3))
+            try:
+                req = urllib.request.Request(url, data=data, headers=headers, method=method)
+                with urllib.request.urlopen(req) as response:
+                    body, wire_bytes = read_body(response)
+                    span.set(status=response.status, bytes_in=wire_bytes, body_bytes=len(body))
+                    run_metrics.record_http(wire_bytes, len(data or b""), retry=attempt > 0)
+                    return json_loads(body)
+            except urllib.error.HTTPError as e:
+                span.set(status=e.code)
+                run_metrics.record_http(0, len(data or b""), retry=attempt > 0, error=e.code != 429)
+                if e.code == 429 and attempt < MAX_RETRIES:
+                    retry_after = float(e.headers.get("Retry-After") or 1)
+                    print(f"Rate limited on {endpoint}. Retrying in {retry_after}s...")
+                    span.add("wait_ms", retry_after * 1000)
+                    time.sleep(retry_after)
+                    continue
+                try:
+                    detail = read_body(e)[0].decode("utf-8", "replace")
+                except Exception as read_error:
+                    detail = f"(error body unreadable: {read_error})"
+                print(f"HTTP Error {e.code} on {endpoint}: {detail}")
+                return None
+            except Exception as e:
+                span.set(error=type(e).__name__)
+                run_metrics.record_http(0, len(data or b""), retry=attempt > 0, error=True)
+                print(f"Error on {endpoint}: {e}")
+                return None
+
+def resolve_projection(properties, fields):
+    # fields: {logical field: [candidate property names or ids]}
+    # Every candidate present in the schema is kept so parsers that try
+    # several columns per row still see all of them.
+    by_id = {p.get("id"): p for p in properties.values()}
+    ids = []
+    for candidates in fields.values():
+        for key in candidates:
+            prop = properties.get(key) or by_id.get(key)
+            if prop and prop.get("id") not in ids:
+                ids.append(prop.get("id"))
+    return ids
+
+def _query_endpoint(db_id, filter_properties=None):
+    endpoint = f"databases/{db_id}/query"
+    if filter_properties:
+        # Property ids come back already percent-encoded from the API
+        query = "&".join(f"filter_properties={urllib.parse.quote(pid, safe='%')}" for pid in filter_properties)
+        endpoint += f"?{query}"
+    return endpoint
+
+def query_database(token, db_id, payload=None, start_cursor=None, filter_properties=None):
+    # One databases/{id}/query batch (max 100 rows)
+    body = dict(payload or {})
+    body.setdefault("page_size", 100)
+    if start_cursor: body["start_cursor"] = start_cursor
+    return notion_request(token, _query_endpoint(db_id, filter_properties), method="POST", payload=body)
+
+def iter_database_pages(token, db_id, payload=None, filter_properties=None, on_error=None):
+    # Yields pages as each batch arrives. While the caller is consuming
+    # batch N, batch N+1 is already being fetched on a background thread,
+    # so at most the current batch and the one in flight are held in memory.
+    # A failed batch ends the iteration; on_error() is called first, for
+    # callers that must not act on a partial result.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(query_database, token, db_id, payload, None, filter_properties)
+        while pending is not None:
+            data = pending.result()
+            if not data:
+                if on_error: on_error()
+                break
+
+            pending = None
+            if data.get("has_more") and data.get("next_cursor"):
+                pending = executor.submit(query_database, token, db_id, payload, data.get("next_cursor"), filter_properties)
+
+            results = data.pop("results", [])
+            del data
+            for page in results:
+                yield page
+
+def iter_block_children(token, block_id, on_error=None):
+    # All children of a block, following next_cursor past the first 100.
+    # A failed request ends the iteration after calling on_error().
+    start_cursor = None
+    while True:
+        endpoint = f"blocks/{block_id}/children?page_size=100"
+        if start_cursor: endpoint += f"&start_cursor={start_cursor}"
+        data = notion_request(token, endpoint)
+        if not data:
+            if on_error: on_error()
+            return
+        for block in data.get("results", []):
+            yield block
+        if not data.get("has_more") or not data.get("next_cursor"): return
+        start_cursor = data.get("next_cursor")
+
+def run_concurrently(fn, items, max_workers=None):
+    # Bounded worker pool for bulk writes; every request still goes through
+    # the shared rate limiter. Yields (item, result) as each call finishes.
+    if max_workers is None: max_workers = NOTION_WORKERS
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -0,0 +1,144 @@
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import notion_api
+import run_metrics
+import tracing
+from notion_api import notion_headers, notion_request, json_loads, _query_endpoint
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# asyncio counterpart of the notion_api helpers, for jobs that read several
+# resources (databases, block subtrees, page bodies) at once:
+#
+#   async with AsyncNotionClient(token) as client:
+#       pages, blocks = await asyncio.gather(client.query_all(db_id), client.list_children(block_id))
+#
+# At most `concurrency` requests are in flight, and every request takes a
+# token from notion_api.rate_limiter, the same bucket the sync helpers use.
+# With aiohttp installed requests share one connection pool (gzip bodies are
+# inflated by aiohttp); otherwise each one runs notion_request on a small
+# thread pool.
+
+class AsyncNotionClient:
+    def __init__(self, token, concurrency=None):
+        self.token = token
+        self.concurrency = max(1, concurrency or notion_api.NOTION_WORKERS)
+        self.session = None
+        self.executor = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        if aiohttp is not None:
+            self.session = aiohttp.ClientSession(headers=notion_headers(self.token),
+                                                 connector=aiohttp.TCPConnector(limit=self.concurrency))
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.session is not None:
+            await self.session.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+        return False
+
+    async def request(self, endpoint, method="GET", payload=None):
+        # Same contract as notion_request: parsed JSON, or None after printing the error
+        async with self._semaphore:
+            if self.session is None:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, notion_request, self.token, endpoint, method, payload)
+            return await self._aiohttp_request(endpoint, method, payload)
+
+    async def _aiohttp_request(self, endpoint, method, payload):
+        url = f"{notion_api.NOTION_API_BASE}/{endpoint}"
+        data = json.dumps(payload).encode("utf-8") if payload else None
+
+        with tracing.http_span(method, endpoint, bytes_out=len(data) if data else 0) as span:
+            for attempt in range(notion_api.MAX_RETRIES + 1):
+                span.set(retries=attempt)
+                wait = notion_api.rate_limiter.reserve()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                span.add("wait_ms", round(wait * 1000, 3))
+                try:
+                    async with self.session.request(method, url, data=data) as response:
+                        body = await response.read()
+                        span.set(status=response.status, bytes_in=len(body))
+                        if response.status == 429 and attempt < notion_api.MAX_RETRIES:
+                            run_metrics.record_http(0, len(data or b""), retry=attempt > 0)
+                            retry_after = float(response.headers.get("Retry-After") or 1)
+                            print(f"Rate limited on {endpoint}. Retrying in {retry_after}s...")
+                            span.add("wait_ms", retry_after * 1000)
+                            await asyncio.sleep(retry_after)
+                            continue
+                        if response.status >= 400:
+                            run_metrics.record_http(0, len(data or b""), retry=attempt > 0, error=True)
+                            print(f"HTTP Error {response.status} on {endpoint}: {body.decode('utf-8', 'replace')}")
+                            return None
+                        run_metrics.record_http(len(body), len(data or b""), retry=attempt > 0)
+                        return json_loads(body)
+                except Exception as e:
+                    span.set(error=type(e).__name__)
+                    run_metrics.record_http(0, len(data or b""), retry=attempt > 0, error=True)
+                    print(f"Error on {endpoint}: {e}")
+                    return None
+
+    async def query_database(self, db_id, payload=None, start_cursor=None, filter_properties=None):
+        # One databases/{id}/query batch (max 100 rows)
+        body = dict(payload or {})
+        body.setdefault("page_size", 100)
+        if start_cursor: body["start_cursor"] = start_cursor
+        return await self.request(_query_endpoint(db_id, filter_properties), method="POST", payload=body)
+
+    async def iter_database_pages(self, db_id, payload=None, filter_properties=None):
+        # Async generator over every page; like the sync version, the next
+        # batch is requested while the current one is being consumed.
+        pending = asyncio.ensure_future(self.query_database(db_id, payload, None, filter_properties))
+        try:
+            while pending is not None:
+                data = await pending
+                if not data:
+                    break
+                pending = None
+                if data.get("has_more") and data.get("next_cursor"):
+                    pending = asyncio.ensure_future(self.query_database(db_id, payload, data.get("next_cursor"), filter_properties))
+                for page in data.get("results", []):
+                    yield page
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def query_all(self, db_id, payload=None, filter_properties=None):
+        return [page async for page in self.iter_database_pages(db_id, payload, filter_properties)]
+
+    async def list_children(self, block_id):
+        # All children of a block, following next_cursor past the first 100.
+        # None if the first request failed.
+        blocks = []
+        start_cursor = None
+        while True:
+            endpoint = f"blocks/{block_id}/children?page_size=100"
+            if start_cursor: endpoint += f"&start_cursor={start_cursor}"
+            data = await self.request(endpoint)
+            if data is None:
+                return blocks if start_cursor else None
+            blocks.extend(data.get("results", []))
+            if not data.get("has_more") or not data.get("next_cursor"):
+                return blocks
+            start_cursor = data.get("next_cursor")
+
+    async def update_block(self, block_id, payload):
+        return await self.request(f"blocks/{block_id}", method="PATCH", payload=payload)
+
+    async def append_children(self, block_id, children):
+        return await self.request(f"blocks/{block_id}/children", method="PATCH", payload={"children": children})
+
+    async def delete_block(self, block_id):
+        return await self.request(f"blocks/{block_id}", method="DELETE")
@@ -0,0 +1,8 @@
+# Number formatting shared by pages rendered in Python, so pre-rendered text
+# matches what the page's own JS would print.
+
+def format_amount(value):
+    # Like Number.toLocaleString(): thousands separators, at most 3 decimals
+    if float(value).is_integer():
+        return f"{int(value):,}"
+    return f"{value:,.3f}".rstrip("0").rstrip(".")
@@ -1,9 +1,14 @@
 import os
+import csv
 import json
-import time
 import sys
-import urllib.request
-import urllib.error
+import hashlib
+import argparse
+
+from cache_store import cache_path, load_json, save_json
+from key_message_index import page_title, fetch_body_lines
+from notion_api import notion_request, iter_database_pages, run_concurrently
+from schema_cache import get_schema
 
 # Force UTF-8 encoding
 sys.stdout.reconfigure(encoding='utf-8')
@@ -62,36 +67,81 @@ QUOTES = [
     "내일의 시장은 아무도 모른다. 대응만이 살 길이다."
 ]
 
-def create_page(token, db_id, content):
-    url = "https://api.notion.com/v1/pages"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
+QUOTE_COLUMNS = ["quote", "text", "content", "명언", "내용"]
+
+def title_for(content):
+    # Truncate title if too long, full text goes in the body
+    if len(content) > 80:
+        return content[:77] + "..."
+    return content
+
+def load_quotes(path):
+    # .json: list of strings or objects with a quote/text/content field
+    # .csv: a quote/text/content column (or the first column)
+    # anything else: one quote per line
+    ext = os.path.splitext(path)[1].lower()
+    quotes = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if ext == ".json":
+            for entry in json.load(f):
+                if isinstance(entry, dict):
+                    entry = next((entry[k] for k in QUOTE_COLUMNS if entry.get(k)), "")
+                quotes.append(str(entry))
+        elif ext == ".csv":
+            rows = list(csv.reader(f))
+            header = [h.strip().lower() for h in rows[0]] if rows else []
+            col = next((header.index(k) for k in QUOTE_COLUMNS if k in header), None)
+            if col is None:
+                col = 0
+            else:
+                rows = rows[1:]
+            quotes = [row[col] for row in rows if len(row) > col]
+        else:
+            quotes = f.read().splitlines()
+    return [q.strip() for q in quotes if q.strip()]
+
+def title_property_name(token, db_id):
+    schema = get_schema(token, db_id)
+    if schema:
+        for name, prop in schema.properties.items():
+            if prop.get("type") == "title":
+                return name
+    return "이름"
+
+def quote_key(content):
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+def existing_quote_keys(token, db_id, cut_titles, workers=None):
+    # quote_key of the full text of every quote in the DB, from one paginated
+    # pass over the title column. A title is the full text unless it was cut
+    # (title_for); bodies are read only for pages whose title matches a cut
+    # title in cut_titles, i.e. quotes that could be the ones being imported.
+    keys = set()
+    cut_pages = []
+    for page in iter_database_pages(token, db_id, filter_properties=["title"]):
+        title = page_title(page)
+        keys.add(quote_key(title))
+        if title in cut_titles:
+            cut_pages.append(page.get("id"))
+    for page_id, lines in run_concurrently(lambda pid: fetch_body_lines(token, pid), cut_pages, workers):
+        if lines:
+            keys.add(quote_key("\n".join(lines)))
+    return keys
+
+def create_page(token, db_id, content, title_property="이름"):
     # Payload: Title + Body Paragraph
-    # We add content to both Title (for easier view in DB) and Body (for script compatibility)
-    # Actually, script looks at Body first, then Title.
-    # Title has length limit. Paragraph works better for long quotes.
-    # But usually keeping Title is good for 'Name' column.
-    
-    # Truncate title if too long, put full text in body
-    title_text = content
-    if len(title_text) > 80:
-        title_text = content[:77] + "..."
-        
+    # The update script reads the Body first, then falls back to the Title,
+    # so long quotes keep their full text in the body.
     payload = {
         "parent": { "database_id": db_id },
         "properties": {
-            # Assuming default title property is "Name" or "이름" or "제목"
-            # We can try "Name" first, creating pages usually defaults to "Name" or "title" key if specific schema used.
-            # But safer to specify the property key if known.
-            # However, create endpoint allows omitting property key if we specify valid Title property object... 
-            # actually we need the key.
-            # Let's guess "이름", "Name", "제목", "Title" mapping
-            # Or simplified: Most simple databases have "Name" as key.
-            # If failed, we will catch error.
+            title_property: {
+                "title": [
+                    {
+                        "text": { "content": title_for(content) }
+                    }
+                ]
+            }
         },
         "children": [
             {
@@ -104,51 +154,67 @@ def create_page(token, db_id, content):
         ]
     }
     
-    payload["properties"]["이름"] = {
-        "title": [
-            {
-                "text": { "content": title_text }
-            }
-        ]
-    }
+    # notion_request applies the shared rate limiter and retries 429s
+    return notion_request(token, "pages", method="POST", payload=payload) is not None
 
-    data_json = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data_json, headers=headers)
+def import_quotes(token, db_id, quotes, workers=None):
+    # Idempotent, resumable bulk import:
+    # - quotes whose full text already exists in the DB are skipped
+    # - finished quotes are recorded in .cache/quote_import_<db>.json as they
+    #   complete, so a restarted import picks up where it stopped; the file is
+    #   removed once an import finishes without failures, so a quote deleted
+    #   in Notion later is imported again by the next run
+    progress_file = f"quote_import_{db_id.replace('-', '')}.json"
+    done = set(load_json(progress_file, {}).get("done", []))
+    
+    print("Checking existing quotes...")
+    cut_titles = {title_for(q) for q in quotes if title_for(q) != q}
+    keys = existing_quote_keys(token, db_id, cut_titles, workers)
+    title_property = title_property_name(token, db_id)
+    
+    pending = []
+    for quote in quotes:
+        key = quote_key(quote)
+        if key in keys or key in done: continue
+        keys.add(key) # also drops duplicates within the input
+        pending.append(quote)
+    
+    print(f"{len(quotes) - len(pending)} of {len(quotes)} quotes already present. Importing {len(pending)}...")
     
-    try:
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                print(f"Success.")
-                return True
-    except urllib.error.HTTPError as e:
-        err_body = e.read().decode('utf-8')
-        print(f"Failed to create page. Status: {e.code}, Reason: {e.reason}, Body: {err_body}")
-        
-    except Exception as e:
-        print(f"Error: {e}")
-        
-    return False
+    success_count = 0
+    for i, (quote, ok) in enumerate(run_concurrently(lambda q: create_page(token, db_id, q, title_property), pending, workers)):
+        if ok:
+            success_count += 1
+            done.add(quote_key(quote))
+        print(f"[{i+1}/{len(pending)}] {'Added' if ok else 'Failed'}: {quote[:20]}...")
+        if ok and success_count % 25 == 0:
+            save_json(progress_file, {"done": sorted(done)})
+    
+    if success_count == len(pending):
+        try:
+            os.remove(cache_path(progress_file))
+        except FileNotFoundError:
+            pass
+    else:
+        save_json(progress_file, {"done": sorted(done)})
+    return success_count
 
 def main():
     token = os.environ.get("NOTION_TOKEN")
     if not token:
         print("Error: NOTION_TOKEN environment variable not set.")
         sys.exit(1)
-        
-    db_id = "2f90d907-031e-80b6-a49b-d2b34e29359d"
     
-    print(f"Inserting {len(QUOTES)} quotes via Notion API...")
+    parser = argparse.ArgumentParser(description="Bulk import quotes into the Key Message DB.")
+    parser.add_argument("file", nargs="?", help="CSV / JSON / text file (default: built-in QUOTES)")
+    parser.add_argument("--db-id", default="2f90d907-031e-80b6-a49b-d2b34e29359d")
+    parser.add_argument("--workers", type=int, default=None, help="concurrent writers (default: NOTION_WORKERS)")
+    args = parser.parse_args()
     
-    success_count = 0
-    for i, quote in enumerate(QUOTES):
-        # Progress
-        print(f"[{i+1}/{len(QUOTES)}] Adding: {quote[:20]}...")
-        if create_page(token, db_id, quote):
-            success_count += 1
-        
-        # Rate limit friendly sleep
-        time.sleep(0.4) 
-        
+    quotes = load_quotes(args.file) if args.file else QUOTES
+    
+    print(f"Inserting {len(quotes)} quotes via Notion API...")
+    success_count = import_quotes(token, args.db_id, quotes, args.workers)
     print(f"Finished. Successfully added {success_count} entries.")
 
 if __name__ == "__main__":
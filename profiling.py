@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+from collections import Counter
+
+from cache_store import cache_path
+from tracing import JOB, RUN_ID
+
+# Profile any job entry point, off unless asked for:
+#   python generate_calendar_widget.py --profile            -> cProfile
+#   python generate_calendar_widget.py --profile=sample     -> sampling profiler
+#   NOTION_PROFILE=1 / NOTION_PROFILE=sample                -> same, for every job
+# cProfile writes .cache/profiles/<job>-<run>.pstats (snakeviz, pstats,
+# gprof2dot) and prints the top functions; the sampler writes collapsed
+# stacks (<job>-<run>.folded) for flamegraph.pl or speedscope. Run the jobs
+# against fake_notion_server.py to profile parse/render without the network.
+
+PROFILE_DIR = os.environ.get("NOTION_PROFILE_DIR") or cache_path("profiles")
+SAMPLE_INTERVAL = float(os.environ.get("NOTION_PROFILE_INTERVAL", 0.005))
+TOP_FUNCTIONS = 25
+
+def profile_mode(argv):
+    # Removes --profile[=mode] from argv; -> None, "cprofile" or "sample"
+    mode = os.environ.get("NOTION_PROFILE", "")
+    for arg in list(argv[1:]):
+        if arg == "--profile" or arg.startswith("--profile="):
+            argv.remove(arg)
+            mode = arg.partition("=")[2] or "cprofile"
+    mode = mode.lower()
+    if mode in ("", "0", "false", "off"):
+        return None
+    return "sample" if mode == "sample" else "cprofile"
+
+def output_path(ext):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    return os.path.join(PROFILE_DIR, f"{JOB}-{RUN_ID}.{ext}")
+
+class Sampler:
+    # Samples the calling thread's stack every `interval` seconds from a
+    # daemon thread; stacks are counted as "file:function;file:function;..."
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+                self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def run_cprofile(main):
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(main)
+    finally:
+        path = output_path("pstats")
+        profiler.dump_stats(path)
+        print(f"\nProfile written to {path}. Top {TOP_FUNCTIONS} by cumulative time:")
+        pstats.Stats(profiler, stream=sys.stdout).strip_dirs().sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+def run_sampled(main):
+    sampler = Sampler()
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        main()
+    finally:
+        sampler.stop()
+        path = output_path("folded")
+        sampler.write(path)
+        print(f"\n{sampler.samples} samples over {time.perf_counter() - start:.2f}s written to {path} "
+              f"(flamegraph.pl {os.path.basename(path)} > flame.svg)")
+
+def run_main(main):
+    # Entry point of every job: if __name__ == "__main__": run_main(main)
+    mode = profile_mode(sys.argv)
+    if mode is None:
+        main()
+    elif mode == "sample":
+        run_sampled(main)
+    else:
+        run_cprofile(main)
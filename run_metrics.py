@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import time
+import atexit
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from html import escape
+
+from cache_store import cache_path
+from tracing import JOB, RUN_ID
+
+# Per-run counters (HTTP requests, bytes, rows, writes, cache hits) kept by
+# every job. With NOTION_METRICS=1 each job appends its counters to
+# .cache/run_metrics.jsonl on exit; `python run_metrics.py collect` (last
+# workflow step) folds the jobs of each run into one compact entry of
+# .cache/perf_history.json and renders perf_dashboard.html next to the
+# widgets. The history travels with the actions cache; only the dashboard
+# is committed.
+
+enabled = os.environ.get("NOTION_METRICS", "").lower() not in ("", "0", "false", "off")
+
+JOB_METRICS_FILE = "run_metrics.jsonl"
+HISTORY_FILE = os.environ.get("PERF_HISTORY_FILE") or cache_path("perf_history.json")
+DASHBOARD_FILE = os.environ.get("PERF_DASHBOARD_FILE", "perf_dashboard.html")
+# ~5 weeks of 30-minute runs
+HISTORY_LIMIT = int(os.environ.get("PERF_HISTORY_LIMIT", 1680))
+
+_lock = threading.Lock()
+_started = time.time()
+counters = {}
+caches = {}
+
+def incr(name, n=1):
+    with _lock:
+        counters[name] = counters.get(name, 0) + n
+
+def cache(name, hit):
+    # One lookup of a local cache (schema, discovery, feed, ...)
+    with _lock:
+        entry = caches.setdefault(name, [0, 0])
+        entry[0 if hit else 1] += 1
+
+def record_http(bytes_in=0, bytes_out=0, retry=False, error=False):
+    with _lock:
+        counters["requests"] = counters.get("requests", 0) + 1
+        counters["bytes_in"] = counters.get("bytes_in", 0) + bytes_in
+        counters["bytes_out"] = counters.get("bytes_out", 0) + bytes_out
+        if retry: counters["retries"] = counters.get("retries", 0) + 1
+        if error: counters["errors"] = counters.get("errors", 0) + 1
+
+def job_record():
+    with _lock:
+        return {
+            "run": RUN_ID,
+            "job": JOB,
+            "started_at": int(_started),
+            "duration_s": round(time.time() - _started, 3),
+            "counters": dict(counters),
+            "caches": {name: list(v) for name, v in caches.items()}
+        }
+
+def flush():
+    try:
+        path = cache_path(JOB_METRICS_FILE)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(job_record(), separators=(",", ":")) + "\n")
+    except Exception as e:
+        print(f"Could not write run metrics: {e}")
+
+# The collector itself is not a job
+if enabled and JOB != "run_metrics":
+    atexit.register(flush)
+
+# --- History (run_metrics.py collect) ---
+
+def summarize_run(records):
+    # Job records of one run -> one compact history entry
+    totals = {}
+    hits = misses = 0
+    jobs = {}
+    for r in records:
+        for name, value in r["counters"].items():
+            totals[name] = totals.get(name, 0) + value
+        for h, m in r["caches"].values():
+            hits += h
+            misses += m
+        job = jobs.setdefault(r["job"], [0, 0])
+        job[0] = round(job[0] + r["duration_s"], 3)
+        job[1] += r["counters"].get("requests", 0)
+    start = min(r["started_at"] for r in records)
+    end = max(r["started_at"] + r["duration_s"] for r in records)
+    return {
+        "t": start,
+        "run": records[0]["run"],
+        "d": round(end - start, 2),
+        "req": totals.get("requests", 0),
+        "kb": round((totals.get("bytes_in", 0) + totals.get("bytes_out", 0)) / 1024, 1),
+        "retry": totals.get("retries", 0),
+        "err": totals.get("errors", 0),
+        "rows": totals.get("rows", 0),
+        "wa": totals.get("writes_applied", 0),
+        "ws": totals.get("writes_skipped", 0),
+        "hit": hits,
+        "miss": misses,
+        "jobs": jobs
+    }
+
+def load_history(path=HISTORY_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+def save_history(history, path=HISTORY_FILE):
+    # One run per line keeps the file easy to inspect and diff
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[\n" + ",\n".join(json.dumps(e, separators=(",", ":")) for e in history) + "\n]\n")
+
+def collect(history_path=HISTORY_FILE, limit=HISTORY_LIMIT):
+    path = cache_path(JOB_METRICS_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        records = []
+    if not records:
+        print("No job metrics to collect.")
+        return load_history(history_path)
+
+    runs = {}
+    for r in records:
+        runs.setdefault(r["run"], []).append(r)
+
+    history = load_history(history_path)
+    known = {e["run"]: i for i, e in enumerate(history)}
+    for run_id, run_records in runs.items():
+        entry = summarize_run(run_records)
+        if run_id in known:
+            history[known[run_id]] = entry
+        else:
+            history.append(entry)
+    history.sort(key=lambda e: e["t"])
+    history = history[-limit:]
+
+    save_history(history, history_path)
+    os.remove(path)
+    print(f"Recorded {len(runs)} run(s); {len(history)} runs in {history_path}.")
+    return history
+
+# --- Dashboard ---
+
+CHARTS = [
+    ("Run duration (s)", lambda e: e["d"], "#D44C47"),
+    ("Notion/RSS requests", lambda e: e["req"], "#337EA9"),
+    ("KB transferred", lambda e: e["kb"], "#9065B0"),
+    ("Rows fetched", lambda e: e["rows"], "#448361"),
+    ("Cache hit ratio (%)", lambda e: round(100 * e["hit"] / (e["hit"] + e["miss"]), 1) if e["hit"] + e["miss"] else 0, "#CB912F"),
+    ("Writes applied", lambda e: e["wa"], "#D9730D"),
+    ("Writes skipped", lambda e: e["ws"], "#9B9A97")
+]
+
+def svg_line_chart(values, color, width=320, height=90):
+    if not values:
+        return f'<svg width="{width}" height="{height}"></svg>'
+    top = max(values) or 1
+    step = width / max(1, len(values) - 1)
+    points = " ".join(f"{i * step:.1f},{height - 4 - (v / top) * (height - 8):.1f}" for i, v in enumerate(values))
+    return (f'<svg viewBox="0 0 {width} {height}" width="100%" height="{height}" preserveAspectRatio="none">'
+            f'<line x1="0" y1="{height - 4}" x2="{width}" y2="{height - 4}" stroke="#E3E2E0"/>'
+            f'<polyline fill="none" stroke="{color}" stroke-width="1.5" points="{points}"/></svg>')
+
+def kst(ts):
+    return (datetime.fromtimestamp(ts, timezone.utc) + timedelta(hours=9)).strftime("%m/%d %H:%M")
+
+def render_dashboard(history, path=DASHBOARD_FILE):
+    cards = []
+    for title, metric, color in CHARTS:
+        values = [metric(e) for e in history]
+        latest = values[-1] if values else 0
+        peak = max(values) if values else 0
+        cards.append(
+            f'<div class="card"><div class="title">{escape(title)}</div>'
+            f'<div class="value">{latest:,}<span> max {peak:,}</span></div>'
+            f'{svg_line_chart(values, color)}</div>'
+        )
+
+    job_names = sorted({job for e in history for job in e.get("jobs", {})})
+    rows = []
+    for e in reversed(history[-12:]):
+        cells = "".join(f"<td>{e['jobs'][j][0]:.1f}</td>" if j in e.get("jobs", {}) else "<td>-</td>" for j in job_names)
+        rows.append(f"<tr><td>{kst(e['t'])}</td><td>{e['d']:.1f}</td><td>{e['req']}</td>{cells}</tr>")
+    header = "".join(f"<th>{escape(j.replace('generate_', '').replace('update_', ''))}</th>" for j in job_names)
+    span = f"{kst(history[0]['t'])} - {kst(history[-1]['t'])} KST, {len(history)} runs" if history else "No runs recorded yet"
+
+    html = f"""<!DOCTYPE html>
+<html lang="ko">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>Widget Performance</title>
+<style>
+body {{ font-family: "Courier New", Courier, monospace; color: #37352f; margin: 12px 20px; }}
+h2 {{ font-size: 0.9em; margin: 0 0 2px 0; }}
+.sub {{ font-size: 0.75em; color: #9B9A97; margin-bottom: 10px; }}
+.grid {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(240px, 1fr)); gap: 10px; }}
+.card {{ border: 1px solid #E3E2E0; border-radius: 4px; padding: 8px; }}
+.title {{ font-size: 0.75em; color: #787774; }}
+.value {{ font-size: 1.1em; font-weight: bold; }}
+.value span {{ font-size: 0.6em; font-weight: normal; color: #9B9A97; }}
+table {{ border-collapse: collapse; font-size: 0.7em; margin-top: 12px; }}
+th, td {{ border-bottom: 1px solid #E3E2E0; padding: 2px 6px; text-align: right; }}
+</style>
+</head>
+<body>
+<h2>Widget Performance</h2>
+<div class="sub">{escape(span)}</div>
+<div class="grid">{"".join(cards)}</div>
+<table><tr><th>run (KST)</th><th>total s</th><th>requests</th>{header}</tr>{"".join(rows)}</table>
+</body>
+</html>
+"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+    print(f"{path} created.")
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Fold job metrics into the performance history and render the dashboard.")
+    parser.add_argument("command", choices=["collect", "render"], help="collect: record this run's metrics, then render")
+    args = parser.parse_args()
+
+    history = collect() if args.command == "collect" else load_history()
+    render_dashboard(history)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import os
+import time
+from itertools import chain
+
+from cache_store import load_json, save_json
+import run_metrics
+from notion_api import notion_request, resolve_projection, iter_database_pages
+
+# Schemas rarely change; re-check at most every 6 hours by default
+SCHEMA_TTL = int(os.environ.get("NOTION_SCHEMA_TTL", 6 * 3600))
+SCHEMA_CACHE_FILE = "schemas.json"
+
+class DatabaseSchema:
+    def __init__(self, db_id, title, properties, last_edited_time=None, fetched_at=0):
+        self.db_id = db_id
+        self.title = title
+        self.properties = properties # {name: {"id": ..., "type": ...}}
+        self.last_edited_time = last_edited_time
+        self.fetched_at = fetched_at
+
+    @classmethod
+    def from_api(cls, data):
+        properties = {
+            name: {"id": prop.get("id"), "type": prop.get("type")}
+            for name, prop in data.get("properties", {}).items()
+        }
+        title = "".join([t.get("plain_text", "") for t in data.get("title", [])])
+        return cls(data.get("id"), title, properties, data.get("last_edited_time"), time.time())
+
+    @classmethod
+    def from_cache(cls, entry):
+        return cls(entry["id"], entry.get("title", ""), entry.get("properties", {}),
+                   entry.get("last_edited_time"), entry.get("fetched_at", 0))
+
+    def to_cache(self):
+        return {
+            "id": self.db_id,
+            "title": self.title,
+            "properties": self.properties,
+            "last_edited_time": self.last_edited_time,
+            "fetched_at": self.fetched_at
+        }
+
+    def names(self, candidates):
+        # Candidates (names or property ids) that exist in this database, as property names
+        by_id = {p.get("id"): name for name, p in self.properties.items()}
+        found = []
+        for key in candidates:
+            name = key if key in self.properties else by_id.get(key)
+            if name and name not in found:
+                found.append(name)
+        return found
+
+    def bind(self, fields):
+        # {logical role: [candidate names]} -> {logical role: [names present in this database]}
+        # Roles with no match keep their full candidate list (e.g. a column added after caching).
+        return {role: self.names(candidates) or list(candidates) for role, candidates in fields.items()}
+
+    def projection(self, fields):
+        # Property ids for filter_properties
+        return resolve_projection(self.properties, fields) or None
+
+    def outdated_for(self, page, fields):
+        # True if a role bound to columns of this schema finds none of them on
+        # the page (every property is present on a page, even when empty), e.g.
+        # a column renamed in Notion while the cached schema is still fresh.
+        props = page.get("properties", {})
+        return any(names and not any(name in props for name in names)
+                   for names in (self.names(candidates) for candidates in fields.values()))
+
+def get_schema(token, db_id, max_age=None):
+    # Returns a DatabaseSchema, served from the local cache while it is fresh.
+    # Past the TTL (or after invalidate_schema) the schema is re-fetched.
+    if max_age is None: max_age = SCHEMA_TTL
+
+    cache = load_json(SCHEMA_CACHE_FILE, {})
+    key = db_id.replace("-", "")
+    cached = DatabaseSchema.from_cache(cache[key]) if key in cache else None
+
+    if cached and time.time() - cached.fetched_at < max_age:
+        run_metrics.cache("schema", hit=True)
+        return cached
+
+    data = notion_request(token, f"databases/{db_id}")
+    if not data:
+        if cached:
+            print(f"Using stale schema for {db_id}.")
+        return cached
+
+    schema = DatabaseSchema.from_api(data)
+    run_metrics.cache("schema", hit=False)
+    cache[key] = schema.to_cache()
+    save_json(SCHEMA_CACHE_FILE, cache)
+    return schema
+
+def invalidate_schema(db_id):
+    cache = load_json(SCHEMA_CACHE_FILE, {})
+    if cache.pop(db_id.replace("-", ""), None) is not None:
+        save_json(SCHEMA_CACHE_FILE, cache)
+
+def query_with_schema(token, db_id, fields, payload=None, on_error=None):
+    # -> (schema, columns, pages): fields bound to the cached schema, and the
+    # projected pages streamed as in iter_database_pages. If the first page
+    # shows the cached schema is out of date, it is dropped and re-fetched and
+    # the query starts over, so rows are never parsed against stale names.
+    for attempt in range(2):
+        schema = get_schema(token, db_id)
+        columns = schema.bind(fields) if schema else {role: list(candidates) for role, candidates in fields.items()}
+        pages = iter_database_pages(token, db_id, payload, filter_properties=schema.projection(fields) if schema else None,
+                                    on_error=on_error)
+        first = next(pages, None)
+        if first is None:
+            return schema, columns, iter(())
+        if attempt or not schema or not schema.outdated_for(first, fields):
+            return schema, columns, chain([first], pages)
+        pages.close()
+        print(f"Cached schema of {db_id} is out of date. Re-fetching...")
+        invalidate_schema(db_id)
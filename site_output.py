@@ -0,0 +1,153 @@
+import os
+import re
+import sys
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Output stage for the pages Notion embeds (index.html, asset_chart.html,
+# market_widget.html). Each page is minified conservatively - comments,
+# indentation and blank lines go, nothing that could change rendering or
+# script behaviour - and written with precompressed .gz (and .br when the
+# brotli package is installed) siblings for hosts that serve them:
+#
+#   write_page("index.html", html)
+#   python site_output.py index.html asset_chart.html    # size report
+#
+# SITE_MINIFY=0 writes the pages as generated (for debugging).
+
+MINIFY = os.environ.get("SITE_MINIFY", "1").lower() not in ("0", "false", "off")
+
+_RAW_BLOCK = re.compile(r"(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)", re.S | re.I)
+_HTML_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.S)
+_CSS_SKIP = re.compile(r"\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|/\*.*?\*/", re.S)
+_JS_TYPE = re.compile(r"\btype\s*=\s*[\"']?([^\"'\s>]+)", re.I)
+
+def minify_css(css):
+    # Comments dropped, whitespace collapsed; strings are kept verbatim.
+    # Spaces before ':' stay ("li :first-child" is a descendant selector).
+    strings = []
+    def stash(m):
+        if m.group(0).startswith("/*"): return " "
+        strings.append(m.group(0))
+        return f"\x00{len(strings) - 1}\x00"
+    text = _CSS_SKIP.sub(stash, css)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,])\s*", r"\1", text)
+    text = re.sub(r":\s+", ":", text).replace(";}", "}").strip()
+    return re.sub(r"\x00(\d+)\x00", lambda m: strings[int(m.group(1))], text)
+
+def _strip_line_comment(line, quote):
+    # -> (line without a trailing // comment, open quote at the end of the line).
+    # Only template literals (`) can continue on the next line.
+    i = 0
+    while i < len(line):
+        c = line[i]
+        if quote:
+            if c == "\\": i += 1
+            elif c == quote: quote = None
+        elif c in "'\"`":
+            quote = c
+        elif line.startswith("//", i) and (i == 0 or line[i - 1] in " \t;{})"):
+            return line[:i].rstrip(), None
+        i += 1
+    return line, quote if quote == "`" else None
+
+def minify_js(js):
+    # Line based: indentation, blank lines and // comments are removed, but
+    # every statement keeps its own line, so automatic semicolon insertion
+    # behaves exactly as before. Lines inside template literals are untouched.
+    lines = []
+    quote = None
+    for line in js.split("\n"):
+        if quote:
+            line, quote = _strip_line_comment(line, quote)
+            lines.append(line)
+            continue
+        line, quote = _strip_line_comment(line.strip(), None)
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+def _minify_text(html):
+    html = _HTML_COMMENT.sub("", html)
+    # A whitespace run is still one whitespace character, so inline layout is unchanged
+    return re.sub(r"\s*\n\s*", "\n", html)
+
+def _minify_block(m):
+    open_tag, tag, body, close_tag = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+    if tag == "style":
+        body = minify_css(body)
+    elif tag == "script":
+        script_type = _JS_TYPE.search(open_tag)
+        if not script_type or "javascript" in script_type.group(1).lower() or script_type.group(1).lower() == "module":
+            body = minify_js(body)
+    return open_tag + body + close_tag
+
+def minify_html(html):
+    # <pre>/<textarea> content is kept as is; <style> and <script> get their own minifiers
+    parts = []
+    pos = 0
+    for m in _RAW_BLOCK.finditer(html):
+        parts.append(_minify_text(html[pos:m.start()]))
+        parts.append(_minify_block(m))
+        pos = m.end()
+    parts.append(_minify_text(html[pos:]))
+    return "".join(parts).strip() + "\n"
+
+def precompress(path, data):
+    # Writes path.gz (and path.br) next to the page. gzip gets mtime=0 so an
+    # unchanged page produces a byte-identical file and no commit.
+    sizes = {}
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    with open(path + ".gz", "wb") as f:
+        f.write(gz)
+    sizes["gzip"] = len(gz)
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        with open(path + ".br", "wb") as f:
+            f.write(br)
+        sizes["br"] = len(br)
+    return sizes
+
+def format_sizes(path, sizes):
+    line = f"{path}: {sizes['raw'] / 1024:.1f} KB"
+    if sizes["minified"] != sizes["raw"]:
+        line += f" -> {sizes['minified'] / 1024:.1f} KB minified"
+    line += f", {sizes['gzip'] / 1024:.1f} KB gzip"
+    if "br" in sizes:
+        line += f", {sizes['br'] / 1024:.1f} KB br"
+    return line
+
+def write_page(path, html, minify=None):
+    # Writes the (minified) page plus its compressed siblings and prints one size line
+    if minify is None: minify = MINIFY
+    raw = html.encode("utf-8")
+    data = minify_html(html).encode("utf-8") if minify else raw
+    with open(path, "wb") as f:
+        f.write(data)
+    sizes = {"raw": len(raw), "minified": len(data)}
+    sizes.update(precompress(path, data))
+    print(format_sizes(path, sizes))
+    return sizes
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    paths = sys.argv[1:] or ["index.html", "asset_chart.html", "market_widget.html"]
+    total = {"raw": 0, "minified": 0, "gzip": 0}
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"{path}: not found")
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            sizes = write_page(path, f.read())
+        for name in total:
+            total[name] += sizes[name]
+    if total["raw"]:
+        print(f"Total: {total['raw'] / 1024:.1f} KB -> {total['minified'] / 1024:.1f} KB minified, {total['gzip'] / 1024:.1f} KB gzip")
+
+if __name__ == "__main__":
+    main()
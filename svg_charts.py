@@ -0,0 +1,63 @@
+import math
+from html import escape
+
+from number_format import format_amount
+
+# Charts rendered to inline SVG in Python, so a widget is complete at first
+# byte with no script to load or run. The pie mirrors the Chart.js setup of
+# generate_asset_chart: clockwise from 12 o'clock, white 1px slice borders,
+# name + rounded percentage in the middle of every slice of 3% or more, and
+# the amount in the hover tooltip (<title>).
+
+FONT = "'Courier New', Courier, monospace"
+MIN_LABEL_PERCENT = 3
+
+def _point(cx, cy, r, angle):
+    return cx + r * math.cos(angle), cy + r * math.sin(angle)
+
+def _slice_path(cx, cy, r, start, end):
+    x1, y1 = _point(cx, cy, r, start)
+    x2, y2 = _point(cx, cy, r, end)
+    large_arc = 1 if end - start > math.pi else 0
+    return f"M{cx:.2f},{cy:.2f}L{x1:.2f},{y1:.2f}A{r:.2f},{r:.2f} 0 {large_arc} 1 {x2:.2f},{y2:.2f}Z"
+
+def js_round(x):
+    # Math.round(): halves round up (round() would round them to even)
+    return math.floor(x + 0.5)
+
+def pie_chart_svg(items, colors, size=400, currency="₩"):
+    # items: [(label, value)]; slice i gets colors[i % len(colors)].
+    # Percentages use the sum of all values, like the page's JS. Items with
+    # a non-positive value get no slice here, while Chart.js would draw them
+    # by absolute value; slices split the circle among the positive values.
+    # A missing value (None) counts as 0.
+    items = [(label, value or 0) for label, value in items]
+    total = sum(value for _, value in items)
+    slice_total = sum(value for _, value in items if value > 0)
+    cx = cy = size / 2
+    r = size / 2 - 1
+    slices = []
+    labels = []
+    angle = -math.pi / 2
+    for i, (label, value) in enumerate(items):
+        if value <= 0 or not slice_total: continue
+        share = value / slice_total
+        percentage = js_round(value / total * 100) if total else 0
+        color = colors[i % len(colors)]
+        title = f"<title>{escape(label)}: {currency}{format_amount(value)} ({percentage}%)</title>"
+        end = angle + share * 2 * math.pi
+        if share >= 1:
+            tag, geometry = "circle", f'cx="{cx:.2f}" cy="{cy:.2f}" r="{r:.2f}"'
+        else:
+            tag, geometry = "path", f'd="{_slice_path(cx, cy, r, angle, end)}"'
+        slices.append(f'<{tag} {geometry} fill="{color}" stroke="#ffffff" stroke-width="1">{title}</{tag}>')
+        if percentage >= MIN_LABEL_PERCENT:
+            # Slice centre: half the radius along the middle angle (datalabels' anchor 'center')
+            lx, ly = _point(cx, cy, r / 2 if share < 1 else 0, (angle + end) / 2)
+            labels.append(f'<text x="{lx:.2f}" y="{ly - 4:.2f}" font-size="9">{escape(label)}</text>'
+                          f'<text x="{lx:.2f}" y="{ly + 18:.2f}" font-size="20" font-weight="bold">{percentage}%</text>')
+        angle = end
+    return (f'<svg viewBox="0 0 {size} {size}" width="100%" height="100%" role="img" aria-label="Asset allocation">'
+            f'{"".join(slices)}'
+            f'<g fill="#37352f" font-family="{escape(FONT)}" text-anchor="middle" pointer-events="none">{"".join(labels)}</g>'
+            f'</svg>')
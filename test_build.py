@@ -49,8 +49,489 @@ def test_calendar_generation():
 
     return True
 
+def test_trade_table():
+    print("3. Columnar Check: TradeTable views and aggregation...")
+    from trade_table import TradeTable
+    
+    table = TradeTable()
+    table.append("a", "2026-01-01", "Test Trade", "💰", 1000, 0)
+    table.append("b", "2026-01-01", "Test Trade", "💰", 0, 250.5)
+    table.append("c", "2026-02-03T09:00:00.000+09:00", "Other", "📈", 300, 0)
+    
+    assert len(table) == 3
+    assert table.strings == ["Test Trade", "💰", "Other", "📈"], "titles/emojis should be interned"
+    
+    calendar_data = table.to_calendar_data()
+    assert [e["title"] for e in calendar_data["2026-01-01"]] == ["Test Trade", "Test Trade"]
+    assert calendar_data["2026-02-03"][0]["display"] == "📈 Other (+300)"
+    
+    assert table.totals_by_month() == {"2026-01": (1000.0, 250.5, 2), "2026-02": (300.0, 0.0, 1)}
+    
+    payload = table.to_payload()
+    assert payload["s"] == ["Test Trade", "Other"], "payload should only carry titles"
+    assert payload["d"][0] == 20454 # 2026-01-01 in days since epoch
+    assert payload["p"] == [1000, 0, 300] and payload["l"] == [0, 250.5, 0]
+    
+    print("✅ TradeTable Check Passed")
+    return True
+
+def test_rss_streaming():
+    print("4. News Check: streaming RSS parse with early termination...")
+    import io
+    from news_feed import iter_rss_items
+    from update_daily_news import select_candidates
+    
+    titles = ["[광고] 코스피 특가", "오늘의 날씨 - 언론사", "코스피 상승 - 언론사", "환율 급등", "나스닥 마감", "금리 동결"]
+    items_xml = "".join(f"<item><title>{t}</title><link>https://example.com/{i}</link></item>" for i, t in enumerate(titles))
+    feed = io.BytesIO(f"<?xml version='1.0' encoding='UTF-8'?><rss><channel>{items_xml}</channel></rss>".encode("utf-8"))
+    
+    parsed = iter_rss_items(feed, chunk_size=64)
+    selected = select_candidates(parsed, limit=2)
+    
+    assert [(i["title"], i["priority"]) for i in selected] == [("코스피 상승", 1), ("환율 급등", 1), ("오늘의 날씨", 2)]
+    assert next(parsed)["title"] == "나스닥 마감", "parser should resume where selection stopped"
+    
+    print("✅ RSS Streaming Check Passed")
+    return True
+
+def test_keyword_matcher():
+    print("5. Scoring Check: compiled keyword matcher...")
+    from keyword_matcher import KeywordMatcher
+    
+    matcher = KeywordMatcher({"SK하이닉스": 3, "하이닉스": 1, "금리": 1, "금리인상": 2})
+    assert matcher.matches("SK하이닉스 급등, 금리인상 우려") == {"SK하이닉스", "하이닉스", "금리", "금리인상"}
+    assert matcher.score("SK하이닉스 급등, 금리인상 우려") == 7
+    assert matcher.score("오늘의 날씨") == 0 and not matcher.search("오늘의 날씨")
+    assert KeywordMatcher(["Fed"], ignore_case=True).matches("FED 회의") == {"Fed"}
+    
+    from update_daily_news import keyword_weights
+    assert keyword_weights('{"금리": 3, "환율": "high"}')["금리"] == 3 and keyword_weights('{"환율": "high"}')["환율"] == 1
+    assert keyword_weights("{not json") == keyword_weights("[3]") == keyword_weights(None) == {k: 1 for k in keyword_weights(None)}
+    
+    print("✅ Keyword Matcher Check Passed")
+    return True
+
+def test_asset_diff():
+    print("6. Asset Loader Check: export mapping and diff...")
+    from create_asset_db import map_row, diff_assets
+    
+    assert map_row({"종목명": "삼성전자", "평가금액": "₩5,100,000", "자산구분": "Stock"}) == ("삼성전자", 5100000, "Stock")
+    
+    holdings = {"삼성전자": {"amount": 5100000, "type": "Stock"}, "BTC": {"amount": 10, "type": "Crypto"}, "신규": {"amount": 1, "type": None}}
+    existing = {
+        "삼성전자": [{"id": "p1", "amount": 5000000, "type": "Stock"}],
+        "BTC": [{"id": "p2", "amount": 10, "type": "Crypto"}, {"id": "p3", "amount": 10, "type": "Crypto"}],
+        "Sold": [{"id": "p4", "amount": 1, "type": "Cash"}]
+    }
+    ops = diff_assets(holdings, existing)
+    assert sorted((op[0], op[1]) for op in ops) == [("archive", "BTC"), ("archive", "Sold"), ("create", "신규"), ("update", "삼성전자")]
+    assert [op[0] for op in diff_assets(holdings, existing, archive_missing=False)].count("archive") == 1
+    
+    # Nothing is written for an empty export, an incomplete read, or a plan archiving most rows (without --force)
+    import create_asset_db
+    table = {name: [{"id": name, "amount": 1, "type": "Cash"}] for name in "ABCD"}
+    cases = [({}, table, False, False), ({"A": {"amount": 1, "type": "Cash"}}, None, False, False),
+             ({"A": {"amount": 1, "type": "Cash"}}, table, False, False), ({"A": {"amount": 1, "type": "Cash"}}, table, True, True)]
+    for loaded, rows, force, writes in cases:
+        with patch.object(create_asset_db, "load_holdings", return_value=loaded), \
+                patch.object(create_asset_db, "fetch_existing_assets", return_value=(rows, {})), \
+                patch.object(create_asset_db, "run_concurrently", return_value=[]) as run:
+            failed = create_asset_db.load_assets("fake_token", "db", "export.csv", force=force)
+            assert run.called == writes and failed == (0 if writes else 1), (loaded, force)
+    
+    print("✅ Asset Loader Check Passed")
+    return True
+
+def test_tracing():
+    print("7. Tracing Check: spans and summary...")
+    import tracing
+    
+    assert tracing.endpoint_name("databases/2f90d907-031e-805c-be36-ebd342683bfa/query?filter_properties=title") == "databases/{id}/query"
+    assert tracing.span("render") is tracing.NOOP or tracing.enabled, "spans should be no-ops when tracing is off"
+    
+    enabled, records = tracing.enabled, list(tracing._records)
+    tracing.enabled = True
+    try:
+        with tracing.span("fetch"):
+            with tracing.http_span("GET", "blocks/2f90d907031e8053a33af3644a5e4826/children") as span:
+                span.set(status=200, bytes_in=100, retries=1)
+        spans = {e["name"]: e for e in tracing.summary()["spans"]}
+        assert spans["GET blocks/{id}/children"]["bytes_in"] == 100 and spans["GET blocks/{id}/children"]["retries"] == 1
+        assert [(r["name"], r["parent"]) for r in tracing._records[-2:]] == [("GET blocks/{id}/children", "fetch"), ("fetch", None)]
+    finally:
+        tracing.enabled = enabled
+        tracing._records[:] = records
+    
+    print("✅ Tracing Check Passed")
+    return True
+
+def test_run_metrics():
+    print("8. Run Metrics Check: history entry and dashboard...")
+    import tempfile
+    import run_metrics
+    
+    records = [
+        {"run": "42", "job": "generate_calendar_widget", "started_at": 1000, "duration_s": 3.0,
+         "counters": {"requests": 4, "bytes_in": 2048, "rows": 250}, "caches": {"schema": [1, 0]}},
+        {"run": "42", "job": "update_key_message", "started_at": 1004, "duration_s": 1.5,
+         "counters": {"requests": 2, "bytes_out": 1024, "writes_skipped": 1}, "caches": {"key_message_index": [0, 1]}}
+    ]
+    entry = run_metrics.summarize_run(records)
+    assert (entry["req"], entry["kb"], entry["rows"], entry["ws"]) == (6, 3.0, 250, 1)
+    assert entry["d"] == 5.5 and (entry["hit"], entry["miss"]) == (1, 1)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "perf_dashboard.html")
+        run_metrics.render_dashboard([entry], path)
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        assert "<svg" in html and "calendar_widget" in html
+    
+    print("✅ Run Metrics Check Passed")
+    return True
+
+def test_profiling():
+    print("9. Profiling Check: --profile flag and sampler...")
+    import time
+    import profiling
+    
+    argv = ["generate_calendar_widget.py", "--profile=sample"]
+    assert profiling.profile_mode(argv) == "sample" and argv == ["generate_calendar_widget.py"]
+    argv = ["update_daily_news.py", "--profile"]
+    assert profiling.profile_mode(argv) == "cprofile" and argv == ["update_daily_news.py"]
+    with patch.dict(os.environ, {"NOTION_PROFILE": ""}):
+        assert profiling.profile_mode(["update_date_header.py"]) is None
+    
+    sampler = profiling.Sampler(interval=0.001)
+    sampler.start()
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    sampler.stop()
+    assert sampler.samples > 0 and all("test_profiling" in stack for stack in sampler.stacks)
+    
+    print("✅ Profiling Check Passed")
+    return True
+
+def test_gzip_body():
+    print("10. Gzip Check: streamed inflate and JSON from bytes...")
+    import io
+    import gzip
+    import notion_api
+    
+    payload = {"results": [{"id": str(i), "title": "매매일지 " * 20} for i in range(500)], "has_more": False}
+    raw = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    response = MagicMock()
+    response.headers = {"Content-Encoding": "gzip"}
+    response.read = io.BytesIO(gzip.compress(raw)).read
+    
+    body, wire_bytes = notion_api.read_body(response)
+    assert body == raw and wire_bytes < len(raw) // 10, f"{wire_bytes} wire bytes for {len(raw)}"
+    assert notion_api.json_loads(body) == payload
+    
+    reader = notion_api.GzipReader(io.BytesIO(gzip.compress(raw)), chunk_size=1000)
+    chunks = list(iter(lambda: reader.read(4096), b""))
+    assert b"".join(chunks) == raw and max(len(c) for c in chunks) <= 4096
+    
+    # Python 3.9's HTTPResponse.read(-1) raises "negative count"; plain bodies must be read with read()
+    def strict_read(*args):
+        if args and args[0] < 0: raise ValueError("negative count")
+        return raw
+    plain = MagicMock()
+    plain.headers = {}
+    plain.read.side_effect = strict_read
+    assert notion_api.read_body(plain) == (raw, len(raw))
+    
+    print("✅ Gzip Check Passed")
+    return True
+
+def test_site_output():
+    print("11. Site Output Check: conservative minify and precompressed pages...")
+    import gzip
+    import tempfile
+    from site_output import minify_css, minify_js, minify_html, write_page
+    
+    assert minify_css('a , b { color: red; /* x */ content: "a  /* b */"; }\nli :first-child {}') == 'a,b{color:red;content:"a  /* b */"}li :first-child{}'
+    js = "    const url = 'https://example.com'; // home\n\n    const t = `a\n    b`;\n    // note\n    go(url)"
+    assert minify_js(js) == "const url = 'https://example.com';\nconst t = `a\n    b`;\ngo(url)"
+    assert minify_html("  <div>\n    <!-- c -->\n    <span>a</span> <span>b</span>\n  </div>\n  <pre>  x\n  y</pre>") == "<div>\n<span>a</span> <span>b</span>\n</div>\n<pre>  x\n  y</pre>\n"
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.html")
+        sizes = write_page(path, "<html>\n    <body>\n        <p>hi</p>\n    </body>\n</html>")
+        with open(path, encoding="utf-8") as f:
+            page = f.read()
+        with open(path + ".gz", "rb") as f:
+            compressed = f.read()
+        assert gzip.decompress(compressed).decode("utf-8") == page and sizes["minified"] < sizes["raw"]
+        write_page(path, "<html>\n    <body>\n        <p>hi</p>\n    </body>\n</html>")
+        with open(path + ".gz", "rb") as f:
+            assert f.read() == compressed, ".gz should be byte-identical for an unchanged page"
+    
+    print("✅ Site Output Check Passed")
+    return True
+
+def test_svg_pie():
+    print("12. SVG Pie Check: slices, labels and the no-JS page...")
+    import re
+    from number_format import format_amount
+    from svg_charts import pie_chart_svg
+    from generate_asset_chart import generate_html
+    
+    svg = pie_chart_svg([("주식", 750), ("현금 <&>", 240), ("코인", 10), ("빚", -5)], ["#111111", "#222222", "#333333"])
+    paths = re.findall(r'<path d="([^"]+)" fill="(#\w+)"', svg)
+    assert [color for _, color in paths] == ["#111111", "#222222", "#333333"], "non-positive values take no slice"
+    assert " 0 1 1 " in paths[0][0] and " 0 0 1 " in paths[1][0], "only the 75% slice needs the large arc"
+    assert "현금 &lt;&amp;&gt;: ₩240 (24%)" in svg and ">75%<" in svg and ">1%<" not in svg, "labels below 3% are hidden"
+    assert ">13%<" in pie_chart_svg([("a", 125), ("b", 875)], ["#111111"]), "12.5% rounds up like Math.round"
+    assert pie_chart_svg([("a", 100), ("empty", None)], ["#111111"]).count("<circle") == 1, "an empty amount counts as 0"
+    assert format_amount(1234567) == "1,234,567" and format_amount(1200.5) == "1,200.5"
+    
+    html = generate_html([{"name": "주식", "amount": 1500000, "type": "Stock"}], "svg")
+    assert "<script" not in html and "<svg" in html and "TOTAL: ₩1,500,000" in html
+    
+    # An empty Amount cell (number: null) is read as 0 and still renders
+    import generate_asset_chart
+    page = {"properties": {"항목": {"title": [{"plain_text": "빈 계좌"}]}, "금액": {"type": "number", "number": None}}}
+    columns = {"item": ["항목"], "amount": ["금액"], "type": ["유형"]}
+    with patch.object(generate_asset_chart, "query_with_schema", return_value=(None, columns, iter([page]))):
+        assets = generate_asset_chart.fetch_assets("fake_token", "db")
+    assert assets == [{"name": "빈 계좌", "amount": 0, "type": "Other"}]
+    assert "TOTAL: ₩1,500,000" in generate_html(assets + [{"name": "주식", "amount": 1500000, "type": "Stock"}], "svg")
+    
+    print("✅ SVG Pie Check Passed")
+    return True
+
+def test_prerendered_month():
+    print("13. Calendar Pre-render Check: current month grid in the HTML...")
+    from datetime import date
+    from generate_calendar_widget import generate_interactive_html
+    from trade_table import TradeTable
+    
+    table = TradeTable()
+    table.append("a", "2026-10-02", "A&B <x>", "💰", 1500, 0)
+    table.append("b", "2026-10-19", "삼성전자", "💰", 0, 200.5)
+    table.append("c", "2026-03-05", "NVDA", "💰", 1000, 0)
+    html = generate_interactive_html(table, today=date(2026, 10, 19))
+    
+    assert '<h1 id="monthLabel">2026 Oct</h1>' in html and 'data-rendered="2026-9-19"' in html
+    # 2026-10-01 is a Thursday: 4 empty cells after the headers
+    assert html.count('<div class="day-cell empty"></div>') == 4 and '<div class="day-header">Sat</div>' in html
+    assert '<div class="entry-item profit">A&amp;B &lt;x&gt; (+1,500)</div>' in html
+    assert '<div class="day-cell today has-entry"><span class="day-number">19</span>' in html
+    assert '<div class="summary-value profit" id="monthReturn">+1,299.5</div>' in html
+    assert '<div class="summary-value profit" id="yearReturn">+2,299.5</div>' in html
+    
+    print("✅ Calendar Pre-render Check Passed")
+    return True
+
+def test_rotation_deck():
+    print("14. Key Message Check: weighted rotation deck...")
+    from collections import Counter
+    from key_message_rotation import RotationDeck, KEY_MESSAGE_MAX_WEIGHT
+    
+    # One round covers every page by weight; weight <= 0 is left out, large weights are capped
+    weights = {"a": 1, "b": 2, "zero": 0, "neg": -3, "big": 10 ** 6}
+    deck = RotationDeck("db")
+    deck.sync(weights, pool_version=1)
+    assert Counter(deck.draw(weights) for _ in range(3 + KEY_MESSAGE_MAX_WEIGHT)) == {"a": 1, "b": 2, "big": KEY_MESSAGE_MAX_WEIGHT}
+    
+    # No message twice in a row, across round boundaries too
+    weights = {f"p{i}": 1 for i in range(5)}
+    deck = RotationDeck("db")
+    deck.sync(weights, pool_version=1)
+    drawn = [deck.pick(weights, pool_version=1, mode="run") for _ in range(25)]
+    assert all(x != y for x, y in zip(drawn, drawn[1:])) and Counter(drawn[:5]) == Counter(weights)
+    
+    # Pool change mid-round: removed pages leave, new ones join, a re-weighted one is re-dealt
+    weights = {"a": 1, "b": 1, "c": 1, "d": 1}
+    deck = RotationDeck("db")
+    deck.sync(weights, pool_version=1)
+    before = [deck.draw(weights), deck.draw(weights)]
+    weights = {"a": 1, "b": 3, "d": 1, "e": 1}
+    deck.sync(weights, pool_version=2)
+    after = []
+    while deck.pos < len(deck.deck):
+        after.append(deck.draw(weights))
+    assert "c" not in after and Counter(before + after) - Counter({"c": before.count("c")}) == {"a": 1, "b": 3, "d": 1, "e": 1}
+    
+    print("✅ Rotation Deck Check Passed")
+    return True
+
+def test_projection():
+    print("15. Projection Check: filter_properties from candidate columns...")
+    from notion_api import resolve_projection, _query_endpoint
+    from schema_cache import DatabaseSchema
+    
+    properties = {"종목명": {"id": "title", "type": "title"}, "날짜": {"id": "a%3Bb", "type": "date"}, "메모": {"id": "m x", "type": "rich_text"}}
+    fields = {"title": ["종목명", "title"], "date": ["Date", "날짜"], "memo": ["m x"], "profit": ["판매수익"]}
+    # Names and ids both resolve, every id appears once, missing columns are left out
+    assert resolve_projection(properties, fields) == ["title", "a%3Bb", "m x"]
+    # Ids from the API are already percent-encoded; anything else is quoted
+    assert _query_endpoint("db", ["title", "a%3Bb", "m x"]) == "databases/db/query?filter_properties=title&filter_properties=a%3Bb&filter_properties=m%20x"
+    assert _query_endpoint("db") == "databases/db/query"
+    assert DatabaseSchema("db", "", properties).projection({"profit": ["판매수익"]}) is None, "no match -> no projection"
+    
+    print("✅ Projection Check Passed")
+    return True
+
+def test_feed_not_modified():
+    print("16. Feed Cache Check: conditional GET answered with 304...")
+    import tempfile
+    import urllib
+    import urllib.error
+    import cache_store
+    import news_feed
+    
+    url = "https://example.com/rss?q=코스피"
+    item = {"title": "코스피 상승", "link": "https://example.com/1", "first_seen": 1000}
+    request = MagicMock()
+    request.urlopen.side_effect = urllib.error.HTTPError(url, 304, "Not Modified", {}, None)
+    with tempfile.TemporaryDirectory() as tmp, patch.object(cache_store, "CACHE_DIR", tmp), \
+            patch.object(urllib, "request", request, create=True):
+        cache_store.save_json(news_feed.FEED_CACHE_FILE, {url: {"etag": '"v1"', "last_modified": "Mon, 19 Oct 2026 00:00:00 GMT",
+                                                             "items": {item["link"]: item}}})
+        select = MagicMock()
+        assert news_feed.fetch_feed(url, select=select) == [item]
+        headers = request.Request.call_args[1]["headers"]
+        assert headers["If-None-Match"] == '"v1"' and headers["If-Modified-Since"] == "Mon, 19 Oct 2026 00:00:00 GMT"
+        assert not select.called, "a 304 must not parse anything"
+        assert cache_store.load_json(news_feed.FEED_CACHE_FILE)[url]["etag"] == '"v1"', "cache entry kept as is"
+    
+    print("✅ Feed Cache Check Passed")
+    return True
+
+def test_news_history():
+    print("17. News History Check: ring buffer of posted links...")
+    from news_history import NewsHistory
+    
+    history = NewsHistory(["https://a.com/1?oc=5", "https://a.com/2", "https://a.com/1"], size=3)
+    assert len(history) == 2 and history.seen("https://A.com/1/#top"), "canonical links, no duplicates"
+    history.record_post("https://a.com/3")
+    history.record_post("https://a.com/4")
+    # Full at 3: the oldest link is evicted from the buffer and from the lookup set
+    assert len(history) == 3 and not history.seen("https://a.com/1")
+    assert all(history.seen(f"https://a.com/{i}") for i in (2, 3, 4)) and len(history._seen) == 3
+    assert history.is_current("https://a.com/4?utm_source=x") and not history.is_current("https://a.com/3")
+    
+    # Article ids in the query are kept (sorted); only tracking parameters go
+    from news_feed import canonical_link, merge_feeds
+    naver = "https://n.news.naver.com/read.naver?oid=001&aid="
+    assert canonical_link(naver + "0002&utm_medium=rss&fbclid=x") == canonical_link("https://n.news.naver.com/read.naver/?aid=0002&oid=001#c")
+    history.record_post(naver + "0001")
+    assert history.seen(naver + "0001&oc=5") and not history.seen(naver + "0002")
+    merged = merge_feeds([[{"title": "기사 1", "link": naver + "0001"}], [{"title": "기사 2", "link": naver + "0002"}]])
+    assert [item["title"] for item in merged] == ["기사 1", "기사 2"]
+    
+    print("✅ News History Check Passed")
+    return True
+
+def test_key_message_index():
+    print("18. Key Message Index Check: page bodies reused across a refresh...")
+    import key_message_index
+    from key_message_index import KeyMessageIndex
+    
+    def page(page_id, title, edited, weight=None):
+        props = {"이름": {"type": "title", "title": [{"plain_text": title}]}, "Weight": {"type": "number", "number": weight}}
+        return {"id": page_id, "last_edited_time": edited, "properties": props}
+    
+    def refresh(index, pages):
+        with patch.object(key_message_index, "query_with_schema", return_value=(None, {"weight": ["Weight"]}, iter(pages))):
+            return index.refresh("fake_token")
+    
+    index = KeyMessageIndex("db")
+    assert refresh(index, [page("a", "A", "t1", 3), page("b", "B", "t1")])
+    with patch.object(key_message_index, "fetch_body_lines", side_effect=lambda token, page_id: [f"{page_id} body"]) as fetch:
+        assert index.message("fake_token", "a") == "a body" and index.message("fake_token", "b") == "b body"
+        # "a" unchanged keeps its body, "b" was edited, "c" is new; "b" and "c" are fetched again
+        assert refresh(index, [page("a", "A", "t1", 3), page("b", "B2", "t2"), page("c", "C", "t2")])
+        assert [index.message("fake_token", p) for p in ("a", "b", "c")] == ["a body", "b body", "c body"]
+        assert [call[0][1] for call in fetch.call_args_list] == ["a", "b", "b", "c"]
+    assert index.weights() == {"a": 3, "b": 1, "c": 1}
+    assert not refresh(index, []) and index.page_ids() == ["a", "b", "c"], "an empty refresh keeps the old index"
+    
+    print("✅ Key Message Index Check Passed")
+    return True
+
+def test_vendor_bundle():
+    print("19. Vendor Bundle Check: rebuild on a pin change, CDN fallback...")
+    import tempfile
+    import cache_store
+    import vendor_assets
+    
+    pins = {"chart": [("chart.js", "4.4.1", "dist/chart.umd.js")]}
+    fetch = MagicMock(side_effect=lambda package, version, path: f"/* {package} {version} */".encode("utf-8"))
+    with tempfile.TemporaryDirectory() as tmp, patch.object(cache_store, "CACHE_DIR", tmp), \
+            patch.object(vendor_assets, "VENDOR_DIR", os.path.join(tmp, "vendor")), \
+            patch.object(vendor_assets, "MANIFEST_FILE", os.path.join(tmp, "vendor", "manifest.json")), \
+            patch.object(vendor_assets, "BUNDLES", pins), patch.object(vendor_assets, "fetch_package_file", fetch):
+        # No bundle yet: the pinned CDN files
+        assert vendor_assets.script_tags("chart") == vendor_assets.cdn_tags("chart")
+        assert "/chart.js@4.4.1/dist/chart.umd.js" in vendor_assets.cdn_tags("chart")
+        
+        first = vendor_assets.ensure_bundle("chart")
+        assert vendor_assets.ensure_bundle("chart") == first and fetch.call_count == 1, "unchanged pins reuse the bundle"
+        tags = vendor_assets.script_tags("chart")
+        assert f'<script src="{first}"></script>' in tags and "window.Chart || document.write(" in tags and "<\\/script>" in tags
+        
+        pins["chart"] = [("chart.js", "4.4.2", "dist/chart.umd.js")]
+        second = vendor_assets.ensure_bundle("chart")
+        assert second != first and fetch.call_count == 2 and os.path.exists(second) and not os.path.exists(first)
+        
+        # Bundle file gone (e.g. not deployed): back to the CDN tags
+        os.remove(second)
+        assert vendor_assets.script_tags("chart") == vendor_assets.cdn_tags("chart")
+    
+    print("✅ Vendor Bundle Check Passed")
+    return True
+
+def test_discovery_failure():
+    print("20. Discovery Check: a failed page walk is not cached...")
+    import tempfile
+    import cache_store
+    import db_discovery
+    
+    page = {"last_edited_time": "t1"}
+    monthly = {"type": "child_database", "id": "db1", "child_database": {"title": "Monthly Returns"}}
+    
+    def listing(healthy):
+        def iter_children(token, block_id, on_error=None):
+            if healthy:
+                yield monthly
+            else:
+                on_error()
+        return iter_children
+    
+    is_monthly = lambda title: title == "Monthly Returns"
+    with tempfile.TemporaryDirectory() as tmp, patch.object(cache_store, "CACHE_DIR", tmp), \
+            patch.object(db_discovery, "notion_request", return_value=page), patch.object(db_discovery, "DISCOVERY_TTL", 0):
+        with patch.object(db_discovery, "iter_block_children", listing(False)):
+            assert db_discovery.find_database("fake_token", "page", is_monthly) is None
+        with patch.object(db_discovery, "iter_block_children", listing(True)):
+            assert db_discovery.find_database("fake_token", "page", is_monthly) == "db1", "failed walk must not be cached"
+        page["last_edited_time"] = "t2"
+        with patch.object(db_discovery, "iter_block_children", listing(False)):
+            assert db_discovery.find_database("fake_token", "page", is_monthly) == "db1", "falls back to the previous index"
+        assert cache_store.load_json(db_discovery.DISCOVERY_CACHE_FILE)["page"]["last_edited_time"] == "t1"
+        with patch.object(db_discovery, "iter_block_children", listing(True)):
+            assert db_discovery.find_database("fake_token", "page", is_monthly) == "db1"
+        assert cache_store.load_json(db_discovery.DISCOVERY_CACHE_FILE)["page"]["last_edited_time"] == "t2"
+    
+    print("✅ Discovery Check Passed")
+    return True
+
 if __name__ == "__main__":
-    if test_calendar_generation():
+    checks = [test_calendar_generation, test_trade_table, test_rss_streaming, test_keyword_matcher, test_asset_diff, test_tracing, test_run_metrics, test_profiling, test_gzip_body, test_site_output, test_svg_pie, test_prerendered_month, test_rotation_deck, test_projection, test_feed_not_modified, test_news_history, test_key_message_index, test_vendor_bundle, test_discovery_failure]
+    ok = True
+    for check in checks:
+        try:
+            result = check()
+        except AssertionError as e:
+            print(f"❌ {check.__name__} failed: {e}")
+            result = False
+        ok = ok and result is not False
+    
+    if ok:
         print("\n🎉 ALL CHECKS PASSED. Safe to push.")
         sys.exit(0)
     else:
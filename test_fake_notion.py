@@ -0,0 +1,135 @@
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+from fake_notion_server import start_server, MONTHLY_DB_ID, TRADING_DB_ID, KEY_MESSAGE_DB_ID, MAIN_PAGE_ID, key
+
+# Runs the real jobs end-to-end (HTTP, pagination, block walks, 429 retries)
+# against fake_notion_server.py. Each job runs in its own process, since
+# test_build.py replaces urllib.request with a mock in this one.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+JOBS = [
+    "generate_calendar_widget.py",
+    "generate_asset_chart.py",
+    "update_monthly_log.py",
+    "update_key_message.py",
+    "update_daily_news.py",
+    "update_date_header.py"
+]
+
+def run_job(job, env, cwd):
+    result = subprocess.run([sys.executable, os.path.join(ROOT, job)], env=env, cwd=cwd,
+                            capture_output=True, text=True, encoding="utf-8", timeout=120)
+    assert result.returncode == 0, f"{job} exited with {result.returncode}:\n{result.stdout}\n{result.stderr}"
+    return result.stdout
+
+def test_jobs_against_fake_server():
+    print("1. End-to-End Check: every job against the fake Notion server...")
+    # 250 trades -> 3 query batches; every 7th API request is answered with a 429
+    server = start_server(trades=250, throttle_every=7, retry_after=0.01)
+    state = server.state
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, **server.env)
+            env["NOTION_CACHE_DIR"] = os.path.join(tmp, ".cache")
+            env["NOTION_RATE_LIMIT"] = "0"
+
+            output = {job: run_job(job, env, tmp) for job in JOBS}
+
+            assert "Parsed 250 trade rows." in output["generate_calendar_widget.py"]
+            with open(os.path.join(tmp, "index.html"), encoding="utf-8") as f:
+                assert "<!DOCTYPE html" in f.read()
+            assert "Found 6 assets." in output["generate_asset_chart.py"]
+            with open(os.path.join(tmp, "asset_chart.html"), encoding="utf-8") as f:
+                chart_page = f.read()
+            with open(os.path.join(tmp, "vendor", "manifest.json"), encoding="utf-8") as f:
+                bundle = json.load(f)["chart"]["file"]
+            assert f'<script src="{bundle}">' in chart_page and os.path.exists(os.path.join(tmp, bundle))
+            assert "Fetched 250 trading records." in output["update_monthly_log.py"]
+            assert len(state.rows[key(MONTHLY_DB_ID)]) > 0
+            assert "Block updated successfully." in output["update_key_message.py"]
+            assert "Date header updated to" in output["update_date_header.py"]
+            assert state.throttled > 0 and "Rate limited" in "".join(output.values())
+
+            # Second news run: the feeds answer 304 and a headline not posted yet is picked
+            news = run_job("update_daily_news.py", env, tmp)
+            assert "Feed not modified (304)" in news
+            first = output["update_daily_news.py"].split("Selected: ")[1].splitlines()[0]
+            assert news.split("Selected: ")[1].splitlines()[0] != first
+
+            # Columns renamed while the cached schema is still fresh: the jobs notice
+            # the stale names on the first page and re-fetch the schema
+            state.update_database(TRADING_DB_ID, {"properties": {"날짜": {"name": "Date"}, "판매수익": {"name": "Sale Profit"}}})
+            calendar = run_job("generate_calendar_widget.py", env, tmp)
+            assert "is out of date" in calendar and "Parsed 250 trade rows." in calendar
+            monthly = run_job("update_monthly_log.py", env, tmp)
+            assert "is out of date" not in monthly and "Fetched 250 trading records." in monthly
+    finally:
+        server.shutdown()
+
+    print(f"✅ End-to-End Check Passed ({state.api_requests} API requests, {state.throttled} throttled)")
+    return True
+
+def async_client_roundtrip():
+    # Runs in a child process (see test_async_client); returns the modes checked
+    import asyncio
+    import notion_api
+    import notion_async
+    
+    server = start_server(trades=150, throttle_every=4, retry_after=0.01)
+    state = server.state
+    saved = (notion_api.NOTION_API_BASE, notion_api.rate_limiter, notion_async.aiohttp)
+    notion_api.NOTION_API_BASE = server.env["NOTION_API_BASE"]
+    notion_api.rate_limiter = notion_api.RateLimiter(0)
+    
+    async def read_all():
+        async with notion_async.AsyncNotionClient("fake_token", concurrency=4) as client:
+            return await asyncio.gather(
+                client.query_all(TRADING_DB_ID, filter_properties=["title"]),
+                client.query_all(KEY_MESSAGE_DB_ID),
+                client.list_children(MAIN_PAGE_ID),
+                client.request("blocks/00000000-0000-0000-0000-000000000000"))
+    
+    # The thread-pool fallback always; the aiohttp session when it is installed
+    modes = [("threads", None)] + ([("aiohttp", saved[2])] if saved[2] else [])
+    try:
+        for mode, module in modes:
+            notion_async.aiohttp = module
+            throttled = state.throttled
+            trades, messages, children, missing = asyncio.run(read_all())
+            assert len({p["id"] for p in trades}) == 150 and all(len(p["properties"]) == 1 for p in trades), mode
+            assert len(messages) == 4 and len(children) == len(state.children[key(MAIN_PAGE_ID)]), mode
+            assert missing is None and state.throttled > throttled, mode
+    finally:
+        notion_api.NOTION_API_BASE, notion_api.rate_limiter, notion_async.aiohttp = saved
+        server.shutdown()
+    return [mode for mode, _ in modes]
+
+def test_async_client():
+    print("2. Async Client Check: AsyncNotionClient against the fake server...")
+    # Own process like the jobs: the thread-pool mode needs the real urllib.request
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--async-client"], cwd=ROOT,
+                            capture_output=True, text=True, encoding="utf-8", timeout=120)
+    assert result.returncode == 0, f"async client check failed:\n{result.stdout}\n{result.stderr}"
+    
+    print(f"✅ Async Client Check Passed ({result.stdout.strip().splitlines()[-1]})")
+    return True
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8')
+    if "--async-client" in sys.argv:
+        print(", ".join(async_client_roundtrip()))
+        sys.exit(0)
+    ok = True
+    for check in [test_jobs_against_fake_server, test_async_client]:
+        try:
+            result = check()
+        except AssertionError as e:
+            print(f"❌ {check.__name__} failed: {e}")
+            result = False
+        ok = ok and result is not False
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,171 @@
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import threading
+
+from cache_store import cache_path
+
+# Lightweight run tracing, off unless NOTION_TRACE is set:
+#   NOTION_TRACE=1            -> spans appended to .cache/trace.jsonl
+#   NOTION_TRACE=run.jsonl    -> spans appended to that file
+# Every HTTP call (endpoint, status, bytes, latency, retries, rate-limit wait)
+# and every pipeline stage becomes one JSON line, and a summary table is
+# printed when the job exits. When tracing is off, span() and http_span()
+# return a shared no-op object, so instrumented code pays one function call.
+
+TRACE = os.environ.get("NOTION_TRACE", "")
+enabled = TRACE.lower() not in ("", "0", "false", "off")
+
+JOB = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+RUN_ID = os.environ.get("NOTION_RUN_ID") or time.strftime("%Y%m%dT%H%M%S")
+
+_ID_PATTERN = re.compile(r"[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}")
+
+_records = []
+_local = threading.local()
+_started = time.perf_counter()
+
+def trace_file():
+    if TRACE.lower() in ("1", "true", "on", "yes"):
+        return cache_path("trace.jsonl")
+    return TRACE
+
+def endpoint_name(endpoint):
+    # "databases/2f90...bfa/query?filter_properties=..." -> "databases/{id}/query"
+    return _ID_PATTERN.sub("{id}", endpoint.split("?", 1)[0])
+
+class Span:
+    __slots__ = ("kind", "name", "attrs", "start", "parent")
+
+    def __init__(self, kind, name, attrs):
+        self.kind = kind
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, name, value):
+        self.attrs[name] = self.attrs.get(name, 0) + value
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _local.stack.pop()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        record = {
+            "run": RUN_ID,
+            "job": JOB,
+            "kind": self.kind,
+            "name": self.name,
+            "parent": self.parent,
+            "start_s": round(self.start - _started, 6),
+            "duration_ms": round(duration * 1000, 3)
+        }
+        record.update(self.attrs)
+        _records.append(record)
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, name, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NOOP = _NoopSpan()
+
+def span(name, **attrs):
+    # Pipeline stage: with span("render"): ...
+    if not enabled: return NOOP
+    return Span("stage", name, attrs)
+
+def http_span(method, endpoint, **attrs):
+    if not enabled: return NOOP
+    attrs["endpoint"] = endpoint
+    return Span("http", f"{method} {endpoint_name(endpoint)}", attrs)
+
+class CountingReader:
+    # Wraps a streamed response to count the bytes read (also added to the span's bytes_in)
+    def __init__(self, stream, span=NOOP):
+        self.stream = stream
+        self.span = span
+        self.bytes_in = 0
+
+    def read(self, size=-1):
+        # HTTPResponse.read(-1) raises "negative count" on Python 3.9; read all with no argument
+        chunk = self.stream.read() if size is None or size < 0 else self.stream.read(size)
+        self.bytes_in += len(chunk)
+        self.span.add("bytes_in", len(chunk))
+        return chunk
+
+def summary():
+    # Aggregates of this run's records, grouped by (kind, name)
+    groups = {}
+    for record in _records:
+        entry = groups.setdefault((record["kind"], record["name"]), {
+            "kind": record["kind"], "name": record["name"], "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+            "bytes_in": 0, "bytes_out": 0, "retries": 0, "errors": 0, "wait_ms": 0.0
+        })
+        entry["count"] += 1
+        entry["total_ms"] += record["duration_ms"]
+        entry["max_ms"] = max(entry["max_ms"], record["duration_ms"])
+        entry["bytes_in"] += record.get("bytes_in") or 0
+        entry["bytes_out"] += record.get("bytes_out") or 0
+        entry["retries"] += record.get("retries") or 0
+        entry["wait_ms"] += record.get("wait_ms") or 0
+        status = record.get("status")
+        if record.get("error") or (status and status >= 400):
+            entry["errors"] += 1
+    return {
+        "run": RUN_ID,
+        "job": JOB,
+        "duration_s": round(time.perf_counter() - _started, 3),
+        "spans": sorted(groups.values(), key=lambda e: (e["kind"] != "stage", -e["total_ms"]))
+    }
+
+def print_summary(data=None):
+    data = data or summary()
+    spans = data["spans"]
+    http = [e for e in spans if e["kind"] == "http"]
+    print(f"\nTrace summary: {data['job']} {data['duration_s']:.3f}s, "
+          f"{sum(e['count'] for e in http)} HTTP requests, {sum(e['bytes_in'] for e in http) / 1024:.1f} KB in")
+    print(f"{'kind':<6} {'name':<40} {'count':>5} {'total ms':>10} {'max ms':>9} {'wait ms':>9} {'KB in':>8} {'retries':>7} {'errors':>6}")
+    for e in spans:
+        print(f"{e['kind']:<6} {e['name'][:40]:<40} {e['count']:>5} {e['total_ms']:>10.1f} {e['max_ms']:>9.1f} "
+              f"{e['wait_ms']:>9.1f} {e['bytes_in'] / 1024:>8.1f} {e['retries']:>7} {e['errors']:>6}")
+
+def flush():
+    if not _records: return
+    path = trace_file()
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for record in _records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+    except Exception as e:
+        print(f"Could not write trace {path}: {e}")
+    print_summary()
+
+if enabled:
+    atexit.register(flush)
@@ -0,0 +1,139 @@
+from array import array
+from datetime import date
+
+# Day number of 1970-01-01 in proleptic Gregorian ordinals.
+# The HTML payload ships days since the Unix epoch so JS can use Date.UTC math directly.
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def _compact_number(val):
+    # 1000.0 -> 1000 keeps the serialized payload short
+    if val.is_integer():
+        return int(val)
+    return val
+
+class TradeTable:
+    # Columnar store for Trading Journal rows.
+    # One typed array per column instead of one dict per trade; titles and
+    # emojis are interned into a shared string pool and referenced by index.
+
+    def __init__(self):
+        self.ids = []
+        self.dates = array("l")     # date.toordinal()
+        self.profits = array("d")
+        self.losses = array("d")
+        self.title_idx = array("l")
+        self.emoji_idx = array("l")
+        self.strings = []
+        self._string_index = {}
+
+    def __len__(self):
+        return len(self.dates)
+
+    def _intern(self, text):
+        idx = self._string_index.get(text)
+        if idx is None:
+            idx = len(self.strings)
+            self.strings.append(text)
+            self._string_index[text] = idx
+        return idx
+
+    def append(self, page_id, date_str, title, emoji, profit, loss):
+        self.ids.append(page_id)
+        self.dates.append(date.fromisoformat(date_str[:10]).toordinal())
+        self.profits.append(float(profit or 0))
+        self.losses.append(float(loss or 0))
+        self.title_idx.append(self._intern(title))
+        self.emoji_idx.append(self._intern(emoji))
+
+    @classmethod
+    def from_calendar_data(cls, calendar_data):
+        # Accepts the legacy {"YYYY-MM-DD": [ {title, emoji, profit, loss, ...} ]} shape
+        table = cls()
+        for date_str, entries in calendar_data.items():
+            for e in entries:
+                table.append(e.get("id", ""), date_str, e.get("title", "Untitled"), e.get("emoji", "💰"),
+                             e.get("profit", 0), e.get("loss", 0))
+        return table
+
+    # --- Row access ---
+
+    def title(self, i):
+        return self.strings[self.title_idx[i]]
+
+    def emoji(self, i):
+        return self.strings[self.emoji_idx[i]]
+
+    def date_str(self, i):
+        return date.fromordinal(self.dates[i]).isoformat()
+
+    def display(self, i):
+        display_str = f"{self.emoji(i)} {self.title(i)}"
+        details = []
+        profit = _compact_number(self.profits[i])
+        loss = _compact_number(self.losses[i])
+        if profit > 0: details.append(f"+{profit:,}")
+        if loss > 0: details.append(f"-{loss:,}")
+        if details:
+            display_str += f" ({' '.join(details)})"
+        return display_str
+
+    # --- Grouping ---
+
+    def group_rows(self, key):
+        # key maps a date ordinal to a group key; each distinct ordinal is resolved once
+        groups = {}
+        key_cache = {}
+        for i, ordinal in enumerate(self.dates):
+            k = key_cache.get(ordinal)
+            if k is None:
+                k = key(ordinal)
+                key_cache[ordinal] = k
+            groups.setdefault(k, []).append(i)
+        return groups
+
+    def rows_by_day(self):
+        return self.group_rows(lambda o: o)
+
+    def totals_by(self, key):
+        # Returns {group: (profit, loss, count)}
+        totals = {}
+        profits = self.profits
+        losses = self.losses
+        for k, rows in self.group_rows(key).items():
+            totals[k] = (sum(profits[i] for i in rows), sum(losses[i] for i in rows), len(rows))
+        return totals
+
+    def totals_by_month(self):
+        return self.totals_by(lambda o: date.fromordinal(o).isoformat()[:7])
+
+    def totals_by_year(self):
+        return self.totals_by(lambda o: date.fromordinal(o).year)
+
+    # --- Views ---
+
+    def to_calendar_data(self):
+        # Legacy dict-of-lists view (debugging / backward compatibility)
+        calendar_data = {}
+        for ordinal, rows in self.rows_by_day().items():
+            calendar_data[date.fromordinal(ordinal).isoformat()] = [{
+                "id": self.ids[i],
+                "title": self.title(i),
+                "emoji": self.emoji(i),
+                "display": self.display(i),
+                "profit": _compact_number(self.profits[i]),
+                "loss": _compact_number(self.losses[i])
+            } for i in rows]
+        return calendar_data
+
+    def to_payload(self):
+        # Compact columnar payload embedded in the calendar HTML.
+        # d: days since 1970-01-01, p/l: profit/loss, t: index into s (string pool)
+        used = sorted(set(self.title_idx))
+        remap = {old: new for new, old in enumerate(used)}
+        return {
+            "d": [o - UNIX_EPOCH_ORDINAL for o in self.dates],
+            "p": [_compact_number(v) for v in self.profits],
+            "l": [_compact_number(v) for v in self.losses],
+            "t": [remap[i] for i in self.title_idx],
+            "s": [self.strings[i] for i in used]
+        }
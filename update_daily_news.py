@@ -2,11 +2,17 @@
 import os
 import sys
 import json
-import random
 import re
-import urllib.request
-import urllib.error
-import xml.etree.ElementTree as ET
+
+from itertools import islice
+
+from keyword_matcher import KeywordMatcher
+from news_feed import fetch_feeds, merge_feeds
+from news_history import NewsHistory, pick_news
+from notion_api import notion_request
+import run_metrics
+from profiling import run_main
+from tracing import span
 
 # Force UTF-8 encoding
 sys.stdout.reconfigure(encoding='utf-8')
@@ -14,130 +20,117 @@ sys.stderr.reconfigure(encoding='utf-8')
 
 import urllib.parse
 
-def fetch_economic_news():
-    # Keywords: Samsung, SK Hynix, Kospi, Nasdaq, Fed (Interest Rate), Exchange Rate
-    keywords = ["삼성전자", "SK하이닉스", "코스피", "나스닥", "금리", "환율", "뉴욕증시"]
-    query = " OR ".join(keywords)
-    encoded_query = urllib.parse.quote(query)
-    
-    # Google News RSS with the specific query
-    rss_url = f"https://news.google.com/rss/search?q={encoded_query}&hl=ko&gl=KR&ceid=KR:ko"
-    
+# Keywords: Samsung, SK Hynix, Kospi, Nasdaq, Fed (Interest Rate), Exchange Rate
+KEYWORDS = ["삼성전자", "SK하이닉스", "코스피", "나스닥", "금리", "환율", "뉴욕증시"]
+EXCLUSION_KEYWORDS = ["[광고]", "게시판", "인사", "부고", "화촉", "모집", "단신"]
+
+def keyword_weights(raw):
+    # Score per keyword found in a title (all 1 by default).
+    # NEWS_KEYWORD_WEIGHTS='{"삼성전자": 3}' overrides individual weights;
+    # anything else is reported and ignored so the job still runs.
+    weights = {k: 1 for k in KEYWORDS}
+    if not raw:
+        return weights
     try:
-        req = urllib.request.Request(rss_url)
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                xml_data = response.read()
-                root = ET.fromstring(xml_data)
-                
-                all_items = []
-                for item in root.findall('.//item'):
-                    title = item.find('title').text
-                    link = item.find('link').text
-                    
-                    # Clean Title
-                    if " - " in title:
-                        title = title.rsplit(" - ", 1)[0]
-                    
-                    all_items.append({"title": title, "link": link})
-                
-                # --- Filtering Logic ---
-                filtered_items = []
-                exclusion_keywords = ["[광고]", "게시판", "인사", "부고", "화촉", "모집", "단신"]
-                
-                for item in all_items:
-                    # 1. Exclude irrelevant
-                    if any(bad in item['title'] for bad in exclusion_keywords):
-                        continue
-                        
-                    # 2. Assign Priority (1 = High, 2 = Medium)
-                    # High Priority: Directly mentions major keywords in TITLE
-                    priority = 2
-                    if any(k in item['title'] for k in keywords):
-                        priority = 1
-                    
-                    item['priority'] = priority
-                    filtered_items.append(item)
-                
-                # Sort by Priority (1 first)
-                filtered_items.sort(key=lambda x: x['priority'])
-                
-                return filtered_items
-    except Exception as e:
-        print(f"Error fetching RSS: {e}")
-        return []
+        overrides = json.loads(raw)
+    except ValueError as e:
+        print(f"Warning: NEWS_KEYWORD_WEIGHTS is not valid JSON ({e}). Using weight 1 for every keyword.")
+        return weights
+    if not isinstance(overrides, dict):
+        print("Warning: NEWS_KEYWORD_WEIGHTS must be a JSON object. Using weight 1 for every keyword.")
+        return weights
+    for keyword, weight in overrides.items():
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)):
+            print(f"Warning: ignoring non-numeric weight for {keyword!r} in NEWS_KEYWORD_WEIGHTS.")
+            continue
+        weights[keyword] = weight
+    return weights
+
+KEYWORD_WEIGHTS = keyword_weights(os.environ.get("NEWS_KEYWORD_WEIGHTS"))
+
+KEYWORD_MATCHER = KeywordMatcher(KEYWORD_WEIGHTS)
+EXCLUSION_MATCHER = KeywordMatcher(EXCLUSION_KEYWORDS)
+
+# Only the top few candidates are ever used
+NEWS_CANDIDATES = 5
+
+# Items taken from the top of each feed before merging
+PER_FEED_ITEMS = 20
+
+# NEWS_RSS_BASE points the default search feeds at another host (e.g. fake_notion_server.py)
+GOOGLE_NEWS_RSS = os.environ.get("NEWS_RSS_BASE", "https://news.google.com/rss/search")
+
+def google_news_url(query):
+    return f"{GOOGLE_NEWS_RSS}?q={urllib.parse.quote(query)}&hl=ko&gl=KR&ceid=KR:ko"
+
+def configured_feeds():
+    # NEWS_FEEDS: newline/comma separated list of feed URLs or search keywords.
+    # Default: one Google News search per keyword.
+    entries = os.environ.get("NEWS_FEEDS", "")
+    entries = [e.strip() for e in re.split(r"[\n,]", entries) if e.strip()] or KEYWORDS
+    return [e if e.startswith(("http://", "https://")) else google_news_url(e) for e in entries]
+
+def select_candidates(items, limit=NEWS_CANDIDATES):
+    # Filters and scores items as they stream out of the parser and stops
+    # consuming (and therefore downloading/parsing) once `limit` high-priority
+    # items are found. High-priority items come first, ordered by keyword
+    # score (stream order for ties), followed by up to `limit` fallbacks.
+    high = []
+    medium = []
+    for item in items:
+        # 1. Exclude irrelevant
+        if EXCLUSION_MATCHER.search(item['title']):
+            continue
+            
+        # 2. Score: sum of weights of the keywords mentioned in the TITLE
+        # Priority 1 (High) = any keyword matched, 2 (Medium) = none
+        score = KEYWORD_MATCHER.score(item['title'])
+        if score > 0:
+            item['score'] = score
+            item['priority'] = 1
+            high.append(item)
+            if len(high) >= limit:
+                break
+        elif len(medium) < limit:
+            item['score'] = 0
+            item['priority'] = 2
+            medium.append(item)
+    
+    high.sort(key=lambda x: -x['score'])
+    return high + medium
+
+def fetch_economic_news():
+    # All feeds are fetched concurrently (conditional GET + streaming parse,
+    # top PER_FEED_ITEMS each), merged and deduplicated, then filtered and
+    # prioritized once on the merged stream.
+    feed_items = fetch_feeds(configured_feeds(), select=lambda items: list(islice(items, PER_FEED_ITEMS)))
+    return select_candidates(merge_feeds(feed_items))
 
 def get_children(token, block_id):
-    url = f"https://api.notion.com/v1/blocks/{block_id}/children"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                data = json.loads(response.read().decode("utf-8"))
-                return data.get("results", [])
-    except Exception as e:
-        print(f"Error fetching children: {e}")
+    data = notion_request(token, f"blocks/{block_id}/children")
+    if data is None:
+        print(f"Error fetching children of {block_id}.")
         return None  # Return None to indicate failure
-    return []
+    return data.get("results", [])
 
 def update_block_content(token, block_id, payload):
-    url = f"https://api.notion.com/v1/blocks/{block_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    data_json = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data_json, headers=headers, method="PATCH")
-    try:
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                print(f"Block {block_id} updated.")
-                return True
-    except Exception as e:
-        print(f"Error updating block {block_id}: {e}")
+    if notion_request(token, f"blocks/{block_id}", method="PATCH", payload=payload) is not None:
+        print(f"Block {block_id} updated.")
+        return True
     return False
 
 def append_children(token, parent_id, children_list):
-    url = f"https://api.notion.com/v1/blocks/{parent_id}/children"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
     payload = { "children": children_list }
-    data_json = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data_json, headers=headers, method="PATCH")
-    try:
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                print(f"Appended children to {parent_id}.")
-                # Return the response so we can get IDs of created blocks
-                return json.loads(response.read().decode("utf-8"))
-    except Exception as e:
-        print(f"Error appending children: {e}")
-    return None
+    # Return the response so we can get IDs of created blocks
+    data = notion_request(token, f"blocks/{parent_id}/children", method="PATCH", payload=payload)
+    if data is not None:
+        print(f"Appended children to {parent_id}.")
+    return data
 
 def delete_block(token, block_id):
-    url = f"https://api.notion.com/v1/blocks/{block_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    req = urllib.request.Request(url, headers=headers, method="DELETE")
-    try:
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                print(f"Block {block_id} deleted.")
-                return True
-    except Exception as e:
-        print(f"Error deleting block {block_id}: {e}")
+    if notion_request(token, f"blocks/{block_id}", method="DELETE") is not None:
+        print(f"Block {block_id} deleted.")
+        return True
     return False
 
 def find_news_blocks(token, page_id):
@@ -225,14 +218,26 @@ def main():
         sys.exit(1)
     
     # Fetch News
-    news_items = fetch_economic_news()
+    with span("fetch_news") as s:
+        news_items = fetch_economic_news()
+        s.set(rows=len(news_items))
+        run_metrics.incr("rows", len(news_items))
     if not news_items:
         print("No news found.")
         return
-    selected_news = random.choice(news_items[:5] if news_items else [])
+    
+    # Prefer headlines that were never posted, newest first
+    history = NewsHistory.load()
+    selected_news = pick_news(news_items, history)
+    if history.is_current(selected_news['link']):
+        print(f"Best candidate is already shown ({selected_news['title']}). Skipping Notion update.")
+        run_metrics.incr("writes_skipped")
+        return
+    print(f"Selected: {selected_news['title']}")
     
     # Identify Blocks
-    callout_id, header_id, found_containers, _ = find_news_blocks(token, page_id)
+    with span("find_blocks"):
+        callout_id, header_id, found_containers, _ = find_news_blocks(token, page_id)
     # Note: find_news_blocks no longer returns content_id, we derive it from containers
     
     if not callout_id:
@@ -335,7 +340,7 @@ def main():
             # Update First Child
             first_child_id = children[0].get("id")
             print(f"Updating text in {first_child_id}...")
-            update_block_content(token, first_child_id, content_payload)
+            posted = update_block_content(token, first_child_id, content_payload)
             
             # Delete Tail (Cleanup)
             if len(children) > 1:
@@ -345,11 +350,16 @@ def main():
         else:
             # Empty container, append
             print("Appending new content block...")
-            append_children(token, target_container_id, [{
+            posted = append_children(token, target_container_id, [{
                 "object": "block",
                 "type": "paragraph",
                 "paragraph": content_payload["paragraph"]
-            }])
+            }]) is not None
+        
+        if posted:
+            run_metrics.incr("writes_applied")
+            history.record_post(selected_news['link'])
+            history.save()
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
@@ -1,10 +1,12 @@
 import os
 import sys
-import json
-import urllib.request
-import urllib.error
 from datetime import datetime, timedelta, timezone
 
+from notion_api import notion_request
+import run_metrics
+from profiling import run_main
+from tracing import span
+
 # Force UTF-8 encoding
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
@@ -16,13 +18,6 @@ def get_kst_time():
     return kst_now
 
 def update_block(token, block_id):
-    url = f"https://api.notion.com/v1/blocks/{block_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
     now = get_kst_time()
     
     # Format: 26 (YY), 1 (M), 31 (D), Sat (Day)
@@ -50,36 +45,18 @@ def update_block(token, block_id):
         }
     }
     
-    data_json = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data_json, headers=headers, method="PATCH")
-    
-    try:
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                print(f"Date header updated to: {yy}.{m}.{d} ({day})")
-            else:
-                print(f"Failed to update block: {response.status}")
-    except urllib.error.HTTPError as e:
-        print(f"HTTP Error: {e.code} - {e.read().decode('utf-8')}")
-    except Exception as e:
-        print(f"Error updating block: {e}")
+    if notion_request(token, f"blocks/{block_id}", method="PATCH", payload=payload) is not None:
+        run_metrics.incr("writes_applied")
+        print(f"Date header updated to: {yy}.{m}.{d} ({day})")
+    else:
+        print("Failed to update block.")
 
 def get_children(token, block_id):
-    url = f"https://api.notion.com/v1/blocks/{block_id}/children"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                data = json.loads(response.read().decode("utf-8"))
-                return data.get("results", [])
-    except Exception as e:
-        print(f"Error fetching children: {e}")
-    return []
+    data = notion_request(token, f"blocks/{block_id}/children")
+    if data is None:
+        print(f"Error fetching children of {block_id}.")
+        return []
+    return data.get("results", [])
 
 def find_target_block(token, page_id):
     # 1. Find the Callout Block in the Page
@@ -134,7 +111,8 @@ def main():
     # page_id = "2f90d907-031e-80e8-928d-c7617241966f"
     
     print("Finding target block...")
-    target_block_id = find_target_block(token, page_id)
+    with span("find_block"):
+        target_block_id = find_target_block(token, page_id)
     
     if not target_block_id:
         print("Using fallback ID...")
@@ -142,7 +120,8 @@ def main():
         target_block_id = "2f90d907-031e-80b0-96de-e75401ced683"
     
     print("Updating date header...")
-    update_block(token, target_block_id)
+    with span("update_block"):
+        update_block(token, target_block_id)
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
@@ -1,157 +1,113 @@
 import os
-import json
-import random
 import sys
-import urllib.request
-import urllib.error
+import asyncio
+
+from key_message_index import KeyMessageIndex
+from key_message_rotation import RotationDeck
+from notion_api import notion_request
+from notion_async import AsyncNotionClient
+import run_metrics
+from profiling import run_main
+from tracing import span
 
 # Force UTF-8 encoding for stdout/stderr
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
-def get_page_content_lines(token, page_id):
-    url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                resp_body = response.read().decode("utf-8")
-                blocks = json.loads(resp_body).get("results", [])
-                
-                lines = []
-                for block in blocks:
-                    if block.get("type") == "paragraph":
-                        rich_text = block.get("paragraph", {}).get("rich_text", [])
-                        plain_text = "".join([t.get("plain_text", "") for t in rich_text])
-                        # Keep even empty lines if they are part of formatting? 
-                        # Usually we might want to skip only completely empty blocks if valid text exists.
-                        # But for "line preservation" let's keep non-empty strings, or maybe meaningful breaks.
-                        if plain_text.strip():
-                            lines.append(plain_text)
-                return lines
-    except Exception as e:
-        print(f"Error fetching page content: {e}")
-    return []
-
-def get_random_key_message(token, db_id):
-    url = f"https://api.notion.com/v1/databases/{db_id}/query"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    payload = { "page_size": 100 }
-    data_json = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data_json, headers=headers)
+async def get_random_key_message(client, db_id, index=None, deck=None):
+    # Selection works on the local index; the DB is only queried when the
+    # index is older than KEY_MESSAGE_INDEX_TTL, and a page body is only
+    # fetched the first time that page is picked after an edit.
+    # The rotation deck deals every message once per round (KEY_MESSAGE_ROTATION=daily
+    # keeps one message per day).
+    if index is None: index = KeyMessageIndex.load(db_id)
+    if deck is None: deck = RotationDeck.load(db_id)
     
     try:
-        with urllib.request.urlopen(req) as response:
-            if response.status != 200:
-                print(f"Failed to query database: {response.status}")
-                return None
-            
-            resp_body = response.read().decode("utf-8")
-            data = json.loads(resp_body)
-            results = data.get("results", [])
-            
-            if not results:
-                print("No entries found in Key Message database.")
-                return None
-                
-            # Pick random
-            choice = random.choice(results)
-            page_id = choice.get("id")
+        run_metrics.cache("key_message_index", hit=not index.is_stale())
+        if index.is_stale():
+            print("Refreshing Key Message index...")
+            await index.refresh_async(client)
             
-            # 1. Try to get Body Content first (per logic "content first, fallback to title" or "title missing -> content")
-            # User said: "If title is missing, use content". 
-            # But let's check both or prioritize content if it looks like a message body.
-            # actually usually Notion users put long text in body.
-            
-            lines = get_page_content_lines(token, page_id)
-            if lines:
-                return "\n".join(lines)
-            
-            # 2. Fallback to Title
-            props = choice.get("properties", {})
-            title_list = []
-            for key, val in props.items():
-                if val.get("type") == "title":
-                    title_list = val.get("title", [])
-                    break
-            
-            if title_list:
-                text = "".join([t.get("plain_text", "") for t in title_list])
-                return text
-            
-            return "No Text Found"
+        page_ids = index.page_ids()
+        if not page_ids:
+            print("No entries found in Key Message database.")
+            return None
             
+        # Next message from the shuffled deck
+        page_id = deck.pick(index.weights(), pool_version=index.refreshed_at)
+        
+        # Body content first, fallback to title
+        return await index.message_async(client, page_id)
+        
     except Exception as e:
         print(f"Error getting key message: {e}")
         return None
 
+def first_paragraph_id(blocks):
+    for block in blocks:
+        if block.get("type") == "paragraph":
+            return block.get("id")
+    return None
+
+async def find_child_paragraph(client, parent_id):
+    # -> (paragraph id or None, whether the children were listed)
+    blocks = await client.list_children(parent_id)
+    if blocks is None:
+        print(f"Error finding child block of {parent_id}.")
+        return None, False
+    return first_paragraph_id(blocks), True
+
+async def fetch_message_and_target(token, db_id, index, deck, target_callout_id):
+    # Picking the message (index refresh, page body) and finding the target
+    # paragraph are independent reads, so they share one event loop.
+    # The paragraph id is only looked up when it isn't cached.
+    # -> (text, paragraph id, whether the callout was listed and has no paragraph)
+    async with AsyncNotionClient(token) as client:
+        lookups = [get_random_key_message(client, db_id, index, deck)]
+        if not index.targets.get(target_callout_id):
+            print(f"Finding child block of {target_callout_id}...")
+            lookups.append(find_child_paragraph(client, target_callout_id))
+        results = await asyncio.gather(*lookups)
+    text = results[0]
+    if len(results) == 1:
+        return text, index.targets.get(target_callout_id), False
+    child_id, listed = results[1]
+    return text, child_id, listed and not child_id
+
 def find_or_create_child_paragraph(token, parent_id):
-    url = f"https://api.notion.com/v1/blocks/{parent_id}/children"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
+    data = notion_request(token, f"blocks/{parent_id}/children")
+    if data is None:
+        print(f"Error finding child block of {parent_id}.")
+        return None
     
-    try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                resp_body = response.read().decode("utf-8")
-                results = json.loads(resp_body).get("results", [])
-                
-                # Look for an existing paragraph block
-                for block in results:
-                    if block.get("type") == "paragraph":
-                        return block.get("id")
-                
-                # If no paragraph found (or only other types), create one
-                print("No suitable child block found. Creating new paragraph...")
-                create_payload = {
-                    "children": [
-                        {
-                            "object": "block",
-                            "type": "paragraph",
-                            "paragraph": {
-                                "rich_text": [{ "text": { "content": "Placeholder" } }]
-                            }
-                        }
-                    ]
+    # Look for an existing paragraph block
+    child_id = first_paragraph_id(data.get("results", []))
+    if child_id:
+        return child_id
+    return create_child_paragraph(token, parent_id)
+
+def create_child_paragraph(token, parent_id):
+    # If no paragraph found (or only other types), create one
+    print("No suitable child block found. Creating new paragraph...")
+    create_payload = {
+        "children": [
+            {
+                "object": "block",
+                "type": "paragraph",
+                "paragraph": {
+                    "rich_text": [{ "text": { "content": "Placeholder" } }]
                 }
-                create_json = json.dumps(create_payload).encode("utf-8")
-                create_req = urllib.request.Request(url, data=create_json, headers=headers, method="PATCH")
-                
-                with urllib.request.urlopen(create_req) as create_resp:
-                     if create_resp.status == 200:
-                        create_body = create_resp.read().decode("utf-8")
-                        new_results = json.loads(create_body).get("results", [])
-                        if new_results:
-                            return new_results[0].get("id")
-                            
-    except Exception as e:
-        print(f"Error finding/creating child block: {e}")
-        
+            }
+        ]
+    }
+    created = notion_request(token, f"blocks/{parent_id}/children", method="PATCH", payload=create_payload)
+    new_results = (created or {}).get("results", [])
+    if new_results:
+        return new_results[0].get("id")
     return None
 
 def update_equation_block(token, block_id, text):
-    url = f"https://api.notion.com/v1/blocks/{block_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-
     # Split text by newline to create multi-line equation
     lines = text.split('\n')
     
@@ -178,17 +134,11 @@ def update_equation_block(token, block_id, text):
         }
     }
     
-    data_json = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data_json, headers=headers, method="PATCH")
-    
-    try:
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200:
-                print("Block updated successfully.")
-            else:
-                print(f"Failed to update block: {response.status}")
-    except Exception as e:
-        print(f"Error updating block: {e}")
+    if notion_request(token, f"blocks/{block_id}", method="PATCH", payload=payload) is not None:
+        print("Block updated successfully.")
+        return True
+    print("Failed to update block.")
+    return False
 
 def main():
     token = os.environ.get("NOTION_TOKEN")
@@ -202,8 +152,13 @@ def main():
     # 'Key Message' Callout ID
     target_callout_id = "2f90d907-031e-80ff-b50d-ee245fc589b1"
     
+    index = KeyMessageIndex.load(db_id)
+    deck = RotationDeck.load(db_id)
+    
     print("Fetching random key message...")
-    text = get_random_key_message(token, db_id)
+    with span("select_message"):
+        text, child_id, no_paragraph = asyncio.run(fetch_message_and_target(token, db_id, index, deck, target_callout_id))
+    deck.save()
     
     if not text:
         print("Could not fetch message.")
@@ -211,14 +166,37 @@ def main():
         
     print(f"Selected: {text}")
     
-    print(f"Finding child block of {target_callout_id}...")
-    child_id = find_or_create_child_paragraph(token, target_callout_id)
+    if text == index.last_text:
+        print("Message already shown. Skipping update.")
+        run_metrics.incr("writes_skipped")
+        index.save()
+        return
     
-    if child_id:
-        print(f"Updating child block {child_id}...")
-        update_equation_block(token, child_id, text)
-    else:
-        print("Could not find or create child block to update.")
+    # The target paragraph id is cached; it is looked up again only if the update fails
+    with span("update_block"):
+        if no_paragraph:
+            # Already listed above; no need to list the callout again
+            child_id = create_child_paragraph(token, target_callout_id)
+        elif not child_id:
+            child_id = find_or_create_child_paragraph(token, target_callout_id)
+        
+        if child_id:
+            print(f"Updating child block {child_id}...")
+            updated = update_equation_block(token, child_id, text)
+            
+            if not updated and index.targets.get(target_callout_id):
+                print("Cached child block failed. Looking it up again...")
+                child_id = find_or_create_child_paragraph(token, target_callout_id)
+                updated = bool(child_id) and update_equation_block(token, child_id, text)
+            
+            if updated:
+                run_metrics.incr("writes_applied")
+                index.targets[target_callout_id] = child_id
+                index.last_text = text
+        else:
+            print("Could not find or create child block to update.")
+    
+    index.save()
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
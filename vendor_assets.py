@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import hashlib
+import urllib.request
+
+from cache_store import cache_path
+from site_output import precompress
+from tracing import span
+
+# Third-party scripts served from this site instead of a CDN. Each bundle
+# concatenates pinned package files into vendor/<name>.<hash>.js; the hash
+# covers the content, so a file name never changes meaning and the browser
+# can keep it as long as it likes. vendor/manifest.json maps bundle names
+# to the current file, and every chart page shares the same bundle.
+#
+#   python vendor_assets.py            # (re)build every bundle
+#
+# Downloads are kept in .cache/vendor, so a pinned file is fetched once.
+# If a bundle can't be built, pages fall back to the same pinned CDN URLs.
+
+# NPM_CDN_BASE=http://127.0.0.1:8766/npm serves the files from fake_notion_server.py
+NPM_CDN_BASE = os.environ.get("NPM_CDN_BASE", "https://cdn.jsdelivr.net/npm").rstrip("/")
+VENDOR_DIR = "vendor"
+MANIFEST_FILE = os.path.join(VENDOR_DIR, "manifest.json")
+
+# bundle -> [(package, pinned version, file in the package)]
+BUNDLES = {
+    "chart": [
+        ("chart.js", "4.4.1", "dist/chart.umd.js"),
+        ("chartjs-plugin-datalabels", "2.0.0", "dist/chartjs-plugin-datalabels.min.js")
+    ]
+}
+
+def package_url(package, version, path):
+    return f"{NPM_CDN_BASE}/{package}@{version}/{path}"
+
+def fetch_package_file(package, version, path):
+    # Pinned versions never change, so a cached download is reused as is
+    cached = cache_path(os.path.join("vendor", f"{package}@{version}", path.replace("/", "_")))
+    if os.path.exists(cached):
+        with open(cached, "rb") as f:
+            return f.read()
+    url = package_url(package, version, path)
+    print(f"Downloading {url}...")
+    with span("vendor_download", package=package):
+        with urllib.request.urlopen(url, timeout=20) as response:
+            data = response.read()
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    with open(cached, "wb") as f:
+        f.write(data)
+    return data
+
+def load_manifest():
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def build_bundle(name):
+    # -> path of vendor/<name>.<hash>.js, or None if a file could not be fetched
+    try:
+        parts = [(package, version, path, fetch_package_file(package, version, path)) for package, version, path in BUNDLES[name]]
+    except Exception as e:
+        print(f"Could not vendor {name} bundle: {e}")
+        return None
+
+    # Every file ends with ';' so a missing trailing semicolon can't join two files
+    content = b"".join(f"/* {package}@{version} */\n".encode("utf-8") + data.strip() + b"\n;\n" for package, version, path, data in parts)
+    digest = hashlib.sha256(content).hexdigest()
+    bundle_path = f"{VENDOR_DIR}/{name}.{digest[:10]}.js"
+
+    os.makedirs(VENDOR_DIR, exist_ok=True)
+    if not os.path.exists(bundle_path):
+        with open(bundle_path, "wb") as f:
+            f.write(content)
+        precompress(bundle_path, content)
+    # Older bundles of this name are no longer referenced by any page
+    for filename in os.listdir(VENDOR_DIR):
+        if filename.startswith(f"{name}.") and not filename.startswith(os.path.basename(bundle_path)):
+            os.remove(os.path.join(VENDOR_DIR, filename))
+
+    manifest = load_manifest()
+    entry = {
+        "file": bundle_path,
+        "sha256": digest,
+        "sources": [{"package": package, "version": version, "path": path, "sha256": hashlib.sha256(data).hexdigest()}
+                    for package, version, path, data in parts]
+    }
+    if manifest.get(name) != entry:
+        manifest[name] = entry
+        with open(MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+            f.write("\n")
+    return bundle_path
+
+def ensure_bundle(name):
+    # Current bundle file; rebuilt only if it is missing or its pins changed
+    entry = load_manifest().get(name)
+    pins = [[package, version, path] for package, version, path in BUNDLES[name]]
+    if entry and os.path.exists(entry["file"]) and [[s["package"], s["version"], s["path"]] for s in entry["sources"]] == pins:
+        return entry["file"]
+    return build_bundle(name)
+
+def cdn_tags(name):
+    return "\n".join(f'<script src="{package_url(package, version, path)}"></script>' for package, version, path in BUNDLES[name])
+
+def script_tags(name, global_name="Chart"):
+    # <script> tags for a page in the site root: the vendored bundle, or the
+    # pinned CDN files. If the bundle fails to load (e.g. not deployed yet),
+    # the CDN files are written in its place while the page is still parsing.
+    entry = load_manifest().get(name)
+    if not entry or not os.path.exists(entry["file"]):
+        return cdn_tags(name)
+    fallback = json.dumps(cdn_tags(name)).replace("</", "<\\/")
+    return f'<script src="{entry["file"]}"></script>\n<script>window.{global_name} || document.write({fallback});</script>'
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+    for name in BUNDLES:
+        path = build_bundle(name)
+        if path:
+            print(f"{name}: {path} ({os.path.getsize(path) / 1024:.1f} KB)")
+
+if __name__ == "__main__":
+    main()